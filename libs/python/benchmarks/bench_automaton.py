@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Pattern matching latency benchmark
+
+Fuzzes every source pattern (brand, CVV and detailed patterns) plus a few
+badly written overlay-style patterns with digit strings up to 19 long, some
+random and some built to make a backtracking engine retry, and reports the
+median, 99th percentile and worst per-call latency of re.match against the digit automata.
+
+Usage: python benchmarks/bench_automaton.py [--calls 1000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+# Nested and overlapping repetitions, as a careless overlay might write them
+ADVERSARIAL = [
+    '^(\\d+)+5$',
+    '^(?:4|44)*5$',
+    '^(\\d|\\d\\d)+0$',
+    '^(?=.{16,19}$)(?:[0-9]*[0-9]*[0-9]*)1$',
+]
+
+
+def _inputs(rng, calls):
+    """Random numbers, and repetitive ones that fail on the last digit."""
+    numbers = []
+    for i in range(calls):
+        length = rng.randint(12, 19)
+        if i % 2:
+            numbers.append(''.join(rng.choice('0123456789') for _ in range(length)))
+        else:
+            numbers.append(rng.choice('14') * (length - 1) + rng.choice('0123456789'))
+    return numbers
+
+
+def _latencies(match, numbers):
+    timings = []
+    for number in numbers:
+        start = time.perf_counter_ns()
+        match(number)
+        timings.append(time.perf_counter_ns() - start)
+    timings.sort()
+    return timings[len(timings) // 2], timings[len(timings) * 99 // 100], timings[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--calls', type=int, default=1000, help='Inputs per pattern')
+    args = parser.parse_args()
+
+    from creditcard_identifier.automaton import DigitAutomaton
+    from creditcard_identifier.brands import BRANDS
+    from creditcard_identifier.brands_detailed import get_index
+
+    source = set()
+    for brand in BRANDS:
+        source.update((brand['regexp_bin'], brand['regexp_full'], brand['regexp_cvv']))
+    for record in get_index()['schemes']:
+        source.update(p['bin'] for p in record.get('patterns', ()))
+
+    rng = random.Random(42)
+    print(f'{"patterns":<14}{"engine":<10}{"median":>12}{"p99":>14}{"worst":>14}')
+    for label, patterns in (('source', sorted(source)), ('adversarial', ADVERSARIAL)):
+        results = {'re': [0, 0, 0], 'automaton': [0, 0, 0]}
+        for pattern in patterns:
+            numbers = _inputs(rng, args.calls)
+            regex, automaton = re.compile(pattern), DigitAutomaton(pattern)
+            for engine, match in (('re', regex.match), ('automaton', automaton.match)):
+                results[engine] = [max(a, b) for a, b in zip(results[engine], _latencies(match, numbers))]
+        for engine, (median, p99, worst) in results.items():
+            print(f'{label:<14}{engine:<10}{median / 1000:>10.2f}us{p99 / 1000:>12.2f}us{worst / 1000:>12.2f}us')
+
+
+if __name__ == '__main__':
+    main()
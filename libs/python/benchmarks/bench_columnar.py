@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Columnar classification benchmark
+
+Classifies a column of card numbers per row with find_brand, then with the
+pandas accessor and the PyArrow functions, and reports numbers/sec.
+
+Usage: python benchmarks/bench_columnar.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+PREFIXES = ['4012001', '5533798', '3782822', '6011236', '6362970', '6062825', '6220123', '3056930']
+
+
+def _numbers(count):
+    rng = random.Random(42)
+    return [
+        rng.choice(PREFIXES) + ''.join(rng.choice('0123456789') for _ in range(9))
+        for _ in range(count)
+    ]
+
+
+def _time(name, func, rows):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f'{name:<16}{elapsed:>10.3f}s{rows / elapsed:>14,.0f} numbers/s')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    import pandas as pd
+    import pyarrow as pa
+    from creditcard_identifier import find_brand
+    from creditcard_identifier import columnar
+
+    numbers = _numbers(args.rows)
+    series = pd.Series(numbers)
+    array = pa.array(numbers)
+    # Load the prefix table and BIN indexes outside the timings
+    series.head().cc.issuer()
+
+    _time('find_brand', lambda: [find_brand(n) for n in numbers], args.rows)
+    _time('series.brand', series.cc.brand, args.rows)
+    _time('series.luhn', series.cc.luhn, args.rows)
+    _time('series.issuer', series.cc.issuer, args.rows)
+    _time('brand_array', lambda: columnar.brand_array(array), args.rows)
+    _time('luhn_array', lambda: columnar.luhn_array(array), args.rows)
+    _time('issuer_array', lambda: columnar.issuer_array(array), args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Sorted enrichment benchmark
+
+Enriches a BIN-sorted list of card numbers with their detailed bins, once
+with find_brand(detailed=True) per number and once with enrich_sorted, and
+reports records/sec and the memory kept while draining the results
+(traced in a separate, slower pass).
+
+Usage: python benchmarks/bench_enrich.py [--rows 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+
+def _numbers(count):
+    """Sorted numbers drawn under real bins, several per bin."""
+    from creditcard_identifier.bin_index import decode_bin
+    from creditcard_identifier.validator import _get_validator
+
+    validator = _get_validator()
+    prefixes = []
+    for scheme in validator._get_shards():
+        index = validator._get_bin_index(scheme)
+        if index is not None:
+            prefixes.extend(decode_bin(key) for key in index.keys)
+    rng = random.Random(42)
+    return sorted(
+        prefix + ''.join(rng.choice('0123456789') for _ in range(16 - len(prefix)))
+        for prefix in (rng.choice(prefixes) for _ in range(count))
+    )
+
+
+def _time(name, func, rows):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{name:<16}{elapsed:>10.3f}s{rows / elapsed:>14,.0f} records/s{peak / 1e6:>10.1f}MB peak')
+
+
+def _drain(iterable):
+    for _ in iterable:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    from creditcard_identifier import enrich_sorted, find_brand
+
+    numbers = _numbers(args.rows)
+    _drain(enrich_sorted(numbers[:1]))
+
+    _time('find_brand', lambda: _drain(find_brand(n, detailed=True) for n in numbers), args.rows)
+    _time('enrich_sorted', lambda: _drain(enrich_sorted(numbers)), args.rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Detailed data load benchmark
+
+Compares on-disk size, load time and peak RSS of:
+
+- none:  bare interpreter, for reference
+- json:  json.load of the monolithic cards-detailed.json (previous format)
+- dicts: get_brands() decoding every compressed shard into dicts
+- index: streaming every compressed shard into the compact BIN index
+
+Each mode runs in a fresh interpreter so peak RSS is not shared.
+
+Usage: python benchmarks/bench_load.py (Linux only: reads /proc/self/status)
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+MODES = {
+    'none': '''
+data = None
+''',
+    'json': '''
+import json
+with open(sys.argv[2], 'r', encoding='utf-8') as f:
+    data = json.load(f)
+''',
+    'dicts': '''
+from creditcard_identifier.brands_detailed import get_brands
+data = get_brands()
+''',
+    'index': '''
+from creditcard_identifier.brands_detailed import select_shards
+from creditcard_identifier.bin_index import load_bin_index
+data = [load_bin_index(record['scheme'], shards) for record, shards in select_shards() if shards]
+''',
+}
+
+# Peak RSS comes from VmHWM: ru_maxrss survives exec and would report the parent
+RUNNER = '''
+import sys, time
+sys.path.insert(0, sys.argv[1])
+start = time.perf_counter()
+{body}
+elapsed = time.perf_counter() - start
+with open('/proc/self/status') as f:
+    peak = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+print(elapsed, peak)
+'''
+
+
+def _dir_size(path):
+    return sum(
+        os.path.getsize(os.path.join(dirpath, name))
+        for dirpath, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def _run(mode, json_path, repeat=3):
+    """Run a mode in fresh interpreters, returning best time and peak RSS in KB."""
+    results = []
+    for _ in range(repeat):
+        out = subprocess.check_output([
+            sys.executable, '-c', RUNNER.format(body=MODES[mode]), ROOT, json_path,
+        ])
+        elapsed, rss = out.split()
+        results.append((float(elapsed), int(rss)))
+    return min(r[0] for r in results), min(r[1] for r in results)
+
+
+def main():
+    from creditcard_identifier.brands_detailed import DATA_DIR, get_brands
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Rebuild the monolithic file the way scripts/build.js used to write it
+        json_path = os.path.join(tmp, 'cards-detailed.json')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(get_brands(), f, indent=2, ensure_ascii=False)
+
+        sizes = {
+            'none': 0,
+            'json': os.path.getsize(json_path),
+            'dicts': _dir_size(DATA_DIR),
+            'index': _dir_size(DATA_DIR),
+        }
+        print(f'{"mode":<8}{"on disk":>12}{"load time":>12}{"peak RSS":>12}')
+        for mode in MODES:
+            elapsed, rss = _run(mode, json_path)
+            print(f'{mode:<8}{sizes[mode] / 1e6:>10.1f}MB{elapsed:>11.3f}s{rss / 1024:>10.1f}MB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+PAN scanner benchmark
+
+Writes a synthetic application log (timestamps, request ids, long order
+numbers and phone numbers, with a card number, plain or separated, in
+about one line in fifty) and scans it with one worker and with one per
+CPU, reporting GB/s.
+
+Usage: python benchmarks/bench_scan.py [--size-mb 256] [--files 4]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+CARDS = ['4012001037141112', '5555666677778884', '378282246310005', '6011000990139424', '36490102462661']
+
+
+def _line(rng):
+    """One log line."""
+    line = (
+        f'2024-05-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:'
+        f'{rng.randint(0, 59):02d}.{rng.randint(0, 999999):06d}Z INFO [worker-{rng.randint(1, 64)}] '
+        f'request_id={rng.getrandbits(64):016x} order={rng.randint(10 ** 13, 10 ** 15)} '
+        f'customer phone=+1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)} latency_ms={rng.randint(1, 900)}'
+    )
+    if rng.random() < 0.02:
+        card = rng.choice(CARDS)
+        if rng.random() < 0.5:
+            card = ' '.join(card[i:i + 4] for i in range(0, len(card), 4))
+        line += f' payment card={card}'
+    return line + '\n'
+
+
+def _write(path, size, seed):
+    rng = random.Random(seed)
+    lines = [_line(rng) for _ in range(20000)]
+    block = ''.join(lines).encode('ascii')
+    with open(path, 'wb') as f:
+        for _ in range(max(size // len(block), 1)):
+            f.write(block)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size-mb', type=int, default=256, help='Total corpus size')
+    parser.add_argument('--files', type=int, default=4)
+    args = parser.parse_args()
+
+    from creditcard_identifier.scan import scan_paths
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [os.path.join(tmp, f'app-{i}.log') for i in range(args.files)]
+        for i, path in enumerate(paths):
+            _write(path, args.size_mb * 1024 * 1024 // args.files, i)
+        total = sum(os.path.getsize(path) for path in paths)
+        list(scan_paths(paths[:1], workers=1, chunk_size=1024 * 1024))
+
+        for workers in sorted({1, os.cpu_count() or 1}):
+            start = time.perf_counter()
+            found = sum(1 for _ in scan_paths(paths, workers=workers))
+            elapsed = time.perf_counter() - start
+            print(f'workers={workers:<4}{total / 1e6:>10.0f}MB{elapsed:>10.3f}s'
+                  f'{total / elapsed / 1e9:>10.3f}GB/s{found:>10} found')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Lookup server load test
+
+Starts `python -m creditcard_identifier serve` on localhost, then drives it
+with keep-alive connections and reports requests/sec and p50/p99 latency
+for single lookups and for the batch endpoint.
+
+Usage: python benchmarks/bench_server.py [--workers 4] [--connections 64] [--duration 5]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+PREFIXES = ['4012001', '5533798', '3782822', '6011236', '6362970', '6062825', '6220123', '3056930']
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _numbers(count):
+    rng = random.Random(42)
+    return [
+        rng.choice(PREFIXES) + ''.join(rng.choice('0123456789') for _ in range(9))
+        for _ in range(count)
+    ]
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = 0
+    for line in head.split(b'\r\n'):
+        if line.lower().startswith(b'content-length:'):
+            length = int(line.split(b':')[1])
+    return await reader.readexactly(length)
+
+
+async def _client(port, requests, deadline, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        writer.write(requests[i % len(requests)])
+        await _read_response(reader)
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    writer.close()
+
+
+async def _load(port, requests, connections, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(
+        _client(port, requests, deadline, latencies) for _ in range(connections)
+    ))
+    return latencies
+
+
+def _report(name, latencies, duration, items_per_request=1):
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    rps = len(latencies) / duration
+    print(f'{name:<10}{rps:>12,.0f} req/s{rps * items_per_request:>14,.0f} numbers/s'
+          f'{p50:>10.2f}ms p50{p99:>10.2f}ms p99')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--connections', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=5.0)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'creditcard_identifier', 'serve',
+         '--port', str(port), '--workers', str(args.workers)],
+        cwd=ROOT,
+    )
+    try:
+        for _ in range(100):
+            try:
+                socket.create_connection(('127.0.0.1', port)).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+
+        numbers = _numbers(10000)
+        single = [f'GET /brand/{n} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode() for n in numbers]
+        body = '\n'.join(numbers[:args.batch_size]).encode()
+        batch = [b'POST /batch HTTP/1.1\r\nHost: localhost\r\nContent-Length: %d\r\n\r\n' % len(body) + body]
+
+        print(f'workers={args.workers} connections={args.connections} duration={args.duration}s')
+        latencies = asyncio.run(_load(port, single, args.connections, args.duration))
+        _report('single', latencies, args.duration)
+        latencies = asyncio.run(_load(port, batch, args.connections, args.duration))
+        _report(f'batch/{args.batch_size}', latencies, args.duration, args.batch_size)
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == '__main__':
+    main()
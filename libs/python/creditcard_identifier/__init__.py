@@ -8,8 +8,15 @@ from .validator import (
     CreditCardValidator,
     find_brand,
     is_supported,
+    lookup_bin,
     validate_cvv,
+    warmup,
 )
+from .aggregate import Counts, count
+from .dataset_diff import affected, diff_datasets
+from .enrich import enrich_sorted
+from .overlay import Overlay
+from .shadow import ShadowValidator
 from .brands import BRANDS as brands
 from .brands_detailed import BRANDS as brands_detailed
 
@@ -18,7 +25,16 @@ __all__ = [
     "CreditCardValidator",
     "find_brand",
     "is_supported",
+    "lookup_bin",
     "validate_cvv",
+    "warmup",
+    "count",
+    "Counts",
+    "enrich_sorted",
+    "diff_datasets",
+    "affected",
+    "Overlay",
+    "ShadowValidator",
     "brands",
     "brands_detailed",
 ]
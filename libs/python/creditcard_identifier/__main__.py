@@ -0,0 +1,137 @@
+"""
+Command line interface
+
+Usage:
+    python -m creditcard_identifier serve [--port 8080] [--workers 4]
+    python -m creditcard_identifier scan [--workers 4] [--json] PATH...
+    python -m creditcard_identifier diff [--json] [--filter FILE] OLD [NEW]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+
+def _split(value):
+    """Parse a comma-separated option value."""
+    return [v for v in value.split(',') if v] if value else None
+
+
+def _serve(args):
+    from .server import run
+    run(
+        host=args.host,
+        port=args.port,
+        unix_socket=args.unix,
+        workers=args.workers,
+        detailed=args.detailed,
+        schemes=_split(args.schemes),
+        countries=_split(args.countries),
+    )
+    return 0
+
+
+def _walk(paths):
+    """Expand directories into the files below them."""
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, names in os.walk(path):
+                for name in sorted(names):
+                    yield os.path.join(dirpath, name)
+        else:
+            yield path
+
+
+def _scan(args):
+    from .scan import scan_paths
+    paths = list(_walk(args.paths))
+    total = sum(os.path.getsize(path) for path in paths)
+    start = time.perf_counter()
+    found = 0
+    out = sys.stdout
+    for finding in scan_paths(paths, workers=args.workers):
+        found += 1
+        if args.json:
+            out.write(json.dumps(finding._asdict()) + '\n')
+        else:
+            out.write(f'{finding.path}:{finding.offset}: {finding.brand} {finding.masked}\n')
+    elapsed = time.perf_counter() - start
+    print(f'{found} card numbers in {len(paths)} files, {total / 1e6:.1f}MB in {elapsed:.2f}s '
+          f'({total / 1e9 / max(elapsed, 1e-9):.2f} GB/s)', file=sys.stderr)
+    return 1 if found else 0
+
+
+def _describe(change):
+    """One line describing a dataset change."""
+    span = change.first if change.first == change.last else f'{change.first}-{change.last}'
+    if change.kind == 'brand':
+        lengths = ', '.join(f'{n}: {change.old[n]} -> {change.new[n]}' for n in sorted(change.old))
+        return f'{span} brand {lengths}'
+    if change.old is None:
+        return f'{span} bin {change.scheme}: added {change.new["bin"]}'
+    if change.new is None:
+        return f'{span} bin {change.scheme}: removed {change.old["bin"]}'
+    fields = sorted(set(change.old) | set(change.new))
+    details = ', '.join(
+        f'{field}: {change.old.get(field)!r} -> {change.new.get(field)!r}'
+        for field in fields if change.old.get(field) != change.new.get(field))
+    return f'{span} bin {change.scheme}: {details}'
+
+
+def _diff(args):
+    from .dataset_diff import affected, diff_datasets
+    changes = diff_datasets(args.old, args.new)
+    out = sys.stdout
+    if args.filter:
+        stream = sys.stdin if args.filter == '-' else open(args.filter, 'r', encoding='utf-8')
+        with stream:
+            for line in affected((line.rstrip('\r\n') for line in stream), changes, key=str.strip):
+                out.write(line + '\n')
+    else:
+        for change in changes:
+            out.write((json.dumps(change._asdict()) if args.json else _describe(change)) + '\n')
+    return 1 if changes else 0
+
+
+def main(argv=None):
+    """Run the command line interface."""
+    parser = argparse.ArgumentParser(prog='python -m creditcard_identifier')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    serve = commands.add_parser('serve', help='run the HTTP lookup server')
+    serve.add_argument('--host', default='127.0.0.1', help='TCP host (default: 127.0.0.1)')
+    serve.add_argument('--port', type=int, default=8080, help='TCP port (default: 8080)')
+    serve.add_argument('--unix', metavar='PATH', help='listen on a Unix socket instead of TCP')
+    serve.add_argument('--workers', type=int, default=1,
+                       help='worker processes sharing the loaded data (default: 1)')
+    serve.add_argument('--detailed', action='store_true',
+                       help='load detailed data before serving')
+    serve.add_argument('--schemes', help='comma-separated schemes for detailed data')
+    serve.add_argument('--countries', help='comma-separated countries for detailed data')
+    serve.set_defaults(func=_serve)
+
+    scan = commands.add_parser('scan', help='find card numbers in files (exit status 1 if any)')
+    scan.add_argument('paths', nargs='+', metavar='PATH', help='files or directories to scan')
+    scan.add_argument('--workers', type=int, default=None,
+                      help='worker processes (default: CPU count)')
+    scan.add_argument('--json', action='store_true', help='print findings as NDJSON')
+    scan.set_defaults(func=_scan)
+
+    diff = commands.add_parser('diff', help='compare two dataset versions (exit status 1 if they differ)')
+    diff.add_argument('old', metavar='OLD', help='data directory or cards.json of the old version')
+    diff.add_argument('new', metavar='NEW', nargs='?',
+                      help='data directory or cards.json of the new version (default: this package)')
+    diff.add_argument('--json', action='store_true', help='print changes as NDJSON')
+    diff.add_argument('--filter', metavar='FILE',
+                      help='print the BINs or card numbers (one per line, - for stdin) the changes affect')
+    diff.set_defaults(func=_diff)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
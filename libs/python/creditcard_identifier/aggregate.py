@@ -0,0 +1,273 @@
+"""
+Aggregation-only classification
+
+This module counts card numbers by brand and detailed BIN fields without
+building a result per number: each number is classified straight into an
+integer counter keyed by compact ids (brand indexes and ids into the shared
+BIN value table), and ids are only turned back into names when the counts
+are read.
+"""
+
+from .bin_index import BinIndex, _value_id, _values
+from .brands_detailed import BIN_FIELDS
+from .validator import _get_validator
+
+
+# Fields that can be counted by, and the BIN index column of each detail field
+FIELDS = ('brand', 'type', 'category', 'issuer', 'country')
+_COLUMNS = {
+    'type': BIN_FIELDS.index('type') - 1,
+    'category': BIN_FIELDS.index('category') - 1,
+    'issuer': BIN_FIELDS.index('issuer') - 1,
+    'country': BIN_FIELDS.index('countries') - 1,
+}
+
+
+def _label(field, value):
+    """Present a stored value: bins listing several countries join them."""
+    if field == 'country' and value is not None:
+        return ','.join(value)
+    return value
+
+
+def _unlabel(field, label):
+    """Inverse of _label."""
+    if field == 'country' and label is not None:
+        return tuple(label.split(','))
+    return label
+
+
+class Counts:
+    """
+    Histogram of card numbers keyed by the requested fields.
+
+    Keys are tuples of labels in ``by`` order (brand name, type, category,
+    issuer, country); None stands for no brand or no matching bin. Counts
+    from other processes are merged with ``update`` or ``+``; pickling
+    stores labels, so ids never leak across processes.
+    """
+
+    def __init__(self, by=('brand',), brands=None):
+        """
+        Initialize empty counts.
+
+        Args:
+            by: Field names to group by (see FIELDS)
+            brands: Brand names indexed by brand id (default: all brands)
+
+        Raises:
+            ValueError: If a field is unknown or repeated
+        """
+        if isinstance(by, str):
+            by = (by,)
+        by = tuple(by)
+        unknown = [field for field in by if field not in FIELDS]
+        if unknown or not by or len(set(by)) != len(by):
+            raise ValueError(f'Invalid count fields: {by!r} (choose from {FIELDS})')
+        self.by = by
+        self.brands = tuple(brands or (b['name'] for b in _get_validator().brands))
+        self._brand_ids = {name: i for i, name in enumerate(self.brands)}
+        # Compact id tuple -> count
+        self.counters = {}
+
+    def _decode(self, key):
+        """Turn a compact id tuple into stored values."""
+        return tuple(
+            (self.brands[i] if i >= 0 else None) if field == 'brand' else _values[i]
+            for field, i in zip(self.by, key)
+        )
+
+    def _encode(self, values):
+        """Turn stored values into a compact id tuple."""
+        return tuple(
+            (self._brand_ids[value] if value is not None else -1) if field == 'brand' else _value_id(value)
+            for field, value in zip(self.by, values)
+        )
+
+    def items(self):
+        """
+        Iterate over the counts.
+
+        Yields:
+            (labels, count) tuples
+        """
+        by = self.by
+        for key, n in self.counters.items():
+            yield tuple(_label(f, v) for f, v in zip(by, self._decode(key))), n
+
+    def to_dict(self):
+        """
+        Get the counts as a plain dict.
+
+        Returns:
+            Dict of labels tuple -> count
+        """
+        return dict(self.items())
+
+    def most_common(self, n=None):
+        """
+        Get the largest counts first.
+
+        Args:
+            n: Number of entries to return (default: all)
+
+        Returns:
+            List of (labels, count) tuples
+        """
+        ranked = sorted(self.items(), key=lambda item: item[1], reverse=True)
+        return ranked if n is None else ranked[:n]
+
+    @property
+    def total(self):
+        """Number of card numbers counted."""
+        return sum(self.counters.values())
+
+    def __getitem__(self, labels):
+        if not isinstance(labels, tuple):
+            labels = (labels,)
+        values = tuple(_unlabel(f, label) for f, label in zip(self.by, labels))
+        if len(values) != len(self.by) or any(
+                f == 'brand' and v is not None and v not in self._brand_ids
+                for f, v in zip(self.by, values)):
+            return 0
+        return self.counters.get(self._encode(values), 0)
+
+    def __len__(self):
+        return len(self.counters)
+
+    def __eq__(self, other):
+        if not isinstance(other, Counts):
+            return NotImplemented
+        return self.by == other.by and self.to_dict() == other.to_dict()
+
+    def update(self, other):
+        """
+        Add the counts of another Counts (e.g., from another process).
+
+        Args:
+            other: Counts grouped by the same fields
+
+        Returns:
+            self
+
+        Raises:
+            ValueError: If the counts are grouped by different fields
+        """
+        if other.by != self.by:
+            raise ValueError(f'Cannot merge counts by {other.by!r} into counts by {self.by!r}')
+        counters = self.counters
+        if other.brands == self.brands:
+            # Same process and brand list: ids are directly comparable
+            for key, n in other.counters.items():
+                counters[key] = counters.get(key, 0) + n
+        else:
+            for key, n in other.counters.items():
+                key = self._encode(other._decode(key))
+                counters[key] = counters.get(key, 0) + n
+        return self
+
+    def __add__(self, other):
+        if not isinstance(other, Counts):
+            return NotImplemented
+        return Counts(self.by, self.brands).update(self).update(other)
+
+    def __iadd__(self, other):
+        if not isinstance(other, Counts):
+            return NotImplemented
+        return self.update(other)
+
+    def __reduce__(self):
+        state = [(self._decode(key), n) for key, n in self.counters.items()]
+        return _restore, (self.by, self.brands, state)
+
+    def __repr__(self):
+        return f'Counts(by={self.by!r}, total={self.total}, keys={len(self)})'
+
+
+def _restore(by, brands, state):
+    """Unpickle Counts, assigning ids in this process."""
+    counts = Counts(by, brands)
+    for values, n in state:
+        key = counts._encode(values)
+        counts.counters[key] = counts.counters.get(key, 0) + n
+    return counts
+
+
+def count(numbers, by=('brand',), validator=None, counts=None):
+    """
+    Count card numbers by brand and detailed BIN fields.
+
+    Args:
+        numbers: Iterable of card numbers as str or bytes, such as a
+            generator or a file opened in text or binary mode (surrounding
+            whitespace, like line endings, is ignored)
+        by: Field names to group by: 'brand', 'type', 'category', 'issuer',
+            'country'
+        validator: CreditCardValidator whose brands and detailed selection
+            to use (default: the module validator)
+        counts: Counts to add to, e.g. to resume over several streams
+
+    Returns:
+        Counts instance
+
+    Raises:
+        ValueError: If a field is unknown, or counts uses other brands
+    """
+    validator = validator or _get_validator()
+    brands = validator.brands
+    names = tuple(b['name'] for b in brands)
+    if counts is None:
+        counts = Counts(by, names)
+    elif counts.brands != names:
+        raise ValueError('Counts were started with a different brand list; merge them with update()')
+    by = counts.by
+    counters = counts.counters
+    get = counters.get
+
+    brand_ids = {id(b): i for i, b in enumerate(brands)}
+    match_brand = validator._match_base_brand
+    overlay_match = validator._overlay_match if validator._overlays else None
+    table = validator._prefix_table()
+    lookup = table.lookup if table and names == tuple(table.names) else None
+    min_length = 7
+
+    detail = [_COLUMNS[field] for field in by if field != 'brand']
+    detail_fields = [BIN_FIELDS[column + 1] for column in detail]
+    brand_at = by.index('brand') if 'brand' in by else None
+    empty = BinIndex(None)
+    indexes = {}
+    no_bin = (0,) * len(detail)
+
+    for number in numbers:
+        if isinstance(number, bytes):
+            number = number.decode('ascii', 'replace')
+        number = number.strip()
+
+        # Overlays come first and may carry their own bin record
+        hit = overlay_match(number) if overlay_match is not None else None
+        if hit is not None:
+            brand_id = brand_ids[id(hit[0])] if hit[0] is not None else -1
+        # Inlined _match_base_brand fast path
+        elif lookup is not None and len(number) >= min_length and number.isdigit() and number.isascii():
+            brand_id = lookup(number)
+        else:
+            brand = match_brand(number) if number else None
+            brand_id = brand_ids[id(brand)] if brand is not None else -1
+
+        if not detail:
+            key = (brand_id,)
+        else:
+            values = no_bin
+            if brand_id >= 0 and hit is not None and hit[1] is not None:
+                values = tuple([_value_id(hit[1][field]) for field in detail_fields])
+            elif brand_id >= 0:
+                index = indexes.get(brand_id)
+                if index is None:
+                    index = indexes[brand_id] = validator._get_bin_index(brands[brand_id]['name']) or empty
+                i = index.find(number, max_length=6) if index.lengths else -1
+                if i >= 0:
+                    columns = index.columns
+                    values = tuple([columns[c][i] for c in detail])
+            key = values if brand_at is None else values[:brand_at] + (brand_id,) + values[brand_at:]
+        counters[key] = get(key, 0) + 1
+    return counts
@@ -0,0 +1,550 @@
+"""
+Digit automata
+
+This module compiles the brand, CVV, detailed and overlay patterns into
+deterministic finite automata over the ten ASCII digits. A compiled
+pattern matches a string of digits exactly like re.match does, but in one
+table lookup per digit, so matching time is bounded by the length of the
+input whatever the pattern looks like. Patterns that cannot be expressed as
+such an automaton (backreferences, lookbehind, anchors other than leading
+^ and $, literals other than digits, ...) are rejected when compiled.
+"""
+
+from array import array
+
+
+# Limits on the automata a single pattern may compile to
+MAX_NFA_STATES = 20000
+MAX_STATES = 10000
+
+_ALL_DIGITS = (1 << 10) - 1
+_DIGITS = '0123456789'
+
+
+def _pattern_error(pattern, pos, message):
+    return ValueError(f'Unsupported pattern {pattern!r} at {pos}: {message}')
+
+
+class _Parser:
+    """Parses a pattern into a syntax tree over digit sets.
+
+    Nodes are ('digits', mask), ('cat', nodes), ('alt', nodes),
+    ('repeat', node, low, high or None) and ('end',).
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.pos = 0
+
+    def _peek(self):
+        return self.pattern[self.pos] if self.pos < len(self.pattern) else ''
+
+    def _error(self, message):
+        return _pattern_error(self.pattern, self.pos, message)
+
+    def parse(self):
+        """Return (leading lookahead trees, main tree)."""
+        lookaheads = []
+        if self._peek() == '^':
+            self.pos += 1
+        while self.pattern.startswith('(?=', self.pos):
+            self.pos += 3
+            lookaheads.append(self._alternation(False))
+            if self._peek() != ')':
+                raise self._error('missing ")"')
+            self.pos += 1
+        tree = self._alternation(not lookaheads)
+        if self.pos != len(self.pattern):
+            raise self._error('unbalanced ")"')
+        return lookaheads, tree
+
+    def _alternation(self, at_start):
+        alternatives = [self._sequence(at_start)]
+        while self._peek() == '|':
+            self.pos += 1
+            alternatives.append(self._sequence(at_start))
+        return alternatives[0] if len(alternatives) == 1 else ('alt', alternatives)
+
+    def _sequence(self, at_start):
+        items = []
+        while self._peek() not in ('', '|', ')'):
+            if self._peek() == '^':
+                if not at_start or items:
+                    raise self._error('"^" after the start')
+                self.pos += 1
+                continue
+            items.append(self._quantified(self._atom(at_start and not items)))
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def _atom(self, at_start):
+        char = self._peek()
+        if char == '(':
+            if self.pattern.startswith('(?:', self.pos):
+                self.pos += 3
+            elif self.pattern.startswith('(?P<', self.pos):
+                end = self.pattern.find('>', self.pos)
+                if end < 0:
+                    raise self._error('missing ">"')
+                self.pos = end + 1
+            elif self.pattern.startswith('(?', self.pos):
+                raise self._error('lookaround, flag or group extension')
+            else:
+                self.pos += 1
+            tree = self._alternation(at_start)
+            if self._peek() != ')':
+                raise self._error('missing ")"')
+            self.pos += 1
+            return tree
+        if char == '[':
+            return ('digits', self._class())
+        if char == '\\':
+            escape = self.pattern[self.pos + 1:self.pos + 2]
+            if escape == 'd':
+                self.pos += 2
+                return ('digits', _ALL_DIGITS)
+            if escape in _DIGITS and escape:
+                raise self._error('backreference')
+            raise self._error('escape')
+        if char == '.':
+            # Any digit: only strings of digits are matched
+            self.pos += 1
+            return ('digits', _ALL_DIGITS)
+        if char == '$':
+            self.pos += 1
+            return ('end',)
+        if char and char in _DIGITS:
+            self.pos += 1
+            return ('digits', 1 << int(char))
+        raise self._error(f'{char!r}' if char else 'unexpected end')
+
+    def _class(self):
+        self.pos += 1
+        negate = self._peek() == '^'
+        if negate:
+            self.pos += 1
+        mask = 0
+        while self._peek() != ']':
+            char = self._peek()
+            if self.pattern.startswith('\\d', self.pos):
+                mask |= _ALL_DIGITS
+                self.pos += 2
+            elif char and char in _DIGITS:
+                self.pos += 1
+                end = self.pattern[self.pos + 1:self.pos + 2]
+                if self._peek() == '-' and end and end in _DIGITS:
+                    for digit in range(int(char), int(end) + 1):
+                        mask |= 1 << digit
+                    self.pos += 2
+                else:
+                    mask |= 1 << int(char)
+            else:
+                raise self._error(f'{char!r} in character class' if char else 'missing "]"')
+        self.pos += 1
+        return _ALL_DIGITS & ~mask if negate else mask
+
+    def _quantified(self, tree):
+        char = self._peek()
+        if char == '*':
+            low, high = 0, None
+            self.pos += 1
+        elif char == '+':
+            low, high = 1, None
+            self.pos += 1
+        elif char == '?':
+            low, high = 0, 1
+            self.pos += 1
+        elif char == '{':
+            end = self.pattern.find('}', self.pos)
+            bounds = self.pattern[self.pos + 1:end].split(',') if end >= 0 else ()
+            if not 0 < len(bounds) <= 2 or not all(b.isdigit() or b == '' for b in bounds) or bounds == ['']:
+                raise self._error('invalid repetition')
+            low = int(bounds[0] or 0)
+            high = None if len(bounds) == 2 and bounds[1] == '' else int(bounds[-1])
+            if high is not None and high < low:
+                raise self._error('invalid repetition')
+            self.pos = end + 1
+        else:
+            return tree
+        if self._peek() == '+':
+            raise self._error('possessive repetition')
+        if self._peek() == '?':
+            # Laziness changes which match is found, not whether there is one
+            self.pos += 1
+        if self._peek() in ('*', '+', '?', '{'):
+            raise self._error('multiple repeat')
+        return ('repeat', tree, low, high)
+
+
+class _Nfa:
+    """Thompson automaton built from a syntax tree."""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.edges = []
+        self.eps = []
+        self.ends = []
+
+    def state(self):
+        if len(self.edges) >= MAX_NFA_STATES:
+            raise _pattern_error(self.pattern, 0, 'too large')
+        self.edges.append([])
+        self.eps.append([])
+        self.ends.append([])
+        return len(self.edges) - 1
+
+    def build(self, tree):
+        """Build a fragment for a tree and return its (start, out) states."""
+        kind = tree[0]
+        if kind == 'digits':
+            start, out = self.state(), self.state()
+            self.edges[start].append((tree[1], out))
+        elif kind == 'end':
+            start, out = self.state(), self.state()
+            self.ends[start].append(out)
+        elif kind == 'cat':
+            start = out = self.state()
+            for item in tree[1]:
+                first, last = self.build(item)
+                self.eps[out].append(first)
+                out = last
+        elif kind == 'alt':
+            start, out = self.state(), self.state()
+            for item in tree[1]:
+                first, last = self.build(item)
+                self.eps[start].append(first)
+                self.eps[last].append(out)
+        else:
+            _, item, low, high = tree
+            start = out = self.state()
+            for _ in range(low):
+                first, last = self.build(item)
+                self.eps[out].append(first)
+                out = last
+            if high is None:
+                loop = self.state()
+                first, last = self.build(item)
+                self.eps[out].append(loop)
+                self.eps[loop].append(first)
+                self.eps[last].append(loop)
+                out = loop
+            else:
+                for _ in range(high - low):
+                    first, last = self.build(item)
+                    skip = self.state()
+                    self.eps[out] += [first, skip]
+                    self.eps[last].append(skip)
+                    out = skip
+        return start, out
+
+    def closure(self, states, ends=False):
+        """States reachable without reading a digit (and at the end, if ends)."""
+        seen = set(states)
+        stack = list(states)
+        while stack:
+            state = stack.pop()
+            targets = self.eps[state] + self.ends[state] if ends else self.eps[state]
+            for target in targets:
+                if target not in seen:
+                    seen.add(target)
+                    stack.append(target)
+        return frozenset(seen)
+
+
+def _determinize(pattern, tree):
+    """
+    Subset construction with re.match semantics.
+
+    Returns:
+        (transitions, final): transitions[state] lists the next state per
+        digit, and final[state] whether a string ending there matches.
+        State 0 is the start. Once a match is found, further digits are
+        accepted, as re.match only needs a matching prefix.
+    """
+    nfa = _Nfa(pattern)
+    start, out = nfa.build(tree)
+    states = {}
+    transitions, final = [], []
+    queue = []
+
+    def state_id(subset):
+        i = states.get(subset)
+        if i is None:
+            if len(states) >= MAX_STATES:
+                raise _pattern_error(pattern, 0, 'too many automaton states')
+            i = states[subset] = len(states)
+            queue.append(subset)
+            transitions.append(None)
+            final.append(False)
+        return i
+
+    # Subsets only keep the states that read a digit, test the end or match
+    edges, ends = nfa.edges, nfa.ends
+    steps = {}
+
+    def step(targets):
+        i = steps.get(targets)
+        if i is None:
+            closure = nfa.closure(targets)
+            i = steps[targets] = state_id(frozenset(s for s in closure if edges[s] or ends[s] or s == out))
+        return i
+
+    step(frozenset([start]))
+    while queue:
+        subset = queue.pop()
+        i = states[subset]
+        if out in subset:
+            # Matched: every continuation matches too
+            transitions[i] = [i] * 10
+            final[i] = True
+            continue
+        final[i] = out in nfa.closure(subset, ends=True)
+        transitions[i] = [
+            step(frozenset(target for state in subset for mask, target in edges[state] if mask >> digit & 1))
+            for digit in range(10)
+        ]
+    return transitions, final
+
+
+def _intersect(pattern, a, b):
+    """Product of two automata: strings both match."""
+    (a_transitions, a_final), (b_transitions, b_final) = a, b
+    states = {(0, 0): 0}
+    pairs = [(0, 0)]
+    transitions, final = [], []
+    for x, y in pairs:
+        row = []
+        for digit in range(10):
+            pair = (a_transitions[x][digit], b_transitions[y][digit])
+            i = states.get(pair)
+            if i is None:
+                if len(states) >= MAX_STATES:
+                    raise _pattern_error(pattern, 0, 'too many automaton states')
+                i = states[pair] = len(pairs)
+                pairs.append(pair)
+            row.append(i)
+        transitions.append(row)
+        final.append(a_final[x] and b_final[y])
+    return transitions, final
+
+
+def _minimize(transitions, final):
+    """Merge equivalent states (Moore's partition refinement)."""
+    blocks = [int(f) for f in final]
+    count = len(set(blocks))
+    while True:
+        signatures = {}
+        get = blocks.__getitem__
+        refined = [
+            signatures.setdefault((block, *map(get, row)), len(signatures))
+            for block, row in zip(blocks, transitions)
+        ]
+        if len(signatures) == count:
+            break
+        blocks, count = refined, len(signatures)
+    # Renumber so that the start state stays 0
+    order = {}
+    for block in blocks:
+        order.setdefault(block, len(order))
+    minimal = [None] * count
+    minimal_final = [False] * count
+    for state, block in enumerate(blocks):
+        minimal[order[block]] = [order[blocks[t]] for t in transitions[state]]
+        minimal_final[order[block]] = final[state]
+    return minimal, minimal_final
+
+
+def _counted_lengths(transitions, final):
+    """
+    Lengths an automaton accepts, if it only counts digits.
+
+    Returns:
+        (bound, lengths below bound, whether longer ones are accepted), or
+        None if the automaton looks at the digits or counts modulo some
+        period
+    """
+    if any(len(set(row)) > 1 for row in transitions):
+        return None
+    steps = {}
+    state = 0
+    while state not in steps:
+        steps[state] = len(steps)
+        state = transitions[state][0]
+    if transitions[state][0] != state:
+        return None
+    bound = len(steps)
+    return bound, frozenset(n for s, n in steps.items() if final[s]), final[state]
+
+
+class DigitAutomaton:
+    """A pattern compiled to a deterministic automaton over digits."""
+
+    def __init__(self, pattern):
+        """
+        Compile a pattern.
+
+        Args:
+            pattern: Regex over digits, e.g. '^(?=.{16}$)(?:5067|4576)[0-9]*$'
+
+        Raises:
+            ValueError: If the pattern uses constructs beyond literal digits,
+                classes, \\d, ., groups, alternation, repetition, leading
+                lookaheads, ^ at the start and $, or compiles to too many
+                states
+        """
+        self.pattern = pattern
+        lookaheads, tree = _Parser(pattern).parse()
+        # Lookaheads that only count digits, like (?=.{13,19}$), become a
+        # length check: lengths below bound must be in lengths, longer ones
+        # match if longer
+        self._bound, self._lengths, self._longer = 0, frozenset(), True
+        # The product of minimal automata is close enough to minimal
+        automaton = _minimize(*_determinize(pattern, tree))
+        for lookahead in lookaheads:
+            lookahead = _minimize(*_determinize(pattern, lookahead))
+            counted = _counted_lengths(*lookahead)
+            if counted is None:
+                automaton = _intersect(pattern, lookahead, automaton)
+            else:
+                self._restrict_lengths(*counted)
+        transitions, final = automaton
+        self._transitions = array('I', [t for row in transitions for t in row])
+        self._final = tuple(final)
+        # States every digit loops back to decide the rest of the input
+        self._decided = tuple(
+            final[state] if row == [state] * 10 else None for state, row in enumerate(transitions))
+
+    def _restrict_lengths(self, bound, lengths, longer):
+        """Intersect the length check with another one."""
+        top = max(bound, self._bound)
+        self._lengths = frozenset(
+            n for n in range(top)
+            if (n in lengths if n < bound else longer) and (n in self._lengths if n < self._bound else self._longer))
+        self._bound = top
+        self._longer = longer and self._longer
+
+    def __len__(self):
+        return len(self._final)
+
+    def __repr__(self):
+        return f'DigitAutomaton({self.pattern!r}, states={len(self)})'
+
+    @property
+    def max_length(self):
+        """Longest string the length check lets match, or None if unbounded."""
+        return None if self._longer else max(self._lengths, default=-1)
+
+    def _fits(self, length):
+        """Whether the length check lets strings of a length match."""
+        return length in self._lengths if length < self._bound else self._longer
+
+    def match(self, string):
+        """
+        Check whether a string of digits matches, as re.match would.
+
+        Args:
+            string: String to check
+
+        Returns:
+            True if it matches; False if not, or if the string has anything
+            but ASCII digits
+        """
+        if not (isinstance(string, str) and string.isascii() and (string.isdigit() or not string)):
+            return False
+        if len(string) < self._bound:
+            if len(string) not in self._lengths:
+                return False
+        elif not self._longer:
+            return False
+        transitions = self._transitions
+        decided = self._decided
+        state = 0
+        for code in string.encode('ascii'):
+            stop = decided[state]
+            if stop is not None:
+                return stop
+            state = transitions[state * 10 + code - 48]
+        return self._final[state]
+
+
+def match_sets(automata, prefix, length):
+    """
+    Find which automata can match together a number starting with a prefix.
+
+    Args:
+        automata: DigitAutomaton instances
+        prefix: String of ASCII digits
+        length: Length of the numbers
+
+    Returns:
+        Set of frozensets of indexes into automata: for every number of
+        that length starting with prefix, the set of automata matching it
+    """
+    if length < len(prefix):
+        return set()
+    start = []
+    for i, automaton in enumerate(automata):
+        if automaton._fits(length):
+            state = 0
+            for code in prefix.encode('ascii'):
+                state = automaton._transitions[state * 10 + code - 48]
+            start.append((i, state))
+
+    # Walk the remaining digits over the automata states together, one
+    # branch per distinct successor, until every automaton has decided
+    results = set()
+    seen = set()
+    stack = [(tuple(start), length - len(prefix))]
+    while stack:
+        states, remaining = stack.pop()
+        if (states, remaining) in seen:
+            continue
+        seen.add((states, remaining))
+        if not remaining or all(automata[i]._decided[state] is not None for i, state in states):
+            results.add(frozenset(i for i, state in states if automata[i]._final[state]))
+            continue
+        for digit in range(10):
+            stack.append((tuple((i, automata[i]._transitions[state * 10 + digit]) for i, state in states),
+                          remaining - 1))
+    return results
+
+
+# Compiled automata, shared by every user of the same pattern; the least
+# recently used ones are dropped beyond MAX_CACHED patterns
+MAX_CACHED = 1024
+_automata = {}
+
+
+def check_pattern(pattern):
+    """
+    Check a pattern's syntax without compiling it.
+
+    Args:
+        pattern: Regex over digits
+
+    Raises:
+        ValueError: If the pattern uses constructs a digit automaton cannot
+            express (the state limits are only checked when compiled)
+    """
+    _Parser(pattern).parse()
+
+
+def compile_pattern(pattern):
+    """
+    Compile a pattern to a DigitAutomaton, once per pattern.
+
+    Args:
+        pattern: Regex over digits
+
+    Returns:
+        DigitAutomaton instance
+
+    Raises:
+        ValueError: If the pattern cannot be expressed as a digit automaton
+    """
+    automaton = _automata.pop(pattern, None)
+    if automaton is None:
+        automaton = DigitAutomaton(pattern)
+        if len(_automata) >= MAX_CACHED:
+            del _automata[next(iter(_automata))]
+    _automata[pattern] = automaton
+    return automaton
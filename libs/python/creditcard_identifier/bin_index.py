@@ -0,0 +1,262 @@
+"""
+Compact BIN index
+
+This module provides a columnar index over the detailed bins of a scheme,
+built incrementally from the streamed shard rows.
+"""
+
+import json
+from array import array
+from bisect import bisect_left
+
+from .brands_detailed import BIN_FIELDS, iter_bin_rows
+
+
+# Bins are encoded as integers that sort like the digit strings they came
+# from: the digits right-padded to a fixed width, followed by the length.
+MAX_BIN_LENGTH = 12
+_LENGTH_BITS = 4
+
+
+class _ValueIds(dict):
+    """Value -> id mapping that assigns the next id to unseen values."""
+
+    def __missing__(self, value):
+        value_id = self[value] = len(_values)
+        _values.append(value)
+        return value_id
+
+
+# Deduplicated value table shared by every index in the process
+_values = [None]
+_value_ids = _ValueIds({None: 0})
+
+
+def encode_bin(bin_prefix):
+    """
+    Encode a BIN prefix as a sortable integer key.
+
+    Args:
+        bin_prefix: BIN digits as string
+
+    Returns:
+        Integer key; keys compare like the BIN strings
+
+    Raises:
+        ValueError: If the BIN is not 1 to MAX_BIN_LENGTH ASCII digits
+    """
+    length = len(bin_prefix)
+    if not 0 < length <= MAX_BIN_LENGTH or not (bin_prefix.isascii() and bin_prefix.isdigit()):
+        raise ValueError(f'Invalid BIN: {bin_prefix!r}')
+    return (int(bin_prefix.ljust(MAX_BIN_LENGTH, '0')) << _LENGTH_BITS) | length
+
+
+def decode_bin(key):
+    """
+    Decode an integer key back to its BIN prefix.
+
+    Args:
+        key: Integer key from encode_bin
+
+    Returns:
+        BIN digits as string
+    """
+    digits = str(key >> _LENGTH_BITS).rjust(MAX_BIN_LENGTH, '0')
+    return digits[:key & ((1 << _LENGTH_BITS) - 1)]
+
+
+def _value_id(value):
+    """Intern a JSON value in the shared value table and return its id."""
+    if isinstance(value, (list, tuple)):
+        value = tuple(value)
+    elif isinstance(value, dict):
+        value = json.dumps(value, sort_keys=True)
+    return _value_ids[value]
+
+
+class BinIndex:
+    """Sorted, columnar index of the detailed bins of one scheme."""
+
+    def __init__(self, scheme):
+        """
+        Initialize an empty index.
+
+        Args:
+            scheme: Scheme name (e.g., 'visa')
+        """
+        self.scheme = scheme
+        self.keys = array('Q')
+        # One column per bin field; values are ids into the shared value table
+        self.columns = tuple(array('I') for _ in BIN_FIELDS[1:])
+        self.extras = array('I')
+        self.lengths = ()
+
+    @classmethod
+    def from_shards(cls, scheme, countries, data_dir=None):
+        """
+        Build an index by streaming the given shards of a scheme.
+
+        Args:
+            scheme: Scheme name
+            countries: Shard country codes to load
+            data_dir: Data directory of another dataset version (default:
+                the package data)
+
+        Returns:
+            BinIndex instance
+        """
+        index = cls(scheme)
+        for country in countries:
+            index.extend(iter_bin_rows(scheme, country, data_dir))
+        index.finalize()
+        return index
+
+    def extend(self, rows):
+        """
+        Append shard rows to the index.
+
+        Args:
+            rows: Iterable of [bin, type, category, issuer, countries, extra?]
+
+        Call finalize() once all rows are added.
+        """
+        keys = self.keys
+        types, categories, issuers, countries = self.columns
+        extras = self.extras
+        ids = _value_ids
+        for row in rows:
+            bin_prefix = row[0]
+            if not 0 < len(bin_prefix) <= MAX_BIN_LENGTH or not (bin_prefix.isascii() and bin_prefix.isdigit()):
+                raise ValueError(f'Invalid BIN: {bin_prefix!r}')
+            keys.append((int(bin_prefix.ljust(MAX_BIN_LENGTH, '0')) << _LENGTH_BITS) | len(bin_prefix))
+            # Inlined _value_id: these values are strings or None, except countries
+            types.append(ids[row[1]])
+            categories.append(ids[row[2]])
+            issuers.append(ids[row[3]])
+            countries.append(ids[tuple(row[4]) if row[4] is not None else None])
+            extras.append(_value_id(row[5]) if len(row) > 5 else 0)
+
+    def finalize(self):
+        """Sort the index by BIN, dropping repeated bins (first one wins)."""
+        keys = self.keys
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        kept = []
+        previous = None
+        for i in order:
+            if keys[i] != previous:
+                kept.append(i)
+                previous = keys[i]
+        self.keys = array('Q', map(keys.__getitem__, kept))
+        self.columns = tuple(array('I', map(column.__getitem__, kept)) for column in self.columns)
+        self.extras = array('I', map(self.extras.__getitem__, kept))
+        self.lengths = tuple(sorted({key & ((1 << _LENGTH_BITS) - 1) for key in self.keys}, reverse=True))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def find(self, number, max_length=MAX_BIN_LENGTH):
+        """
+        Find the position of the longest bin that prefixes a number.
+
+        Args:
+            number: Card number or BIN as string of digits
+            max_length: Ignore bins longer than this
+
+        Returns:
+            Position in the index, or -1 if no bin matches
+        """
+        keys = self.keys
+        for length in self.lengths:
+            if length > max_length or length > len(number):
+                continue
+            try:
+                key = encode_bin(number[:length])
+            except ValueError:
+                return -1
+            i = bisect_left(keys, key)
+            if i < len(keys) and keys[i] == key:
+                return i
+        return -1
+
+    def record(self, i):
+        """
+        Materialize the bin record at a position.
+
+        Args:
+            i: Position in the index
+
+        Returns:
+            Bin dict with bin, type, category, issuer, countries and any
+            custom properties
+        """
+        record = {'bin': decode_bin(self.keys[i])}
+        for field, column in zip(BIN_FIELDS[1:], self.columns):
+            value = _values[column[i]]
+            record[field] = list(value) if isinstance(value, tuple) else value
+        if self.extras[i]:
+            record.update(json.loads(_values[self.extras[i]]))
+        return record
+
+
+# Indexes shared by every validator in the process
+_index_cache = {}
+
+
+def load_bin_index(scheme, countries):
+    """
+    Get the index of a scheme over the given shards, building it on first use.
+
+    Args:
+        scheme: Scheme name
+        countries: Shard country codes to load
+
+    Returns:
+        BinIndex instance
+    """
+    key = (scheme, tuple(countries))
+    index = _index_cache.get(key)
+    if index is None:
+        index = _index_cache[key] = BinIndex.from_shards(scheme, countries)
+    return index
+
+
+def pack_indexes(indexes):
+    """
+    Move the columns of finalized indexes into one read-only buffer.
+
+    Args:
+        indexes: BinIndex instances; already packed ones are skipped
+
+    Returns:
+        The shared buffer (bytes), or None if there was nothing to pack
+
+    Each index keeps the same interface, its arrays replaced by typed
+    memoryviews over the buffer. One large immutable object instead of
+    several arrays per scheme keeps forked workers sharing its pages.
+    """
+    indexes = [index for index in indexes if not isinstance(index.keys, memoryview)]
+    if not indexes:
+        return None
+    # 8-byte keys first, so every slice of the buffer stays aligned
+    parts = [index.keys for index in indexes]
+    for index in indexes:
+        parts.extend(index.columns)
+        parts.append(index.extras)
+    buffer = b''.join(part.tobytes() for part in parts)
+
+    view = memoryview(buffer)
+    offset = 0
+
+    def take(part):
+        nonlocal offset
+        size = len(part) * part.itemsize
+        packed = view[offset:offset + size].cast(part.typecode)
+        offset += size
+        return packed
+
+    keys = [take(index.keys) for index in indexes]
+    for index, index_keys in zip(indexes, keys):
+        index.keys = index_keys
+        index.columns = tuple(take(column) for column in index.columns)
+        index.extras = take(index.extras)
+    return buffer
@@ -1,28 +1,145 @@
 # Auto-generated by bin-cc build - DO NOT EDIT
-# Generated: 2026-01-15T00:50:32.386Z
-"""Credit card brand data (detailed). Loads bins from JSON at runtime."""
+# Generated: 2026-10-19T02:35:30.804Z
+"""Credit card brand data (detailed). Streams bins from compressed JSON shards at runtime.
 
+Shards live in data/<scheme>/bins-<cc>.ndjson.gz: gzip-compressed, one bin
+per line as [bin, type, category, issuer, countries] plus an optional object
+of custom properties.
+"""
+
+import gzip
 import json
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+# Shard key for bins without countries
+NO_COUNTRY = "xx"
 
+BIN_FIELDS = ("bin", "type", "category", "issuer", "countries")
 
-def _load_json() -> List[Dict[str, Any]]:
-    """Load detailed brand data from JSON file."""
-    json_path = os.path.join(os.path.dirname(__file__), "cards-detailed.json")
+
+def _load_json(*parts: str) -> Any:
+    """Load a JSON file from the data directory."""
+    json_path = os.path.join(DATA_DIR, *parts)
     with open(json_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
-# Lazy-loaded brands data
+# Lazy-loaded shard data
+_index_cache: Dict[str, Any] = {}
+_shard_cache: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
 _brands_cache: List[Dict[str, Any]] = []
 
 
-def get_brands() -> List[Dict[str, Any]]:
-    """Get detailed brand data (lazy-loaded from JSON)."""
+def get_index() -> Dict[str, Any]:
+    """Get the shard index: scheme records (without bins) and their shards."""
+    if not _index_cache:
+        _index_cache.update(_load_json("index.json"))
+    return _index_cache
+
+
+def select_shards(
+    schemes: Optional[Iterable[str]] = None,
+    countries: Optional[Iterable[str]] = None,
+) -> List[Tuple[Dict[str, Any], List[str]]]:
+    """Get scheme records (without bins) and the shards matching the selection."""
+    index = get_index()
+    wanted_schemes = set(schemes) if schemes is not None else None
+    wanted_countries = {c.lower() for c in countries} if countries is not None else None
+    selected = []
+    for record in index["schemes"]:
+        scheme = record["scheme"]
+        if wanted_schemes is not None and scheme not in wanted_schemes:
+            continue
+        shards = index["shards"].get(scheme, [])
+        if wanted_countries is not None:
+            shards = [c for c in shards if c in wanted_countries]
+        selected.append((record, shards))
+    return selected
+
+
+# Decompressed bytes decoded per batch while streaming a shard
+_CHUNK_SIZE = 1 << 16
+
+
+def iter_bin_rows(
+    scheme: str, country: str, data_dir: Optional[str] = None
+) -> Iterator[List[Any]]:
+    """Stream the raw rows of a single scheme/country shard.
+
+    Args:
+        scheme: Scheme name
+        country: Shard country code
+        data_dir: Data directory of another dataset version (default: the
+            package data)
+    """
+    shard_path = os.path.join(data_dir or DATA_DIR, scheme, "bins-%s.ndjson.gz" % country)
+    with gzip.open(shard_path, "rt", encoding="utf-8") as f:
+        while True:
+            lines = f.readlines(_CHUNK_SIZE)
+            if not lines:
+                break
+            # One decode call per batch of lines is much faster than one per line
+            yield from json.loads("[" + ",".join(lines) + "]")
+
+
+def iter_bins(scheme: str, country: str) -> Iterator[Dict[str, Any]]:
+    """Stream the bins of a single scheme/country shard as dicts."""
+    for row in iter_bin_rows(scheme, country):
+        b = dict(zip(BIN_FIELDS, row))
+        if len(row) > len(BIN_FIELDS):
+            b.update(row[len(BIN_FIELDS)])
+        yield b
+
+
+def get_bins(scheme: str, country: str) -> List[Dict[str, Any]]:
+    """Get the bins of a single scheme/country shard (lazy-loaded)."""
+    key = (scheme, country)
+    if key not in _shard_cache:
+        _shard_cache[key] = list(iter_bins(scheme, country))
+    return _shard_cache[key]
+
+
+def _select_brands(
+    schemes: Optional[Iterable[str]], countries: Optional[Iterable[str]]
+) -> List[Dict[str, Any]]:
+    """Assemble brand records from the shards matching the selection."""
+    brands = []
+    for record, shards in select_shards(schemes, countries):
+        brand = dict(record)
+        if shards:
+            # Bins listing several countries live in each of their shards
+            seen = set()
+            bins = []
+            for country in shards:
+                for b in get_bins(record["scheme"], country):
+                    if b["bin"] not in seen:
+                        seen.add(b["bin"])
+                        bins.append(b)
+            brand["bins"] = bins
+        brands.append(brand)
+    return brands
+
+
+def get_brands(
+    schemes: Optional[Iterable[str]] = None,
+    countries: Optional[Iterable[str]] = None,
+) -> List[Dict[str, Any]]:
+    """Get detailed brand data (lazy-loaded from JSON shards).
+
+    Args:
+        schemes: Only include these schemes (default: all)
+        countries: Only include bins issued in these countries (default: all)
+
+    Only the shards matching the selection are read from disk.
+    """
     global _brands_cache
+    if schemes is not None or countries is not None:
+        return _select_brands(schemes, countries)
     if not _brands_cache:
-        _brands_cache = _load_json()
+        _brands_cache = _select_brands(None, None)
     return _brands_cache
 
 
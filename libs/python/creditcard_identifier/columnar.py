@@ -0,0 +1,465 @@
+"""
+Columnar classification for pandas and PyArrow
+
+This module classifies whole columns of card numbers with numpy operations
+over a fixed-width character matrix, instead of one Python call per row:
+
+- pandas: importing this module registers a ``.cc`` Series accessor with
+  ``s.cc.brand()``, ``s.cc.luhn()`` and ``s.cc.issuer()``
+- PyArrow: ``brand_array``, ``luhn_array`` and ``issuer_array`` read the
+  string array buffers directly and return dictionary-encoded arrays
+- ``export_bins`` writes the detailed BIN dataset as Parquet or Arrow IPC
+
+numpy is required; pandas and pyarrow are optional
+(``pip install creditcard-identifier[pandas]`` / ``[arrow]``).
+"""
+
+import importlib
+
+from .bin_index import MAX_BIN_LENGTH, _LENGTH_BITS, _value_id, _values, decode_bin
+from .brands_detailed import BIN_FIELDS
+from .prefix_table import EXCEPTION, PREFIX_LENGTH
+from .validator import _get_validator, luhn
+
+
+# Rows classified per numpy pass, bounding the character matrix size
+CHUNK_SIZE = 1 << 20
+
+_LUHN_DOUBLE = [0, 2, 4, 6, 8, 1, 3, 5, 7, 9]
+
+
+def _require(module, extra):
+    """Import an optional dependency or explain how to install it."""
+    try:
+        return importlib.import_module(module)
+    except ImportError:
+        raise ImportError(
+            f'{module} is required for columnar classification: '
+            f'pip install creditcard-identifier[{extra}]'
+        ) from None
+
+
+class _Chunk:
+    """Fixed-width character matrix over a chunk of card numbers."""
+
+    def __init__(self, codes, lengths, valid, strings):
+        """
+        Args:
+            codes: n x width integer matrix of character codes, zero padded
+            lengths: String length per row
+            valid: False for missing values
+            strings: Callable returning the Python string of a row, for the
+                rows that need the scalar fallback
+        """
+        np = _require('numpy', 'pandas')
+        self.np = np
+        self.codes = codes
+        self.lengths = lengths
+        self.valid = valid
+        self.strings = strings
+        width = codes.shape[1]
+        inside = np.arange(width) < lengths[:, None]
+        is_digit = (codes >= 48) & (codes <= 57)
+        self.inside = inside
+        self.digits = np.where(is_digit & inside, codes - 48, 0).astype(np.int64)
+        self.all_digits = valid & (lengths > 0) & (is_digit | ~inside).all(axis=1)
+
+    @classmethod
+    def from_strings(cls, values):
+        """Build from a sequence of Python objects (non-strings are missing)."""
+        np = _require('numpy', 'pandas')
+        values = list(values)
+        valid = np.array([isinstance(v, str) for v in values], dtype=bool)
+        strings = [v if isinstance(v, str) else '' for v in values]
+        unicode = np.array(strings, dtype=str) if strings else np.zeros(0, dtype='U1')
+        width = max(unicode.dtype.itemsize // 4, 1)
+        codes = unicode.view(np.uint32).reshape(len(strings), width)
+        lengths = np.char.str_len(unicode) if strings else np.zeros(0, dtype=np.int64)
+        return cls(codes, lengths.astype(np.int64), valid, strings.__getitem__)
+
+    @classmethod
+    def from_arrow(cls, array):
+        """Build from a pyarrow string array without copying it to Python."""
+        np = _require('numpy', 'pandas')
+        pa = _require('pyarrow', 'arrow')
+        if not (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+            array = array.cast(pa.string())
+        n = len(array)
+        _, offsets, data = array.buffers()
+        offset_type = np.int64 if pa.types.is_large_string(array.type) else np.int32
+        offsets = np.frombuffer(offsets, dtype=offset_type)[array.offset:array.offset + n + 1]
+        data = np.frombuffer(data, dtype=np.uint8) if data is not None else np.zeros(1, np.uint8)
+        starts = offsets[:-1].astype(np.int64)
+        lengths = (offsets[1:] - offsets[:-1]).astype(np.int64)
+        width = max(int(lengths.max()) if n else 0, 1)
+        # Gather the bytes of every row into a zero-padded n x width matrix
+        positions = starts[:, None] + np.arange(width)
+        inside = np.arange(width) < lengths[:, None]
+        codes = np.where(inside, data[np.minimum(positions, len(data) - 1)], 0)
+        valid = array.is_valid().to_numpy(zero_copy_only=False)
+        # Non-ASCII rows are left to the scalar fallback
+        ascii_only = (codes < 128).all(axis=1)
+        codes = np.where(ascii_only[:, None], codes, 0)
+        lengths = np.where(ascii_only, lengths, -1)
+        return cls(codes, lengths, valid, lambda i: array[i].as_py())
+
+    def overlay_rows(self, validator):
+        """
+        Find the rows an overlay of a validator may claim.
+
+        Args:
+            validator: CreditCardValidator
+
+        Returns:
+            bool array; these rows are left to the scalar lookups
+        """
+        np = self.np
+        rows = np.zeros(len(self.lengths), dtype=bool)
+        for overlay, _ in validator._overlays:
+            if overlay.patterns:
+                # Pattern rules are only matched row by row
+                return self.valid.copy()
+            for length in overlay.lengths:
+                if length > self.digits.shape[1]:
+                    continue
+                weights = 10 ** np.arange(length - 1, -1, -1, dtype=np.int64)
+                heads = self.digits[:, :length] @ weights
+                bins = np.array([int(b) for b in overlay.bins if len(b) == length], dtype=np.int64)
+                rows |= self.all_digits & (self.lengths >= length) & np.isin(heads, bins)
+        return rows
+
+    def brand_codes(self, validator=None):
+        """
+        Classify every row.
+
+        Args:
+            validator: CreditCardValidator whose accepted brands and
+                overlays to apply (default: the module validator)
+
+        Returns:
+            int array of brand indexes (-1: no brand or missing)
+        """
+        np = self.np
+        validator = validator or _get_validator()
+        table = validator._prefix_table()
+        lengths = self.lengths
+        result = np.full(len(lengths), -1, dtype=np.int64)
+        fast = np.zeros(len(lengths), dtype=bool)
+
+        if table and self.digits.shape[1] > PREFIX_LENGTH:
+            fast = self.all_digits & (lengths > PREFIX_LENGTH)
+            if validator._overlays:
+                fast &= ~self.overlay_rows(validator)
+            weights = 10 ** np.arange(PREFIX_LENGTH - 1, -1, -1, dtype=np.int64)
+            prefixes = self.digits[:, :PREFIX_LENGTH] @ weights
+            classes = np.frombuffer(bytes(table.table), dtype=np.uint8)[prefixes].astype(np.int64)
+            exceptions = fast & (classes == EXCEPTION)
+            if exceptions.any():
+                sevens = prefixes[exceptions] * 10 + self.digits[exceptions, PREFIX_LENGTH]
+                classes[exceptions] = [table.exceptions[int(p)] for p in sevens]
+            in_range = fast & (lengths < table.stride)
+            resolve = np.frombuffer(bytes(table.resolve), dtype=np.uint8).astype(np.int64)
+            slots = np.where(in_range, classes * table.stride + lengths, 0)
+            result = np.where(in_range, resolve[slots] - 1, -1)
+
+        # Anything else keeps the exact scalar semantics
+        names = {b['name']: i for i, b in enumerate(validator.brands)}
+        for i in np.flatnonzero(self.valid & ~fast):
+            brand = validator.find_brand(self.strings(int(i)))
+            result[i] = names[brand['name']] if brand else -1
+        return result
+
+    def luhn(self):
+        """
+        Luhn-check every row.
+
+        Returns:
+            bool array (False for missing rows; see valid)
+        """
+        np = self.np
+        width = self.digits.shape[1]
+        from_right = self.lengths[:, None] - 1 - np.arange(width)
+        doubled = np.array(_LUHN_DOUBLE, dtype=np.int64)[self.digits]
+        values = np.where(from_right % 2 == 1, doubled, self.digits)
+        total = np.where(self.inside, values, 0).sum(axis=1)
+        checked = self.all_digits & (total % 10 == 0)
+        # Non-ASCII rows from Arrow were blanked out: check them one by one
+        for i in np.flatnonzero(self.valid & (self.lengths < 0)):
+            checked[i] = luhn(self.strings(int(i)))
+        return checked
+
+    def issuer_ids(self, brand_codes, validator=None):
+        """
+        Find the issuer of every row in the detailed BIN data.
+
+        Args:
+            brand_codes: Result of brand_codes()
+            validator: CreditCardValidator whose detailed selection and
+                overlays to use, as given to brand_codes()
+
+        Returns:
+            int array of value table ids (0: no issuer)
+        """
+        np = self.np
+        validator = validator or _get_validator()
+        result = np.zeros(len(brand_codes), dtype=np.int64)
+        fast = self.all_digits
+        if validator._overlays:
+            fast = fast & ~self.overlay_rows(validator)
+        for code in np.unique(brand_codes[brand_codes >= 0]):
+            index = validator._get_bin_index(validator.brands[code]['name'])
+            if index is None or not len(index):
+                continue
+            keys = np.frombuffer(index.keys, dtype=np.uint64).astype(np.int64)
+            issuers = np.frombuffer(index.columns[BIN_FIELDS.index('issuer') - 1], dtype=np.uint32)
+            rows = np.flatnonzero((brand_codes == code) & fast)
+            found = np.zeros(len(rows), dtype=bool)
+            for length in index.lengths:
+                if length > 6 or length > self.digits.shape[1]:
+                    continue
+                weights = 10 ** np.arange(MAX_BIN_LENGTH - 1, MAX_BIN_LENGTH - 1 - length, -1, dtype=np.int64)
+                wanted = ((self.digits[rows, :length] @ weights) << _LENGTH_BITS) | length
+                positions = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+                hit = ~found & (keys[positions] == wanted) & (self.lengths[rows] >= length)
+                result[rows[hit]] = issuers[positions[hit]]
+                found |= hit
+            # Non-digit rows keep the exact scalar semantics
+            for i in np.flatnonzero((brand_codes == code) & ~fast):
+                brand = validator.find_brand(self.strings(int(i)), detailed=True)
+                matched = brand and brand.get('matched_bin')
+                if matched and matched.get('issuer') is not None:
+                    result[i] = _value_id(matched['issuer'])
+        return result
+
+
+def _chunks(values, size):
+    """Split a sequence into slices of at most size items."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def _brand_names():
+    return [b['name'] for b in _get_validator().brands]
+
+
+def _dictionary(ids):
+    """Turn value table ids into (codes, categories), 0 ids becoming -1."""
+    np = _require('numpy', 'pandas')
+    unique = np.unique(ids[ids > 0])
+    codes = np.where(ids > 0, np.searchsorted(unique, ids), -1)
+    return codes, [_values[int(i)] for i in unique]
+
+
+# ---------------------------------------------------------------------------
+# PyArrow
+# ---------------------------------------------------------------------------
+
+def _arrow_chunks(array):
+    pa = _require('pyarrow', 'arrow')
+    if isinstance(array, pa.ChunkedArray):
+        pieces = array.chunks
+    else:
+        pieces = [array]
+    for piece in pieces:
+        for start in range(0, len(piece), CHUNK_SIZE):
+            yield _Chunk.from_arrow(piece.slice(start, CHUNK_SIZE))
+
+
+def _arrow_dictionary(codes, dictionary):
+    pa = _require('pyarrow', 'arrow')
+    np = _require('numpy', 'pandas')
+    indices = pa.array(codes.astype(np.int32), mask=codes < 0)
+    return pa.DictionaryArray.from_arrays(indices, pa.array(dictionary, type=pa.string()))
+
+
+def brand_array(array, validator=None):
+    """
+    Classify a pyarrow array of card numbers.
+
+    Args:
+        array: pyarrow string (or castable) Array or ChunkedArray
+        validator: CreditCardValidator whose accepted brands and overlays
+            to apply
+
+    Returns:
+        Dictionary-encoded pyarrow array of brand names (null: no brand)
+    """
+    np = _require('numpy', 'pandas')
+    chunks = list(_arrow_chunks(array))
+    codes = np.concatenate([c.brand_codes(validator) for c in chunks]) if chunks else np.zeros(0, np.int64)
+    return _arrow_dictionary(codes, _brand_names())
+
+
+def luhn_array(array):
+    """
+    Luhn-check a pyarrow array of card numbers.
+
+    Args:
+        array: pyarrow string (or castable) Array or ChunkedArray
+
+    Returns:
+        pyarrow boolean array (null for null input)
+    """
+    pa = _require('pyarrow', 'arrow')
+    np = _require('numpy', 'pandas')
+    chunks = list(_arrow_chunks(array))
+    if not chunks:
+        return pa.array([], type=pa.bool_())
+    checked = np.concatenate([c.luhn() for c in chunks])
+    valid = np.concatenate([c.valid for c in chunks])
+    return pa.array(checked, mask=~valid)
+
+
+def issuer_array(array, validator=None):
+    """
+    Find the issuer of each card number in a pyarrow array.
+
+    Args:
+        array: pyarrow string (or castable) Array or ChunkedArray
+        validator: CreditCardValidator whose detailed selection to use
+
+    Returns:
+        Dictionary-encoded pyarrow array of issuer names (null: unknown)
+    """
+    np = _require('numpy', 'pandas')
+    chunks = list(_arrow_chunks(array))
+    ids = np.concatenate([c.issuer_ids(c.brand_codes(validator), validator) for c in chunks]) \
+        if chunks else np.zeros(0, np.int64)
+    return _arrow_dictionary(*_dictionary(ids))
+
+
+def bins_table(validator=None):
+    """
+    Build a pyarrow table of the detailed BIN dataset.
+
+    Args:
+        validator: CreditCardValidator whose detailed selection to export
+
+    Returns:
+        pyarrow Table with scheme, bin, type, category, issuer and countries
+        columns; string columns are dictionary-encoded
+    """
+    pa = _require('pyarrow', 'arrow')
+    validator = validator or _get_validator()
+    columns = {field: [] for field in ('scheme',) + BIN_FIELDS}
+    for scheme in validator._get_shards():
+        index = validator._get_bin_index(scheme)
+        if index is None:
+            continue
+        columns['scheme'].extend([scheme] * len(index))
+        columns['bin'].extend(decode_bin(key) for key in index.keys)
+        for field, column in zip(BIN_FIELDS[1:], index.columns):
+            values = (_values[i] for i in column)
+            if field == 'countries':
+                values = (list(v) if v is not None else None for v in values)
+            columns[field].extend(values)
+    arrays = []
+    for field, values in columns.items():
+        if field == 'countries':
+            arrays.append(pa.array(values, type=pa.list_(pa.string())))
+        elif field == 'bin':
+            arrays.append(pa.array(values, type=pa.string()))
+        else:
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+    return pa.Table.from_arrays(arrays, names=list(columns))
+
+
+def export_bins(path, format='parquet', validator=None):
+    """
+    Write the detailed BIN dataset for joins in analytical engines.
+
+    Args:
+        path: Output file path
+        format: 'parquet' or 'arrow' (Arrow IPC file)
+        validator: CreditCardValidator whose detailed selection to export
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    pa = _require('pyarrow', 'arrow')
+    table = bins_table(validator)
+    if format == 'parquet':
+        _require('pyarrow.parquet', 'arrow').write_table(table, path)
+    elif format == 'arrow':
+        with pa.OSFile(path, 'wb') as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+    else:
+        raise ValueError(f'Unknown format: {format!r}')
+
+
+# ---------------------------------------------------------------------------
+# pandas
+# ---------------------------------------------------------------------------
+
+def _series_chunks(series):
+    values = series.to_numpy(dtype=object, na_value=None)
+    for piece in _chunks(values, CHUNK_SIZE):
+        yield _Chunk.from_strings(piece)
+
+
+class CardSeriesAccessor:
+    """``Series.cc`` accessor classifying a column of card numbers."""
+
+    def __init__(self, series):
+        self._series = series
+
+    def brand(self, validator=None):
+        """
+        Classify every card number.
+
+        Args:
+            validator: CreditCardValidator whose accepted brands and
+                overlays to apply
+
+        Returns:
+            Categorical Series of brand names (NaN: no brand)
+        """
+        pd = _require('pandas', 'pandas')
+        np = _require('numpy', 'pandas')
+        chunks = [c.brand_codes(validator) for c in _series_chunks(self._series)]
+        codes = np.concatenate(chunks) if chunks else np.zeros(0, np.int64)
+        categorical = pd.Categorical.from_codes(codes, categories=_brand_names())
+        return pd.Series(categorical, index=self._series.index, name=self._series.name)
+
+    def luhn(self):
+        """
+        Luhn-check every card number.
+
+        Returns:
+            Nullable boolean Series (NA for missing values)
+        """
+        pd = _require('pandas', 'pandas')
+        np = _require('numpy', 'pandas')
+        chunks = list(_series_chunks(self._series))
+        checked = np.concatenate([c.luhn() for c in chunks]) if chunks else np.zeros(0, bool)
+        valid = np.concatenate([c.valid for c in chunks]) if chunks else np.zeros(0, bool)
+        array = pd.arrays.BooleanArray(checked, ~valid)
+        return pd.Series(array, index=self._series.index, name=self._series.name)
+
+    def issuer(self, validator=None):
+        """
+        Find the issuer of every card number in the detailed BIN data.
+
+        Args:
+            validator: CreditCardValidator whose detailed selection, accepted
+                brands and overlays to use
+
+        Returns:
+            Categorical Series of issuer names (NaN: unknown)
+        """
+        pd = _require('pandas', 'pandas')
+        np = _require('numpy', 'pandas')
+        chunks = [c.issuer_ids(c.brand_codes(validator), validator) for c in _series_chunks(self._series)]
+        ids = np.concatenate(chunks) if chunks else np.zeros(0, np.int64)
+        codes, categories = _dictionary(ids)
+        categorical = pd.Categorical.from_codes(codes, categories=categories)
+        return pd.Series(categorical, index=self._series.index, name=self._series.name)
+
+
+try:
+    import pandas as _pd
+except ImportError:
+    pass
+else:
+    _pd.api.extensions.register_series_accessor('cc')(CardSeriesAccessor)
@@ -0,0 +1,435 @@
+"""
+Dataset version diff
+
+This module compares two versions of the brand patterns and detailed BIN
+data, and reports the prefix ranges whose classification changed: the
+compiled prefix tables are swept side by side for brand changes (new or
+removed ranges, lengths, priority winners), and the sorted BIN indexes of
+every scheme are merged for bins whose issuer, type, category, countries or
+custom properties changed. ``affected`` then filters stored BINs or card
+numbers down to the ones a data upgrade needs to re-classify.
+"""
+
+import copy
+import filecmp
+import json
+import os
+from bisect import bisect_right
+from collections import namedtuple
+
+from .bin_index import BinIndex, decode_bin, load_bin_index
+from .brands import BRANDS
+from .brands_detailed import DATA_DIR, get_index
+from .prefix_table import EXCEPTION, PREFIX_LENGTH, PrefixTable
+from .validator import _get_prefix_table
+
+
+# Lookups only match bins up to this length, as in find_brand
+_MAX_BIN_LENGTH = 6
+
+Change = namedtuple('Change', ['first', 'last', 'kind', 'scheme', 'old', 'new'])
+Change.__doc__ = """A prefix range classified differently by two dataset versions.
+
+Fields:
+    first: First prefix of the range (6 digits, or 7 for the prefixes a
+        7th digit decides)
+    last: Last prefix of the range, as long as first
+    kind: 'brand' or 'bin'
+    scheme: Scheme of a 'bin' change (None for 'brand')
+    old: 'brand': dict of number length -> old brand name (None: no
+        brand), for the lengths that changed; 'bin': old bin record or None
+    new: Same as old, for the new version
+"""
+
+
+class Dataset:
+    """One version of the brand patterns and detailed BIN data."""
+
+    def __init__(self, brands=None, data_dir=None, detailed=True, schemes=None, countries=None):
+        """
+        Initialize a dataset version.
+
+        Args:
+            brands: Brand dicts as in brands.BRANDS or in a compiled
+                cards.json (default: the package brands)
+            data_dir: Directory with index.json and the BIN shards, laid out
+                like the package data (default: the package data)
+            detailed: False for a version without detailed BIN data
+            schemes: Restrict detailed data to these schemes (default: all)
+            countries: Restrict detailed data to these shard countries
+                (default: all)
+        """
+        self.brands = [_normalize_brand(b) for b in brands] if brands is not None else BRANDS
+        self.data_dir = os.fspath(data_dir) if data_dir is not None else None
+        self.detailed = detailed
+        self.schemes = list(schemes) if schemes is not None else None
+        self.countries = list(countries) if countries is not None else None
+        self._table = None
+        self._shards = None
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load a dataset version from disk.
+
+        Args:
+            path: A compiled cards.json (brand patterns only, without
+                detailed data), or a data directory with index.json, the
+                BIN shards and its cards.json (only the package data
+                directory may leave it out)
+
+        Returns:
+            Dataset instance
+
+        Raises:
+            ValueError: If path is neither, or a data directory other than
+                the package one has no cards.json
+        """
+        path = os.fspath(path)
+        if os.path.isfile(path):
+            return cls(_load_json(path), detailed=False)
+        if not os.path.isfile(os.path.join(path, 'index.json')):
+            raise ValueError(f'Not a cards.json file or data directory: {path!r}')
+        cards = os.path.join(path, 'cards.json')
+        if os.path.isfile(cards):
+            return cls(_load_json(cards), data_dir=path)
+        if os.path.abspath(path) != os.path.abspath(DATA_DIR):
+            # The package patterns would not be this version's
+            raise ValueError(f'Data directory without cards.json: {path!r}')
+        return cls(data_dir=path)
+
+    def restrict(self, schemes=None, countries=None):
+        """
+        Get this version with its detailed data restricted, as a validator's.
+
+        Args:
+            schemes: Restrict detailed data to these schemes (default: all)
+            countries: Restrict detailed data to these shard countries
+                (default: all)
+
+        Returns:
+            Dataset instance sharing this one's brands and prefix table
+        """
+        dataset = copy.copy(self)
+        dataset.schemes = list(schemes) if schemes is not None else None
+        dataset.countries = list(countries) if countries is not None else None
+        dataset._shards = None
+        return dataset
+
+    @property
+    def table(self):
+        """Prefix table compiled from the brand patterns."""
+        if self._table is None:
+            # The package brands share the validator's table
+            table = _get_prefix_table() if self.brands is BRANDS else None
+            self._table = table or PrefixTable.build(self.brands)
+        return self._table
+
+    @property
+    def shards(self):
+        """Scheme -> shard country codes of the detailed data."""
+        if self._shards is None:
+            if not self.detailed:
+                self._shards = {}
+            else:
+                index = get_index() if self.data_dir is None else _load_json(os.path.join(self.data_dir, 'index.json'))
+                # Selected like select_shards does for a validator
+                schemes = set(self.schemes) if self.schemes is not None else None
+                countries = {c.lower() for c in self.countries} if self.countries is not None else None
+                self._shards = {
+                    scheme: [c for c in shards if countries is None or c in countries]
+                    for scheme, shards in index['shards'].items()
+                    if schemes is None or scheme in schemes
+                }
+        return self._shards
+
+    def bin_index(self, scheme):
+        """
+        Get the BIN index of a scheme over all its shards.
+
+        Args:
+            scheme: Scheme name
+
+        Returns:
+            BinIndex instance (empty if the scheme has no bins)
+        """
+        shards = self.shards.get(scheme, ())
+        if self.data_dir is None or self._same_shards(scheme, shards):
+            # The package data, or an unchanged copy of it, shares the
+            # process-wide indexes
+            return load_bin_index(scheme, shards)
+        return BinIndex.from_shards(scheme, shards, self.data_dir)
+
+    def _same_shards(self, scheme, shards):
+        """Whether the shards of a scheme are byte for byte the package ones."""
+        if os.path.abspath(self.data_dir) == os.path.abspath(DATA_DIR):
+            return True
+        if not set(shards) <= set(get_index()['shards'].get(scheme, ())):
+            return False
+        for country in shards:
+            name = os.path.join(scheme, f'bins-{country}.ndjson.gz')
+            if not filecmp.cmp(os.path.join(self.data_dir, name), os.path.join(DATA_DIR, name), shallow=False):
+                return False
+        return True
+
+
+def _load_json(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _normalize_brand(brand):
+    """Accept compiled cards.json records (camelCase keys) as brand dicts."""
+    if 'regexp_full' in brand:
+        return brand
+    return {
+        'name': brand['name'],
+        'priority_over': brand.get('priorityOver', []),
+        'regexp_bin': brand.get('regexpBin'),
+        'regexp_full': brand['regexpFull'],
+        'regexp_cvv': brand.get('regexpCvv'),
+    }
+
+
+def _as_dataset(value):
+    """Turn a diff argument into a Dataset (None: the package data)."""
+    if value is None:
+        return Dataset()
+    if isinstance(value, Dataset):
+        return value
+    return Dataset.load(value)
+
+
+def _rows(table, length_count):
+    """Brand name per number length, for every class id of a table."""
+    names = table.names
+    stride = table.stride
+    resolve = table.resolve
+    rows = []
+    for cid in range(len(resolve) // stride):
+        row = []
+        for length in range(length_count):
+            brand = resolve[cid * stride + length] - 1 if length < stride else -1
+            row.append(names[brand] if brand >= 0 else None)
+        rows.append(tuple(row))
+    return rows
+
+
+def _brand_changes(old, new):
+    """Sweep two prefix tables and yield coalesced brand changes."""
+    if old.fingerprint == new.fingerprint:
+        # Compiled from the same patterns
+        return []
+    length_count = max(old.stride, new.stride)
+    old_rows = _rows(old, length_count)
+    new_rows = _rows(new, length_count)
+    # (old class, new class) -> tuple of (length, old, new), or () if equal
+    pairs = {}
+
+    def compare(a, b):
+        key = (a, b)
+        result = pairs.get(key)
+        if result is None:
+            result = pairs[key] = tuple(
+                (length, x, y) for length, (x, y) in enumerate(zip(old_rows[a], new_rows[b])) if x != y)
+        return result
+
+    def change(first, last, width, diff):
+        return Change(
+            str(first).zfill(width), str(last).zfill(width), 'brand', None,
+            {length: x for length, x, _ in diff}, {length: y for length, _, y in diff},
+        )
+
+    changes = []
+    # Open range at 6 digits: (first, last, diff)
+    current = None
+    for prefix, (a, b) in enumerate(zip(old.table, new.table)):
+        if a == EXCEPTION or b == EXCEPTION:
+            if current is not None:
+                changes.append(change(*current[:2], PREFIX_LENGTH, current[2]))
+                current = None
+            # Decided by the 7th digit on at least one side
+            sevens = None
+            for digit in range(10):
+                seven = prefix * 10 + digit
+                diff = compare(old.exceptions[seven] if a == EXCEPTION else a,
+                               new.exceptions[seven] if b == EXCEPTION else b)
+                if sevens is not None and (sevens[2] != diff or not diff):
+                    changes.append(change(*sevens[:2], PREFIX_LENGTH + 1, sevens[2]))
+                    sevens = None
+                if diff:
+                    sevens = (sevens[0] if sevens else seven, seven, diff)
+            if sevens is not None:
+                changes.append(change(*sevens[:2], PREFIX_LENGTH + 1, sevens[2]))
+            continue
+
+        diff = compare(a, b) if a or b else ()
+        if current is not None and current[2] == diff:
+            current = (current[0], prefix, diff)
+            continue
+        if current is not None:
+            changes.append(change(*current[:2], PREFIX_LENGTH, current[2]))
+        current = (prefix, prefix, diff) if diff else None
+    if current is not None:
+        changes.append(change(*current[:2], PREFIX_LENGTH, current[2]))
+    return changes
+
+
+def _schemes_at(table, prefix):
+    """Names of the brands any number under a 6-digit prefix can resolve to."""
+    cid = table.table[prefix]
+    cids = [table.exceptions[prefix * 10 + d] for d in range(10)] if cid == EXCEPTION else [cid]
+    names = set()
+    for cid in cids:
+        for length in range(table.stride):
+            brand = table.resolve[cid * table.stride + length] - 1
+            if brand >= 0:
+                names.add(table.names[brand])
+    return names
+
+
+def _entry(index, position):
+    """Comparable content of an index entry (value ids are process-wide)."""
+    if position < 0:
+        return None
+    return (index.keys[position],) + tuple(column[position] for column in index.columns) + (index.extras[position],)
+
+
+def _changed_bins(old_index, new_index):
+    """Merge two sorted indexes and yield the bins added, removed or changed."""
+    i = j = 0
+    old_keys, new_keys = old_index.keys, new_index.keys
+    while i < len(old_keys) or j < len(new_keys):
+        old_key = old_keys[i] if i < len(old_keys) else None
+        new_key = new_keys[j] if j < len(new_keys) else None
+        if new_key is None or (old_key is not None and old_key < new_key):
+            yield decode_bin(old_key)
+            i += 1
+        elif old_key is None or new_key < old_key:
+            yield decode_bin(new_key)
+            j += 1
+        else:
+            if _entry(old_index, i) != _entry(new_index, j):
+                yield decode_bin(old_key)
+            i += 1
+            j += 1
+
+
+def _bin_changes(scheme, old, new):
+    """Coalesced bin changes of one scheme, checked prefix by prefix."""
+    old_index, new_index = old.bin_index(scheme), new.bin_index(scheme)
+    if old_index is new_index:
+        return []
+    prefixes = set()
+    for bin_prefix in _changed_bins(old_index, new_index):
+        if len(bin_prefix) > _MAX_BIN_LENGTH:
+            continue
+        # A short bin covers every 6-digit prefix below it that has no
+        # longer bin of its own
+        low = int(bin_prefix.ljust(PREFIX_LENGTH, '0'))
+        prefixes.update(range(low, low + 10 ** (PREFIX_LENGTH - len(bin_prefix))))
+
+    changes = []
+    current = None
+    for prefix in sorted(prefixes):
+        digits = str(prefix).zfill(PREFIX_LENGTH)
+        old_position = old_index.find(digits, _MAX_BIN_LENGTH) if old_index.lengths else -1
+        new_position = new_index.find(digits, _MAX_BIN_LENGTH) if new_index.lengths else -1
+        key = (_entry(old_index, old_position), _entry(new_index, new_position))
+        # Only numbers this scheme can claim see its bins
+        if key[0] == key[1] or scheme not in (_schemes_at(old.table, prefix) | _schemes_at(new.table, prefix)):
+            continue
+        if current is not None and current[2] == key and current[1] == prefix - 1:
+            current[1] = prefix
+            continue
+        if current is not None:
+            changes.append(current)
+        current = [prefix, prefix, key, old_position, new_position]
+    if current is not None:
+        changes.append(current)
+    return [
+        Change(
+            str(first).zfill(PREFIX_LENGTH), str(last).zfill(PREFIX_LENGTH), 'bin', scheme,
+            old_index.record(old_position) if old_position >= 0 else None,
+            new_index.record(new_position) if new_position >= 0 else None,
+        )
+        for first, last, _, old_position, new_position in changes
+    ]
+
+
+def _sort_key(change):
+    return change.first.ljust(PREFIX_LENGTH + 1, '0'), change.kind != 'brand', change.scheme or ''
+
+
+def diff_datasets(old=None, new=None):
+    """
+    Compare two dataset versions.
+
+    Args:
+        old: Old version: Dataset, path of a data directory or cards.json
+            (see Dataset.load), or None for the package data
+        new: New version, as old
+
+    Returns:
+        List of Change tuples, in prefix order. 'bin' changes are only
+        looked for when both versions have detailed data: a cards.json
+        alone only gives 'brand' changes.
+
+    Raises:
+        ValueError: If a path is not a dataset, or the brand patterns of a
+            version cannot be compiled into a prefix table
+    """
+    old, new = _as_dataset(old), _as_dataset(new)
+    changes = _brand_changes(old.table, new.table)
+    if old.detailed and new.detailed:
+        for scheme in sorted(set(old.shards) | set(new.shards)):
+            changes.extend(_bin_changes(scheme, old, new))
+    changes.sort(key=_sort_key)
+    return changes
+
+
+def _interval(first, last):
+    """Prefix range as an interval of 7-digit prefixes."""
+    if len(first) == PREFIX_LENGTH:
+        return int(first) * 10, int(last) * 10 + 9
+    return int(first), int(last)
+
+
+def affected(stream, changes, key=None):
+    """
+    Filter stored BINs or card numbers down to those a diff affects.
+
+    Args:
+        stream: Iterable of records holding a BIN (6+ digits) or card number
+        changes: Result of diff_datasets
+        key: Function returning the BIN or card number of a record
+            (default: the records are BINs or card numbers)
+
+    Yields:
+        The records whose leading digits fall in a changed range, in input
+        order. A 6-digit BIN is affected if any number under it may be;
+        records without 6 leading digits are skipped.
+    """
+    intervals = sorted(_interval(change.first, change.last) for change in changes)
+    starts, ends = [], []
+    for low, high in intervals:
+        if ends and low <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], high)
+        else:
+            starts.append(low)
+            ends.append(high)
+    if not starts:
+        return
+
+    for record in stream:
+        number = record if key is None else key(record)
+        head = number[:PREFIX_LENGTH + 1]
+        if len(head) < PREFIX_LENGTH or not (head.isascii() and head.isdigit()):
+            continue
+        if len(head) == PREFIX_LENGTH:
+            low, high = int(head) * 10, int(head) * 10 + 9
+        else:
+            low = high = int(head)
+        i = bisect_right(starts, high) - 1
+        if i >= 0 and ends[i] >= low:
+            yield record
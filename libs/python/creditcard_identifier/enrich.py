@@ -0,0 +1,132 @@
+"""
+Sort-merge enrichment of BIN-sorted streams
+
+This module joins a stream of records sorted by card number (or BIN)
+against the sorted detailed bins of each scheme. Every scheme keeps one
+cursor per bin length that only moves forward, and runs of records sharing
+a BIN reuse the previous match, so the stream is walked once with memory
+bounded by the number of schemes.
+"""
+
+from bisect import bisect_left
+
+from .bin_index import encode_bin
+from .records import freeze
+from .validator import _get_validator
+
+
+# Bins longer than this are ignored, as in find_brand
+_MAX_BIN_LENGTH = 6
+
+
+class _MergeCursor:
+    """Forward-only longest-prefix cursor over the bins of one scheme."""
+
+    __slots__ = ('index', 'positions', 'head', 'match')
+
+    def __init__(self, index):
+        """
+        Args:
+            index: BinIndex of the scheme, or None if it has no bins
+        """
+        self.index = index
+        self.positions = dict.fromkeys(index.lengths if index is not None else (), 0)
+        self.head = None
+        self.match = None
+
+    def find(self, number, head, in_order):
+        """
+        Find the longest bin prefixing a number.
+
+        Args:
+            number: Card number or BIN as string
+            head: number[:_MAX_BIN_LENGTH]
+            in_order: False to search the whole index (unsorted input)
+
+        Returns:
+            Shared bin record, or None if no bin matches
+        """
+        if head == self.head:
+            return self.match
+        match = None
+        index = self.index
+        if index is not None:
+            keys = index.keys
+            positions = self.positions
+            for length in index.lengths:
+                if length > _MAX_BIN_LENGTH or length > len(number):
+                    continue
+                try:
+                    wanted = encode_bin(number[:length])
+                except ValueError:
+                    break
+                position = positions[length] if in_order else 0
+                if position < len(keys) and keys[position] < wanted:
+                    position = bisect_left(keys, wanted, position)
+                if in_order:
+                    positions[length] = position
+                if position < len(keys) and keys[position] == wanted:
+                    match = freeze(index.record(position))
+                    break
+        self.head = head
+        self.match = match
+        return match
+
+
+def enrich_sorted(stream, key=None, validator=None, strict=False):
+    """
+    Enrich a BIN-sorted stream of records with their detailed bins.
+
+    Args:
+        stream: Iterable of records sorted by card number (only the first
+            6 digits need to be in order)
+        key: Function returning the card number of a record (default: the
+            records are card numbers)
+        validator: CreditCardValidator whose detailed selection to use
+            (default: the module validator)
+        strict: If True, raise on unsorted input instead of falling back
+
+    Yields:
+        (record, scheme, bin record) tuples in input order; scheme and bin
+        record are None when there is no brand or no matching bin, as with
+        find_brand(number, detailed=True)
+
+    Raises:
+        ValueError: If strict and the input is not sorted
+
+    Unsorted input is detected as soon as a BIN goes backwards; the rest of
+    the stream then falls back to an indexed lookup per record, with the
+    same results.
+    """
+    validator = validator or _get_validator()
+    match_brand = validator._match_base_brand
+    overlay_match = validator._overlay_match if validator._overlays else None
+    cursors = {}
+    previous = ''
+    in_order = True
+    for record in stream:
+        number = record if key is None else key(record)
+        head = number[:_MAX_BIN_LENGTH]
+        if in_order and head < previous:
+            if strict:
+                raise ValueError(f'Input is not sorted by BIN: {head!r} after {previous!r}')
+            in_order = False
+        previous = head
+
+        hit = overlay_match(number) if overlay_match is not None else None
+        if hit is not None:
+            brand = hit[0]
+            if brand is not None and hit[1] is not None:
+                # Overlay bin records take precedence over the base bins
+                yield record, brand['name'], hit[1]
+                continue
+        else:
+            brand = match_brand(number) if number else None
+        if brand is None:
+            yield record, None, None
+            continue
+        scheme = brand['name']
+        cursor = cursors.get(scheme)
+        if cursor is None:
+            cursor = cursors[scheme] = _MergeCursor(validator._get_bin_index(scheme))
+        yield record, scheme, cursor.find(number, head, in_order)
@@ -0,0 +1,21 @@
+"""
+Card number masking
+
+This module masks card numbers for reports and logs, keeping only the
+digits PCI DSS allows to be displayed.
+"""
+
+
+def mask(digits):
+    """
+    Mask a card number for reporting.
+
+    Args:
+        digits: Card number digits as str or bytes
+
+    Returns:
+        String keeping the first 6 and last 4 digits, e.g. '401200******1112'
+    """
+    if isinstance(digits, bytes):
+        digits = digits.decode('ascii')
+    return digits[:6] + '*' * (len(digits) - 10) + digits[-4:]
@@ -0,0 +1,187 @@
+"""
+Private BIN overlays
+
+An overlay holds BIN records and pattern rules (co-brands, internal test
+ranges, corrections) that take precedence over the shipped data. Each
+overlay has its own small index, checked before the shared base structures,
+so adding or removing one never rebuilds or copies the base data.
+"""
+
+import json
+import os
+import re
+
+from .automaton import compile_pattern
+from .brands_detailed import BIN_FIELDS
+from .records import freeze
+
+
+# Allowed number lengths from the lookahead of a brand pattern, e.g. (?=.{13,19}$)
+_LENGTHS = re.compile(r'\(\?=\.\{(\d+)(?:,(\d+))?\}\$\)')
+
+
+def brand_lengths(brand):
+    """
+    Get the card number lengths a brand allows.
+
+    Args:
+        brand: Brand dict with regexp_full
+
+    Returns:
+        Tuple of lengths (empty if the pattern does not bound them)
+    """
+    match = _LENGTHS.search(brand['regexp_full'])
+    if not match:
+        return ()
+    low = int(match.group(1))
+    high = int(match.group(2) or low)
+    return tuple(range(low, high + 1))
+
+
+class Overlay:
+    """
+    BIN records and pattern rules checked ahead of the base data.
+
+    Within an overlay, the longest matching BIN record allowing the
+    number's length wins, then the pattern rules are tried in order.
+    Overlays given to a validator are checked in list order, all before
+    the base data.
+    """
+
+    def __init__(self, bins=(), patterns=(), name=None):
+        """
+        Build an overlay.
+
+        Args:
+            bins: BIN records: dicts with bin (leading digits) and scheme,
+                plus optional type, category, issuer, countries, length
+                (allowed number lengths; default: those of the scheme) and
+                custom properties
+            patterns: Pattern rules: dicts with scheme and bin (a regex
+                like the detailed patterns, e.g. '^5067'), plus optional
+                length and other properties
+            name: Name for messages and repr
+
+        Raises:
+            ValueError: If a record or rule is malformed
+        """
+        self.name = name
+        # bin -> (scheme, allowed lengths or None, frozen bin record)
+        self.bins = {}
+        for record in bins:
+            bin_prefix = record.get('bin')
+            if not (isinstance(bin_prefix, str) and bin_prefix.isascii() and bin_prefix.isdigit()):
+                raise ValueError(f'Overlay {name!r}: invalid bin in {record!r}')
+            if not record.get('scheme'):
+                raise ValueError(f'Overlay {name!r}: bin {bin_prefix} has no scheme')
+            fields = {field: None for field in BIN_FIELDS}
+            fields.update((k, v) for k, v in record.items() if k not in ('scheme', 'length'))
+            self.bins[bin_prefix] = (record['scheme'], _lengths(record, name), freeze(fields))
+        # Longest first, so match_bins yields the longest match first
+        self.lengths = sorted({len(b) for b in self.bins}, reverse=True)
+
+        # (scheme, digit automaton, allowed lengths or None, frozen rule)
+        self.patterns = []
+        for rule in patterns:
+            if not rule.get('scheme') or not isinstance(rule.get('bin'), str):
+                raise ValueError(f'Overlay {name!r}: pattern rules need scheme and bin: {rule!r}')
+            try:
+                automaton = compile_pattern(rule['bin'])
+            except ValueError as e:
+                raise ValueError(f'Overlay {name!r}: invalid pattern {rule["bin"]!r}: {e}') from None
+            matched = {k: v for k, v in rule.items() if k != 'scheme'}
+            self.patterns.append((rule['scheme'], automaton, _lengths(rule, name), freeze(matched)))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Load an overlay from a JSON file.
+
+        Args:
+            path: Path of a JSON object with bins and/or patterns lists
+                (and optionally a name)
+
+        Returns:
+            Overlay instance
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls.from_dict(data, name=data.get('name', os.fspath(path)))
+
+    @classmethod
+    def from_dict(cls, data, name=None):
+        """
+        Build an overlay from a dict with bins and/or patterns lists.
+
+        Args:
+            data: Dict in the overlay file format
+            name: Name to use when data has none
+
+        Returns:
+            Overlay instance
+        """
+        unknown = set(data) - {'name', 'bins', 'patterns'}
+        if unknown:
+            raise ValueError(f'Unknown overlay keys: {sorted(unknown)}')
+        return cls(data.get('bins', ()), data.get('patterns', ()), name=data.get('name', name))
+
+    @property
+    def schemes(self):
+        """Schemes referenced by the overlay."""
+        return {scheme for scheme, _, _ in self.bins.values()} | {p[0] for p in self.patterns}
+
+    def match_bins(self, digits):
+        """
+        Find the BIN records prefixing some digits, longest first.
+
+        Args:
+            digits: Card number or BIN digits as string
+
+        Yields:
+            (scheme, allowed lengths or None, bin record)
+        """
+        bins = self.bins
+        for length in self.lengths:
+            if length <= len(digits):
+                hit = bins.get(digits[:length])
+                if hit is not None:
+                    yield hit
+
+    def __len__(self):
+        return len(self.bins) + len(self.patterns)
+
+    def __repr__(self):
+        return f'Overlay(name={self.name!r}, bins={len(self.bins)}, patterns={len(self.patterns)})'
+
+
+def _lengths(record, name):
+    """Allowed lengths of a record or rule, or None for the scheme default."""
+    lengths = record.get('length')
+    if lengths is None:
+        return None
+    if isinstance(lengths, int):
+        lengths = (lengths,)
+    if not all(isinstance(n, int) for n in lengths):
+        raise ValueError(f'Overlay {name!r}: invalid length in {record!r}')
+    return frozenset(lengths)
+
+
+def as_overlay(value):
+    """
+    Turn an overlay argument into an Overlay.
+
+    Args:
+        value: Overlay, dict in the overlay file format, or path of a JSON
+            overlay file
+
+    Returns:
+        Overlay instance
+    """
+    if isinstance(value, Overlay):
+        return value
+    if isinstance(value, dict):
+        return Overlay.from_dict(value)
+    if isinstance(value, (str, os.PathLike)):
+        return Overlay.load(value)
+    raise TypeError(f'Expected an Overlay, dict or path, got {type(value).__name__}')
+
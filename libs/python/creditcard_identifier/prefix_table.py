@@ -0,0 +1,466 @@
+"""
+Direct-address prefix table
+
+This module compiles the brand patterns into a 1,000,000-entry table that
+maps every 6-digit prefix to a match class, plus a small exception list for
+the prefixes that need a 7th digit. A match class is the set of brands whose
+pattern matches the prefix; a second table resolves (class, number length)
+to the winning brand, applying the priority_over rules ahead of time.
+
+Brand lookup for a number of ASCII digits is then two array indexings.
+"""
+
+import hashlib
+import json
+import mmap
+import struct
+from itertools import product
+
+from .automaton import _Parser
+
+
+PREFIX_LENGTH = 6
+TABLE_SIZE = 10 ** PREFIX_LENGTH
+
+# Table value of prefixes whose class depends on the 7th digit
+EXCEPTION = 255
+
+# Limit on the number of digit sequences a single pattern may expand to
+MAX_EXPANSION = 4096
+
+_DIGITS = frozenset('0123456789')
+_MAGIC = b'BINCCPT1'
+_HEADER_KEYS = frozenset(['names', 'exceptions', 'stride', 'lengths', 'fingerprint', 'resolve'])
+
+
+def _pattern_error(pattern, pos, message):
+    return ValueError(f'Unsupported BIN pattern {pattern!r} at {pos}: {message}')
+
+
+def _expansion_error(pattern, message):
+    return ValueError(f'Unsupported BIN pattern {pattern!r}: {message}')
+
+
+def _digit_set(mask):
+    """Digits of a digit bit mask, as a frozenset of characters."""
+    return frozenset(str(digit) for digit in range(10) if mask >> digit & 1)
+
+
+def _expand(pattern, tree):
+    """Expand a pattern syntax tree into its digit-class sequences."""
+    kind = tree[0]
+    if kind == 'digits':
+        return [(_digit_set(tree[1]),)]
+    if kind == 'alt':
+        alternatives = []
+        for item in tree[1]:
+            alternatives.extend(_expand(pattern, item))
+            if len(alternatives) > MAX_EXPANSION:
+                raise _expansion_error(pattern, 'too many alternatives')
+        return alternatives
+    if kind == 'cat':
+        sequences = [()]
+        for item in tree[1]:
+            atom = _expand(pattern, item)
+            if len(sequences) * len(atom) > MAX_EXPANSION:
+                raise _expansion_error(pattern, 'too many alternatives')
+            sequences = [s + a for s in sequences for a in atom]
+        return sequences
+    if kind == 'end':
+        raise _expansion_error(pattern, '"$" in a prefix pattern')
+    _, item, low, high = tree
+    if high is None:
+        raise _expansion_error(pattern, 'unbounded repetition')
+    alternatives = _expand(pattern, item)
+    repeated = []
+    for count in range(low, high + 1):
+        sequences = [()]
+        for _ in range(count):
+            sequences = [s + a for s in sequences for a in alternatives]
+            if len(sequences) > MAX_EXPANSION:
+                raise _expansion_error(pattern, 'too many alternatives')
+        repeated.extend(sequences)
+    return repeated
+
+
+def expand_pattern(pattern):
+    """
+    Expand a BIN regex into the digit-class sequences it matches.
+
+    Args:
+        pattern: Regex over digits, e.g. '^(5[1-5]|2221)'
+
+    Returns:
+        Sorted list of tuples of frozensets of digits; a number matches the
+        pattern when some sequence matches its leading digits
+
+    Raises:
+        ValueError: If the pattern uses constructs beyond literal digits,
+            classes, \\d, groups, alternation and bounded repetition
+    """
+    # The digit automata's parser: both accept the same pattern syntax
+    lookaheads, tree = _Parser(pattern).parse()
+    if lookaheads:
+        raise _expansion_error(pattern, 'lookahead')
+    sequences = _expand(pattern, tree)
+    return sorted(set(sequences), key=lambda seq: (len(seq), [sorted(c) for c in seq]))
+
+
+def parse_full_pattern(regexp_full):
+    """
+    Parse a brand's regexp_full into its length range and prefixes.
+
+    Args:
+        regexp_full: Pattern like '^(?=.{13,19}$)(?:4|6367)[0-9]*$'
+
+    Returns:
+        Tuple of (min length, max length, expanded prefix sequences)
+
+    Raises:
+        ValueError: If the pattern does not follow that shape
+    """
+    head, tail = '^(?=.{', ')[0-9]*$'
+    if not (regexp_full.startswith(head) and regexp_full.endswith(tail)):
+        raise _pattern_error(regexp_full, 0, 'not a length-checked prefix pattern')
+    end = regexp_full.find('}$)(?:', len(head))
+    if end < 0:
+        raise _pattern_error(regexp_full, len(head), 'missing length lookahead')
+    bounds = regexp_full[len(head):end].split(',')
+    min_length = int(bounds[0])
+    max_length = int(bounds[1]) if len(bounds) > 1 else min_length
+    body = regexp_full[end + len('}$)(?:'):-len(tail)]
+    return min_length, max_length, expand_pattern('(?:' + body + ')')
+
+
+def _strip(sequence, min_length):
+    """Drop trailing any-digit classes: the length check already implies them."""
+    if len(sequence) > min_length:
+        raise ValueError(f'Prefix longer than the minimum number length {min_length}')
+    end = len(sequence)
+    while end and sequence[end - 1] == _DIGITS:
+        end -= 1
+    return sequence[:end]
+
+
+def _runs(digits):
+    """Split a digit set into (low, high) runs of consecutive digits."""
+    values = sorted(int(d) for d in digits)
+    runs = []
+    for value in values:
+        if runs and runs[-1][1] == value - 1:
+            runs[-1][1] = value
+        else:
+            runs.append([value, value])
+    return runs
+
+
+def _intervals(sequence):
+    """Yield the half-open 6-digit prefix intervals a sequence covers."""
+    if not sequence:
+        yield 0, TABLE_SIZE
+        return
+    scale = 10 ** (PREFIX_LENGTH - len(sequence))
+    runs = _runs(sequence[-1])
+    for head in product(*(sorted(c) for c in sequence[:-1])):
+        base = int(''.join(head) or '0') * 10
+        for low, high in runs:
+            yield (base + low) * scale, (base + high + 1) * scale
+
+
+def _merge(intervals):
+    merged = []
+    for low, high in sorted(intervals):
+        if merged and low <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    return merged
+
+
+def _resolve(brands, members, length):
+    """Pick the winning brand, exactly as the regex-based find_brand does."""
+    matching = [i for i in members if brands[i][0] <= length <= brands[i][1]]
+    if not matching:
+        return -1
+    if len(matching) > 1:
+        names = {brands[i][2] for i in matching}
+        for i in matching:
+            if any(p in names for p in brands[i][3]):
+                return i
+    return matching[0]
+
+
+def fingerprint(brands):
+    """
+    Fingerprint the brand fields a prefix table is compiled from.
+
+    Args:
+        brands: Brand dicts with name, priority_over and regexp_full
+
+    Returns:
+        Hex digest
+    """
+    data = json.dumps([
+        [b['name'], list(b.get('priority_over', [])), b['regexp_full']] for b in brands
+    ])
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+class PrefixTable:
+    """Direct-address brand lookup table."""
+
+    def __init__(self, names, table, exceptions, resolve, stride, lengths, fingerprint):
+        """
+        Initialize from compiled tables; use build() or load() instead.
+
+        Args:
+            names: Brand names, in brand list order
+            table: 6-digit prefix -> class id (or EXCEPTION)
+            exceptions: 7-digit prefix -> class id, for EXCEPTION entries
+            resolve: class id * stride + number length -> brand index + 1
+            stride: Number lengths covered per class
+            lengths: (min, max) number length per brand
+            fingerprint: Fingerprint of the source brands
+        """
+        self.names = names
+        self.table = table
+        self.exceptions = exceptions
+        self.resolve = resolve
+        self.stride = stride
+        self.lengths = lengths
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, brands):
+        """
+        Compile brand patterns into a prefix table.
+
+        Args:
+            brands: Brand dicts (as in brands.BRANDS), in priority order
+
+        Returns:
+            PrefixTable instance
+
+        Raises:
+            ValueError: If a pattern cannot be decided by 7 digits and the
+                number length
+        """
+        parsed = []
+        events = []
+        exceptions7 = {}
+        for i, brand in enumerate(brands):
+            min_length, max_length, sequences = parse_full_pattern(brand['regexp_full'])
+            parsed.append((min_length, max_length, brand['name'], brand.get('priority_over', [])))
+            intervals = []
+            for sequence in sequences:
+                sequence = _strip(sequence, min_length)
+                if len(sequence) <= PREFIX_LENGTH:
+                    intervals.extend(_intervals(sequence))
+                elif len(sequence) == PREFIX_LENGTH + 1:
+                    for head in product(*(sorted(c) for c in sequence[:-1])):
+                        digits = exceptions7.setdefault(int(''.join(head)), {})
+                        digits[i] = digits.get(i, frozenset()) | sequence[-1]
+                else:
+                    raise ValueError(f'Brand {brand["name"]!r} needs more than 7 digits')
+            for low, high in _merge(intervals):
+                events.append((low, 1 << i))
+                events.append((high, 1 << i))
+
+        masks = [0]
+        class_ids = {0: 0}
+
+        def class_id(mask):
+            if mask not in class_ids:
+                if len(masks) >= EXCEPTION:
+                    raise ValueError('Too many distinct brand combinations')
+                class_ids[mask] = len(masks)
+                masks.append(mask)
+            return class_ids[mask]
+
+        # Sweep the interval boundaries: between two boundaries the set of
+        # matching brands is constant
+        table = bytearray(TABLE_SIZE)
+        events.sort()
+        mask = 0
+        previous = 0
+        for position, bit in events:
+            if position != previous:
+                table[previous:position] = bytes([class_id(mask)]) * (position - previous)
+                previous = position
+            mask ^= bit
+
+        exceptions = {}
+        for prefix, digits in exceptions7.items():
+            base = masks[table[prefix]]
+            for digit in range(10):
+                extra = 0
+                for i, allowed in digits.items():
+                    if str(digit) in allowed:
+                        extra |= 1 << i
+                exceptions[prefix * 10 + digit] = class_id(base | extra)
+            table[prefix] = EXCEPTION
+
+        stride = max(p[1] for p in parsed) + 1 if parsed else 1
+        resolve = bytearray(len(masks) * stride)
+        for cid, mask in enumerate(masks):
+            members = [i for i in range(len(brands)) if mask >> i & 1]
+            for length in range(stride):
+                resolve[cid * stride + length] = _resolve(parsed, members, length) + 1
+
+        return cls(
+            names=[p[2] for p in parsed],
+            table=bytes(table),
+            exceptions=exceptions,
+            resolve=bytes(resolve),
+            stride=stride,
+            lengths=[(p[0], p[1]) for p in parsed],
+            fingerprint=fingerprint(brands),
+        )
+
+    def class_of(self, number):
+        """
+        Get the match class of a number's leading digits.
+
+        Args:
+            number: String of at least 7 ASCII digits
+
+        Returns:
+            Class id
+        """
+        cid = self.table[int(number[:PREFIX_LENGTH])]
+        if cid == EXCEPTION:
+            cid = self.exceptions[int(number[:PREFIX_LENGTH + 1])]
+        return cid
+
+    def lookup(self, number):
+        """
+        Find the brand of a card number.
+
+        Args:
+            number: String of at least 7 ASCII digits
+
+        Returns:
+            Index of the brand in the brand list, or -1 if none matches
+        """
+        length = len(number)
+        if length >= self.stride:
+            return -1
+        return self.resolve[self.class_of(number) * self.stride + length] - 1
+
+    def lookup_prefix(self, prefix):
+        """
+        Find the brands of the numbers starting with a prefix, by length.
+
+        Args:
+            prefix: String of at least 6 ASCII digits
+
+        Returns:
+            Tuple indexed by number length of sorted tuples of brand indexes
+            (-1 for no brand). More than one entry means the prefix is too
+            short to decide; lengths shorter than the prefix are empty.
+        """
+        if len(prefix) > PREFIX_LENGTH or self.table[int(prefix[:PREFIX_LENGTH])] != EXCEPTION:
+            classes = (self.class_of(prefix),)
+        else:
+            # Only 6 digits of a 7-digit exception: any 7th digit is possible
+            base = int(prefix) * 10
+            classes = {self.exceptions[base + digit] for digit in range(10)}
+        stride = self.stride
+        resolve = self.resolve
+        return tuple(
+            tuple(sorted({resolve[cid * stride + length] - 1 for cid in classes}))
+            if length >= len(prefix) else ()
+            for length in range(stride)
+        )
+
+    def restrict(self, accepted):
+        """
+        Get a table that only resolves some brands.
+
+        Args:
+            accepted: Indexes of the brands to keep
+
+        Returns:
+            PrefixTable sharing this table's prefix data, whose lookups give
+            -1 where the winning brand is not accepted (priority is still
+            decided among all brands)
+        """
+        accepted = set(accepted)
+        keep = bytes(v if v and v - 1 in accepted else 0 for v in range(256))
+        names = ','.join(sorted(self.names[i] for i in accepted))
+        return PrefixTable(
+            names=self.names,
+            table=self.table,
+            exceptions=self.exceptions,
+            resolve=bytes(self.resolve).translate(keep),
+            stride=self.stride,
+            lengths=self.lengths,
+            fingerprint=hashlib.sha256(f'{self.fingerprint}:{names}'.encode()).hexdigest(),
+        )
+
+    def dump(self, path):
+        """
+        Write the table to a file that load() maps back with a single mmap.
+
+        Args:
+            path: Output file path
+        """
+        header = json.dumps({
+            'names': self.names,
+            'exceptions': sorted(self.exceptions.items()),
+            'stride': self.stride,
+            'lengths': self.lengths,
+            'fingerprint': self.fingerprint,
+            'resolve': len(self.resolve),
+        }).encode()
+        with open(path, 'wb') as f:
+            f.write(_MAGIC + struct.pack('<I', len(header)) + header)
+            f.write(self.table)
+            f.write(self.resolve)
+
+    @classmethod
+    def load(cls, path, brands=None):
+        """
+        Map a table written by dump().
+
+        Args:
+            path: Table file path
+            brands: If given, reject a table compiled from other brand data
+
+        Returns:
+            PrefixTable instance backed by the mapped file
+
+        Raises:
+            ValueError: If the file is not a prefix table, is truncated or
+                corrupt, or is stale
+        """
+        with open(path, 'rb') as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        if bytes(view[:len(_MAGIC)]) != _MAGIC:
+            raise ValueError(f'Not a prefix table: {path}')
+        offset = len(_MAGIC) + 4
+        if len(view) < offset:
+            raise ValueError(f'Truncated prefix table: {path}')
+        header_size, = struct.unpack('<I', view[len(_MAGIC):offset])
+        if len(view) < offset + header_size:
+            raise ValueError(f'Truncated prefix table: {path}')
+        header = json.loads(bytes(view[offset:offset + header_size]))
+        if not isinstance(header, dict) or not _HEADER_KEYS <= set(header):
+            raise ValueError(f'Invalid prefix table header: {path}')
+        if brands is not None and header['fingerprint'] != fingerprint(brands):
+            raise ValueError(f'Prefix table {path} was compiled from other brand data')
+        offset += header_size
+        table = view[offset:offset + TABLE_SIZE]
+        resolve = view[offset + TABLE_SIZE:offset + TABLE_SIZE + header['resolve']]
+        if len(table) != TABLE_SIZE or len(resolve) != header['resolve']:
+            raise ValueError(f'Truncated prefix table: {path}')
+        return cls(
+            names=header['names'],
+            table=table,
+            exceptions=dict(header['exceptions']),
+            resolve=resolve,
+            stride=header['stride'],
+            lengths=[tuple(x) for x in header['lengths']],
+            fingerprint=header['fingerprint'],
+        )
@@ -0,0 +1,64 @@
+"""
+Shared, immutable lookup results
+
+Lookups return the same result object every time a brand (or a brand,
+pattern and bin combination) is found, instead of building a new dict per
+call. The objects are dicts (and tuples comparing equal to lists), so
+existing code indexing them, comparing them or passing them to json.dumps
+keeps working, but they cannot be modified.
+"""
+
+
+def freeze(value):
+    """
+    Make a value deeply immutable.
+
+    Args:
+        value: Value decoded from JSON (dicts, lists and scalars)
+
+    Returns:
+        The value with dicts turned into FrozenRecord and lists into FrozenList
+    """
+    if isinstance(value, FrozenRecord):
+        return value
+    if isinstance(value, dict):
+        return FrozenRecord({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return FrozenList(freeze(v) for v in value)
+    return value
+
+
+class FrozenList(tuple):
+    """Tuple that compares equal to a list with the same items."""
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            other = tuple(other)
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    __hash__ = tuple.__hash__
+
+
+class FrozenRecord(dict):
+    """Read-only dict shared between lookups; use copy() for a mutable copy."""
+
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f'{type(self).__name__} is read-only; use copy() to modify it')
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def copy(self):
+        """Get a mutable shallow copy."""
+        return dict(self)
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
@@ -0,0 +1,344 @@
+"""
+PAN discovery scanner
+
+This module finds card numbers in arbitrary files such as logs and database
+dumps. Files are memory-mapped and searched for runs of 12 to 19 digits
+(optionally separated by single spaces or dashes); each run is checked
+against the brand prefix table and the Luhn checksum, and only runs passing
+both are reported, with the PAN masked.
+
+With numpy installed, runs are found and checked with array operations over
+blocks of the mapped bytes, and Python objects are only created for the
+card numbers found. Without it, a regex finds the runs and each is checked
+in Python; both give the same results.
+
+Large files are split into chunks, and chunks of several files are scanned
+in parallel worker processes.
+"""
+
+import mmap
+import os
+import re
+import traceback
+from collections import namedtuple
+from multiprocessing import Pool
+
+from .masking import mask
+from .prefix_table import EXCEPTION, PREFIX_LENGTH
+from .validator import _get_prefix_table, _get_validator
+
+
+# A run may not start right after a digit, even across one separator, so a
+# run is only ever matched from its first digit
+PAN_PATTERN = re.compile(rb'(?<![0-9])(?<![0-9][ -])[0-9](?:[ -]?[0-9]){11,18}(?![0-9])')
+
+# Bytes scanned per task; chunks overlap by more than the longest match
+CHUNK_SIZE = 64 * 1024 * 1024
+_OVERLAP = 64
+
+# Bytes per numpy pass, bounding the temporary arrays
+BLOCK_SIZE = 4 * 1024 * 1024
+MIN_DIGITS = 12
+MAX_DIGITS = 19
+_WIDTH = 2 * MAX_DIGITS
+
+_SEPARATORS = b' -'
+# Byte translation doubling a digit for the Luhn checksum
+_LUHN_DOUBLE = bytes.maketrans(b'0123456789', b'0246813579')
+
+Finding = namedtuple('Finding', ['path', 'offset', 'length', 'brand', 'masked'])
+Finding.__doc__ = """A card number found in a file.
+
+Fields:
+    path: File path
+    offset: Byte offset of the first digit
+    length: Length of the match in bytes, separators included
+    brand: Brand name
+    masked: PAN with all but the first 6 and last 4 digits masked
+"""
+
+
+def _luhn(digits):
+    """Luhn checksum of ASCII digit bytes."""
+    # Every byte is 48 + digit: subtract the offset once per digit
+    total = sum(digits[-1::-2]) + sum(digits[-2::-2].translate(_LUHN_DOUBLE)) - 48 * len(digits)
+    return total % 10 == 0
+
+
+def _numpy():
+    """Get numpy, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def scan_buffer(data, start=0, end=None, path=None):
+    """
+    Find card numbers in a buffer.
+
+    Args:
+        data: bytes, bytearray or mmap to scan
+        start: Offset to start matching at
+        end: Only report matches starting before this offset (default:
+            the end of the buffer); the buffer is read a little past it
+        path: Path to report in the findings
+
+    Yields:
+        Finding tuples in offset order
+    """
+    size = len(data)
+    end = size if end is None else min(end, size)
+    if _get_prefix_table() and _numpy() is not None:
+        for block in range(start, end, BLOCK_SIZE):
+            yield from _scan_block(data, block, min(block + BLOCK_SIZE, end), path)
+    else:
+        yield from _scan_regex(data, start, end, path)
+
+
+_PREFIX_WEIGHTS = [10 ** i for i in range(PREFIX_LENGTH - 1, -1, -1)]
+_tables = {}
+
+
+def _tables_for(np):
+    """The prefix table, resolve table and Luhn doubling as numpy arrays."""
+    table = _get_prefix_table()
+    arrays = _tables.get(id(table))
+    if arrays is None:
+        _tables.clear()
+        arrays = _tables[id(table)] = (
+            table,
+            np.frombuffer(table.table, dtype=np.uint8),
+            np.frombuffer(table.resolve, dtype=np.uint8),
+            np.frombuffer(_LUHN_DOUBLE, dtype=np.uint8),
+        )
+    return arrays
+
+
+def _brands(np, codes, counts):
+    """
+    Find the brands of candidate card numbers.
+
+    Args:
+        np: numpy module
+        codes: n x 7+ uint8 matrix starting with the ASCII digits of each
+            candidate
+        counts: Number of digits per row
+
+    Returns:
+        int array of brand indexes (-1: no brand)
+    """
+    table, classes, resolve, _ = _tables_for(np)
+    prefixes = (codes[:, :PREFIX_LENGTH].astype(np.int32) - 48) @ _PREFIX_WEIGHTS
+    cids = classes[prefixes].astype(np.int32)
+    for i in np.flatnonzero(cids == EXCEPTION):
+        cids[i] = table.exceptions[int(codes[i, :PREFIX_LENGTH + 1].tobytes())]
+    return resolve[cids * table.stride + counts].astype(np.int32) - 1
+
+
+def _luhn_valid(np, codes, counts):
+    """
+    Luhn-check candidate card numbers.
+
+    Args:
+        np: numpy module
+        codes: n x MAX_DIGITS uint8 matrix of ASCII digits, zero padded
+        counts: Number of digits per row
+
+    Returns:
+        bool array
+    """
+    double = _tables_for(np)[3]
+    # Every other digit from the right is doubled; padding adds nothing
+    doubled = (counts[:, None] - np.arange(MAX_DIGITS)) % 2 == 0
+    values = np.where(doubled, double[codes], codes)
+    return (values.sum(axis=1, dtype=np.int32) - 48 * counts) % 10 == 0
+
+
+def _scan_block(data, start, end, path):
+    """Find card numbers starting in data[start:end] with numpy."""
+    np = _numpy()
+    # Two bytes before the block tell whether a run starts at its first byte
+    offset = max(start - 2, 0)
+    stop = min(end + _OVERLAP, len(data))
+    if stop - offset < MIN_DIGITS:
+        # Too short for any candidate (and for the span doubling below)
+        return []
+    window = np.frombuffer(data, dtype=np.uint8, count=stop - offset, offset=offset)
+    last = len(window) - 1
+
+    digit = (window - np.uint8(48)) < 10
+    member = digit.copy()
+    # A single separator between two digits joins them into one run
+    inner = window[1:-1]
+    joined = ((inner == 32) | (inner == 45)) & digit[:-2] & digit[2:]
+    member[1:-1] |= joined
+
+    # Positions followed by at least 12 run bytes, by doubling the span
+    span = member[:-1] & member[1:]
+    span4 = span[:-2] & span[2:]
+    span8 = span4[:-4] & span4[4:]
+    heads = np.flatnonzero(span8[:len(span8) - 4] & span4[8:])
+    if not len(heads):
+        return []
+    # Consecutive heads belong to the same run
+    breaks = np.flatnonzero(np.diff(heads) != 1)
+    starts = heads[np.concatenate(([0], breaks + 1))]
+    lengths = heads[np.concatenate((breaks, [len(heads) - 1]))] + MIN_DIGITS - starts
+    keep = (starts >= start - offset) & (starts < end - offset)
+    starts, lengths = starts[keep], lengths[keep]
+    if not len(starts):
+        return []
+
+    # Count the joined separators of each run: runs having some need their
+    # digits compacted, and runs with fewer than 12 digits are dropped
+    separators = np.flatnonzero(joined) + 1
+    gaps = np.searchsorted(separators, starts + lengths) - np.searchsorted(separators, starts)
+    spaced = (gaps > 0) & (lengths - gaps >= MIN_DIGITS)
+
+    columns = np.arange(MAX_DIGITS)
+    # Plain runs are whole candidates (longer runs hold no PAN): look up
+    # their brand from the first 7 bytes before reading the rest
+    plain = np.flatnonzero((gaps == 0) & (lengths <= MAX_DIGITS))
+    plain_starts, counts = starts[plain], lengths[plain]
+    brands = _brands(np, window[plain_starts[:, None] + columns[:PREFIX_LENGTH + 1]], counts)
+    branded = np.flatnonzero(brands >= 0)
+    plain_starts, counts = plain_starts[branded], counts[branded]
+    codes = window[np.minimum(plain_starts[:, None] + columns, last)]
+    codes[columns >= counts[:, None]] = 0
+    candidates = [(plain_starts, counts, codes, counts, brands[branded])]
+
+    spaced = np.flatnonzero(spaced)
+    if len(spaced):
+        spaced_starts, spaced_lengths = starts[spaced], lengths[spaced]
+        # A 19-digit PAN with separators and the byte after it fit in _WIDTH
+        wide = np.arange(_WIDTH)
+        within = wide < spaced_lengths[:, None]
+        run = np.where(within, window[np.minimum(spaced_starts[:, None] + wide, last)], 0)
+        is_digit = (run - np.uint8(48)) < 10
+        before = np.cumsum(is_digit, axis=1) - is_digit
+        total = is_digit.sum(axis=1)
+        # Runs of more than 19 digits: the longest prefix ending at a separator
+        ends = np.where(within & ~is_digit & (before >= MIN_DIGITS) & (before <= MAX_DIGITS), wide, -1).max(axis=1)
+        whole = (spaced_lengths <= _WIDTH) & (total >= MIN_DIGITS) & (total <= MAX_DIGITS)
+        ends = np.where(whole, spaced_lengths, ends)
+        found = np.flatnonzero(ends >= 0)
+        ends, run = ends[found], run[found]
+        is_digit = is_digit[found] & (wide < ends[:, None])
+        # Move the digits of each candidate to the front of its row
+        order = np.argsort(~is_digit, axis=1, kind='stable')[:, :MAX_DIGITS]
+        codes = np.take_along_axis(np.where(is_digit, run, 0), order, axis=1)
+        total = is_digit.sum(axis=1)
+        brands = _brands(np, codes, total)
+        candidates.append((spaced_starts[found], ends, codes, total, brands))
+
+    starts, lengths, codes, counts, brands = (np.concatenate(column) for column in zip(*candidates))
+    rows = np.flatnonzero(brands >= 0)
+    rows = rows[_luhn_valid(np, codes[rows], counts[rows])]
+    rows = rows[np.argsort(starts[rows])]
+    names = _get_prefix_table().names
+    return [
+        Finding(path, offset + int(starts[i]), int(lengths[i]), names[brands[i]], mask(codes[i, :counts[i]].tobytes()))
+        for i in rows.tolist()
+    ]
+
+
+def _scan_regex(data, start, end, path):
+    """Find card numbers starting in data[start:end] with the regex."""
+    size = len(data)
+    table = _get_prefix_table()
+    validator = None if table else _get_validator()
+    if table:
+        prefixes = table.table
+        exceptions = table.exceptions
+        resolve = table.resolve
+        stride = table.stride
+        names = table.names
+
+    for match in PAN_PATTERN.finditer(data, start, min(end + _OVERLAP, size)):
+        offset = match.start()
+        if offset >= end:
+            break
+        digits = match.group().translate(None, _SEPARATORS)
+
+        if table:
+            # Inlined PrefixTable.lookup, on bytes
+            cid = prefixes[int(digits[:PREFIX_LENGTH])]
+            if cid == EXCEPTION:
+                cid = exceptions[int(digits[:PREFIX_LENGTH + 1])]
+            brand = resolve[cid * stride + len(digits)] - 1
+            if brand < 0 or not _luhn(digits):
+                continue
+            name = names[brand]
+        else:
+            if not _luhn(digits):
+                continue
+            brand = validator.find_brand(digits.decode('ascii'))
+            if brand is None:
+                continue
+            name = brand['name']
+        yield Finding(path, offset, match.end() - offset, name, mask(digits))
+
+
+def scan_file(path, start=0, end=None):
+    """
+    Find card numbers in a file, memory-mapping it.
+
+    Args:
+        path: File path
+        start: Offset to start matching at
+        end: Only report matches starting before this offset
+
+    Returns:
+        List of Finding tuples in offset order
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            try:
+                return list(scan_buffer(data, start, end, path))
+            except BaseException as e:
+                # The failed frames still hold numpy views of the map:
+                # release them, or closing it fails and hides the error
+                traceback.clear_frames(e.__traceback__)
+                raise
+
+
+def _scan_task(task):
+    return scan_file(*task)
+
+
+def _tasks(paths, chunk_size):
+    """Split files into (path, start, end) chunks."""
+    for path in paths:
+        size = os.path.getsize(path)
+        for start in range(0, max(size, 1), chunk_size):
+            yield path, start, start + chunk_size
+
+
+def scan_paths(paths, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Find card numbers in several files, in parallel.
+
+    Args:
+        paths: File paths
+        workers: Number of worker processes (default: CPU count; 1 scans in
+            this process)
+        chunk_size: Bytes scanned per task
+
+    Yields:
+        Finding tuples, per file and in offset order
+    """
+    tasks = _tasks(paths, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1:
+        for task in tasks:
+            yield from _scan_task(task)
+        return
+    # Build the table before forking so the workers share it
+    _get_prefix_table()
+    with Pool(workers) as pool:
+        for findings in pool.imap(_scan_task, tasks):
+            yield from findings
@@ -0,0 +1,332 @@
+"""
+Credit Card BIN Lookup Server
+
+This module provides a small asyncio HTTP/1.1 server on top of
+CreditCardValidator, for services that cannot embed the library.
+
+Endpoints:
+    GET  /brand/<number>[?detailed=1]   Brand JSON, or null if not found
+    GET  /bin/<digits>[?length=N]       Brand from the leading digits (lookup_bin)
+    POST /batch[?detailed=1]            One number per line in, NDJSON out
+    GET  /health                        {"status": "ok"}
+
+Connections are keep-alive by default and pipelined requests are answered
+in order.
+"""
+
+import asyncio
+import json
+import os
+import signal
+import socket
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .validator import CreditCardValidator, warmup
+
+
+# Limits protecting the server from oversized requests
+MAX_HEADER_SIZE = 16 * 1024
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+_REASONS = {
+    200: 'OK',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    411: 'Length Required',
+    413: 'Payload Too Large',
+    417: 'Expectation Failed',
+}
+
+
+class _HTTPError(Exception):
+    """Error answered with an HTTP status and closes the connection."""
+
+    def __init__(self, status, message=None):
+        super().__init__(message or _REASONS[status])
+        self.status = status
+
+
+def _response(status, body, content_type='application/json', keep_alive=True):
+    """Build a complete HTTP/1.1 response."""
+    head = (
+        f'HTTP/1.1 {status} {_REASONS[status]}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Length: {len(body)}\r\n'
+        f'Connection: {"keep-alive" if keep_alive else "close"}\r\n'
+        '\r\n'
+    )
+    return head.encode('latin-1') + body
+
+
+class LookupServer:
+    """HTTP lookup server sharing one validator across connections."""
+
+    def __init__(self, validator=None):
+        """
+        Initialize the server.
+
+        Args:
+            validator: CreditCardValidator to serve (default: a new one)
+        """
+        self.validator = validator or CreditCardValidator()
+
+    def lookup(self, number, detailed=False):
+        """
+        Look up one card number.
+
+        Args:
+            number: Credit card number as string
+            detailed: If True, returns detailed brand info
+
+        Returns:
+            JSON bytes of the brand dict, or b'null' if not found
+        """
+        return json.dumps(self.validator.find_brand(number, detailed)).encode()
+
+    def lookup_bin(self, bin_prefix, pan_length=None):
+        """
+        Look up the leading digits of a card number.
+
+        Args:
+            bin_prefix: First digits of the card number (at least 6)
+            pan_length: Length of the full card number, if known
+
+        Returns:
+            JSON bytes of the lookup_bin result
+
+        Raises:
+            _HTTPError: If the digits or length are invalid
+        """
+        try:
+            return json.dumps(self.validator.lookup_bin(bin_prefix, pan_length)).encode()
+        except ValueError as e:
+            raise _HTTPError(400, str(e))
+
+    def batch(self, body, detailed=False):
+        """
+        Look up many card numbers.
+
+        Args:
+            body: Request body bytes with one card number per line
+            detailed: If True, returns detailed brand info
+
+        Returns:
+            NDJSON bytes with one result per input line, in order
+        """
+        lines = body.decode('ascii', 'replace').splitlines()
+        find_brand = self.validator.find_brand
+        dumps = json.dumps
+        out = [dumps(find_brand(line.strip(), detailed)) for line in lines]
+        return ('\n'.join(out) + '\n').encode() if out else b''
+
+    def handle(self, method, target, body):
+        """
+        Dispatch a request.
+
+        Args:
+            method: HTTP method
+            target: Request target (path and query)
+            body: Request body bytes
+
+        Returns:
+            Tuple of (status, content type, body bytes)
+        """
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        detailed = query.get('detailed', ['0'])[0] in ('1', 'true')
+        path = url.path
+
+        if path.startswith('/brand/'):
+            if method != 'GET':
+                raise _HTTPError(405)
+            return 200, 'application/json', self.lookup(unquote(path[7:]), detailed)
+        if path.startswith('/bin/'):
+            if method != 'GET':
+                raise _HTTPError(405)
+            length = query.get('length', [None])[0]
+            if length is not None and not length.isdigit():
+                raise _HTTPError(400, 'Invalid length')
+            return 200, 'application/json', self.lookup_bin(
+                unquote(path[5:]), int(length) if length is not None else None)
+        if path == '/batch':
+            if method != 'POST':
+                raise _HTTPError(405)
+            return 200, 'application/x-ndjson', self.batch(body, detailed)
+        if path == '/health':
+            return 200, 'application/json', b'{"status": "ok"}'
+        raise _HTTPError(404)
+
+    async def _read_request(self, reader, writer):
+        """Read one request; returns None at end of stream."""
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise _HTTPError(400)
+            return None
+        except asyncio.LimitOverrunError:
+            raise _HTTPError(400, 'Headers too large')
+
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ')
+        except ValueError:
+            raise _HTTPError(400)
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+        if 'chunked' in headers.get('transfer-encoding', '').lower():
+            raise _HTTPError(411)
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise _HTTPError(400)
+        if length > MAX_BODY_SIZE:
+            raise _HTTPError(413)
+        # Clients sending Expect: 100-continue wait for the interim
+        # response before sending the body
+        expect = headers.get('expect', '').lower()
+        if expect:
+            if expect != '100-continue':
+                raise _HTTPError(417)
+            if length and version != 'HTTP/1.0':
+                writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+                await writer.drain()
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.0':
+            keep_alive = connection == 'keep-alive'
+        else:
+            keep_alive = connection != 'close'
+        return method, target, body, keep_alive
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until it closes."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader, writer)
+                    if request is None:
+                        break
+                    method, target, body, keep_alive = request
+                    status, content_type, payload = self.handle(method, target, body)
+                    writer.write(_response(status, payload, content_type, keep_alive))
+                except _HTTPError as e:
+                    body = json.dumps({'error': str(e)}).encode()
+                    writer.write(_response(e.status, body, keep_alive=False))
+                    keep_alive = False
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, sock):
+        """
+        Serve forever on an already bound listening socket.
+
+        Args:
+            sock: Bound TCP or Unix socket
+        """
+        if sock.family == getattr(socket, 'AF_UNIX', None):
+            server = await asyncio.start_unix_server(
+                self.handle_connection, sock=sock, limit=MAX_HEADER_SIZE)
+        else:
+            server = await asyncio.start_server(
+                self.handle_connection, sock=sock, limit=MAX_HEADER_SIZE)
+        async with server:
+            await server.serve_forever()
+
+
+def bind(host='127.0.0.1', port=8080, unix_socket=None):
+    """
+    Create the listening socket.
+
+    Args:
+        host: TCP host to bind
+        port: TCP port to bind (0 picks a free port)
+        unix_socket: Unix socket path; takes precedence over host/port
+
+    Returns:
+        Bound, listening socket
+    """
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(unix_socket)
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+    sock.listen(1024)
+    sock.setblocking(False)
+    return sock
+
+
+def run(host='127.0.0.1', port=8080, unix_socket=None, workers=1, detailed=False,
+        schemes=None, countries=None):
+    """
+    Run the lookup server until interrupted.
+
+    Args:
+        host: TCP host to bind
+        port: TCP port to bind
+        unix_socket: Unix socket path; takes precedence over host/port
+        workers: Number of worker processes
+        detailed: If True, load detailed data before serving
+        schemes: Restrict detailed data to these schemes (default: all)
+        countries: Restrict detailed data to these countries (default: all)
+
+    With several workers, the data is loaded once in the parent before
+    forking so the workers share it copy-on-write.
+    """
+    # Load everything up front: lazily loaded data would be loaded per worker
+    validator = warmup(CreditCardValidator(schemes=schemes, countries=countries), detailed)
+
+    sock = bind(host, port, unix_socket)
+    server = LookupServer(validator)
+
+    if workers <= 1:
+        try:
+            asyncio.run(server.serve(sock))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            try:
+                asyncio.run(server.serve(sock))
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def _stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    for pid in children:
+        while True:
+            try:
+                os.waitpid(pid, 0)
+                break
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                break
@@ -0,0 +1,168 @@
+"""
+Shadow evaluation of a candidate dataset
+
+This module serves lookups from the current data while checking a
+candidate dataset version against live traffic. The candidate is never
+held as a second copy: the two versions are diffed once (sharing the
+process-wide BIN indexes and value table for every unchanged shard), and
+only the changed prefix ranges are kept. A lookup then costs one bisect of
+the leading digits on top of the normal one, and the candidate answer is
+read from the diff only for numbers inside a changed range.
+"""
+
+import random
+import time
+from bisect import bisect_right
+from collections import deque, namedtuple
+
+from .dataset_diff import Dataset, _interval, diff_datasets
+from .prefix_table import PREFIX_LENGTH
+from .masking import mask
+from .records import freeze
+from .validator import _get_validator
+
+
+Mismatch = namedtuple('Mismatch', ['number', 'kind', 'current', 'candidate'])
+Mismatch.__doc__ = """A lookup the candidate dataset answers differently.
+
+Fields:
+    number: Masked card number (first 6 and last 4 digits)
+    kind: 'brand' or 'bin'
+    current: Current brand name, or matched bin record (None: none)
+    candidate: Same as current, for the candidate dataset
+"""
+
+
+class ShadowValidator:
+    """Validator that compares a candidate dataset version in shadow."""
+
+    def __init__(self, candidate, validator=None, sample_rate=1.0, rate=10.0, burst=None,
+                 report=None, keep=100):
+        """
+        Diff a candidate dataset against the current data.
+
+        Args:
+            candidate: Candidate version: Dataset, or path of a data
+                directory or cards.json (see Dataset.load)
+            validator: Validator serving the current data (default: the
+                module validator); its overlays, accepted brands and
+                detailed data selection apply to both versions
+            sample_rate: Fraction of the mismatches to report
+            rate: Reported mismatches per second, on average
+            burst: Reports allowed at once (default: rate)
+            report: Function called with each reported Mismatch (default:
+                only keep them in samples)
+            keep: Number of recent reported mismatches kept in samples
+
+        Raises:
+            ValueError: If candidate is not a dataset, or its brand patterns
+                cannot be compiled into a prefix table
+        """
+        self.validator = validator = validator or _get_validator()
+        if not isinstance(candidate, Dataset):
+            candidate = Dataset.load(candidate)
+        # Only the detailed data the validator serves can answer differently
+        self.changes = diff_datasets(
+            Dataset(schemes=validator.schemes, countries=validator.countries),
+            candidate.restrict(validator.schemes, validator.countries),
+        )
+
+        # Merged 7-digit intervals of the changes, each with its
+        # (low, high, change) entries
+        self._starts, self._ends, self._changes = [], [], []
+        for low, high, change in sorted(((*_interval(c.first, c.last), c) for c in self.changes),
+                                       key=lambda entry: entry[:2]):
+            entry = (low, high, change._replace(old=freeze(change.old), new=freeze(change.new)))
+            if self._ends and low <= self._ends[-1]:
+                self._ends[-1] = max(self._ends[-1], high)
+                self._changes[-1].append(entry)
+            else:
+                self._starts.append(low)
+                self._ends.append(high)
+                self._changes.append([entry])
+
+        self.sample_rate = sample_rate
+        self.rate = rate
+        self.burst = burst if burst is not None else rate
+        self.report = report
+        self.samples = deque(maxlen=keep)
+        self.mismatches = 0
+        self.reported = 0
+        self._tokens = self.burst
+        self._last = time.monotonic()
+
+    def find_brand(self, card_number, detailed=False):
+        """
+        Identify the credit card brand with the current data, checking the
+        candidate in shadow.
+
+        Args:
+            card_number: Credit card number as string
+            detailed: If True, returns detailed brand info with matched bin
+
+        Returns:
+            The current validator's find_brand result
+        """
+        result = self.validator.find_brand(card_number, detailed)
+        if self._starts and isinstance(card_number, str) and len(card_number) > PREFIX_LENGTH:
+            head = card_number[:PREFIX_LENGTH + 1]
+            if head.isascii() and head.isdigit():
+                seven = int(head)
+                i = bisect_right(self._starts, seven) - 1
+                if i >= 0 and self._ends[i] >= seven:
+                    self._compare(card_number, seven, self._changes[i], result, detailed)
+        return result
+
+    def is_supported(self, card_number):
+        """
+        Check if card number is supported by the current data.
+
+        Args:
+            card_number: Credit card number as string
+
+        Returns:
+            True if supported, False otherwise
+        """
+        return self.find_brand(card_number) is not None
+
+    def _compare(self, card_number, seven, changes, result, detailed):
+        """Work out the candidate answer for a number in a changed range."""
+        validator = self.validator
+        if not (card_number.isascii() and card_number.isdigit()):
+            return
+        # Overlays take precedence over both versions alike
+        if validator._overlays and validator._overlay_match(card_number) is not None:
+            return
+        length = len(card_number)
+        current = result.get('scheme', result.get('name')) if result is not None else None
+        candidate = current
+        changes = [change for low, high, change in changes if low <= seven <= high]
+        for change in changes:
+            if change.kind == 'brand' and length in change.new:
+                # Brands not accepted are unsupported on both sides
+                candidate = change.new[length]
+                if validator.accepted is not None and candidate not in validator.accepted:
+                    candidate = None
+        if candidate != current:
+            self._mismatch(card_number, 'brand', current, candidate)
+        elif detailed and current is not None:
+            for change in changes:
+                if change.kind == 'bin' and change.scheme == current and result.get('matched_bin') != change.new:
+                    self._mismatch(card_number, 'bin', result.get('matched_bin'), change.new)
+
+    def _mismatch(self, card_number, kind, current, candidate):
+        """Count a mismatch, and report it if sampled and within the rate."""
+        self.mismatches += 1
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens < 1:
+            return
+        self._tokens -= 1
+        self.reported += 1
+        mismatch = Mismatch(mask(card_number), kind, current, candidate)
+        self.samples.append(mismatch)
+        if self.report is not None:
+            self.report(mismatch)
@@ -4,9 +4,16 @@ Credit Card BIN Validator
 This module provides credit card validation using bin-cc data.
 """
 
+import gc
+import os
 import re
+from .automaton import check_pattern, compile_pattern, match_sets
 from .brands import BRANDS
-from .brands_detailed import BRANDS as BRANDS_DETAILED
+from .brands_detailed import get_brands as get_brands_detailed, select_shards
+from .bin_index import load_bin_index, pack_indexes
+from .overlay import as_overlay, brand_lengths
+from .prefix_table import PrefixTable
+from .records import FrozenRecord, freeze
 
 
 # Luhn lookup table for doubling digits
@@ -45,46 +52,297 @@ def luhn(number):
     return total % 10 == 0
 
 
-# Pre-compile regex patterns for performance
+def _cvv_length(regexp_cvv):
+    """Get the fixed CVV length of a CVV pattern like ^\\d{3}$, or None."""
+    match = re.fullmatch(r'\^\\d\{(\d+)\}\$', regexp_cvv)
+    return int(match.group(1)) if match else None
+
+
 _compiled_brands = [
     {
         **brand,
-        '_regexp_bin': re.compile(brand['regexp_bin']),
-        '_regexp_full': re.compile(brand['regexp_full']),
-        '_regexp_cvv': re.compile(brand['regexp_cvv']),
+        '_cvv_length': _cvv_length(brand['regexp_cvv']),
+        # Shared find_brand result, without the internal fields
+        '_result': freeze(brand),
     }
     for brand in BRANDS
 ]
 
+# The patterns are checked here, and compiled to digit automata
+# (linear-time matching) on first use: the prefix table answers most
+# lookups without them
+for _brand in BRANDS:
+    for _field in ('regexp_bin', 'regexp_full', 'regexp_cvv'):
+        check_pattern(_brand[_field])
+
+
+def _brand_automaton(brand, key):
+    """Digit automaton of a compiled brand's pattern, e.g. '_regexp_full'."""
+    automaton = brand.get(key)
+    if automaton is None:
+        automaton = brand[key] = compile_pattern(brand[key[1:]])
+    return automaton
+
+
+def _fixed_cvv(cvv, length):
+    """Match a CVV like the automaton of ^\\d{length}$ would, without it."""
+    return isinstance(cvv, str) and len(cvv) == length and cvv.isascii() and cvv.isdigit()
+
+
+# Longest card number tried for brand patterns without a length bound
+MAX_NUMBER_LENGTH = 19
+
+# Bound on the detailed and BIN lookup results interned per validator
+_INTERNED_RESULTS_SIZE = 1 << 16
+
+# Brand name -> compiled brand and allowed card number lengths, for overlays
+_brands_by_name = {brand['name']: brand for brand in _compiled_brands}
+_brand_lengths = {brand['name']: frozenset(brand_lengths(brand)) for brand in _compiled_brands}
+
+# Direct-address prefix table, compiled from the brand patterns on first use
+_prefix_table = None
+
+# Environment variable naming a file to map the prefix table from, written
+# on first use (and rewritten when the brand patterns change)
+PREFIX_TABLE_ENV = 'CREDITCARD_IDENTIFIER_PREFIX_TABLE'
+
+
+def _load_prefix_table(path):
+    """Map the prefix table from a file, building and saving it if missing or stale."""
+    try:
+        return PrefixTable.load(path, BRANDS)
+    except (OSError, ValueError):
+        pass
+    table = PrefixTable.build(BRANDS)
+    try:
+        # Write aside and rename, so concurrent processes never map a partial file
+        partial = f'{path}.{os.getpid()}.tmp'
+        table.dump(partial)
+        os.replace(partial, path)
+        return PrefixTable.load(path, BRANDS)
+    except OSError:
+        return table
+
+
+def _get_prefix_table():
+    """Get or build the prefix table; False if the patterns do not fit one."""
+    global _prefix_table
+    if _prefix_table is None:
+        path = os.environ.get(PREFIX_TABLE_ENV)
+        try:
+            _prefix_table = _load_prefix_table(path) if path else PrefixTable.build(BRANDS)
+        except ValueError:
+            _prefix_table = False
+    return _prefix_table
+
+
+# Accepted brand names -> prefix table resolving only those brands; the
+# tables share the prefix data and differ in a small resolve table
+_accepted_tables = {}
+
+
+def _get_accepted_table(accepted):
+    """Get the prefix table of a set of accepted brands (None: all brands)."""
+    table = _get_prefix_table()
+    if not table or accepted is None:
+        return table
+    restricted = _accepted_tables.get(accepted)
+    if restricted is None:
+        restricted = _accepted_tables[accepted] = table.restrict(
+            [i for i, name in enumerate(table.names) if name in accepted])
+    return restricted
+
 
 class CreditCardValidator:
     """Credit card validator using bin-cc data."""
     
-    def __init__(self):
+    def __init__(self, schemes=None, countries=None, overlays=None, accepted=None):
         """
         Initialize validator with brand data.
+        
+        Args:
+            schemes: Restrict detailed data to these schemes (default: all)
+            countries: Restrict detailed bins to these countries (default: all)
+            overlays: Private BIN records and pattern rules taking precedence
+                over the shipped data, first overlay first: Overlay
+                instances, dicts or paths of JSON files (see add_overlay)
+            accepted: Only identify these brands (default: all). Priority
+                is still decided among all brands: a number whose winning
+                brand is not accepted is unsupported, not given to the
+                runner-up. Also the default for schemes.
+        
+        Raises:
+            ValueError: If accepted names unknown brands
+        
+        Detailed data is loaded on first use, and only the shards matching
+        the selected schemes and countries are read. Validators accepting
+        the same brands share one compiled engine.
         """
         self.brands = _compiled_brands
-        self.brands_detailed = BRANDS_DETAILED
+        self.accepted = None
+        if accepted is not None:
+            accepted = frozenset(accepted)
+            unknown = accepted.difference(_brands_by_name)
+            if unknown:
+                raise ValueError(f'Unknown brands: {sorted(unknown)}')
+            if len(accepted) < len(_brands_by_name):
+                self.accepted = accepted
+                if schemes is None:
+                    schemes = sorted(accepted)
+        self.schemes = list(schemes) if schemes is not None else None
+        self.countries = list(countries) if countries is not None else None
+        self._brands_detailed = None
+        self._shards = None
+        # (scheme, pattern position, bin position) -> shared detailed result
+        self._detailed_results = {}
+        # (bin, pan length) -> shared lookup_bin result
+        self._bin_results = {}
+        # scheme -> compiled detailed patterns, filled with the shards
+        self._patterns = {}
+        # (overlay, its interned results) in precedence order
+        self._overlays = []
+        for overlay in overlays or ():
+            self.add_overlay(overlay)
     
-    def find_brand(self, card_number, detailed=False):
+    @property
+    def overlays(self):
+        """Overlays in precedence order."""
+        return [overlay for overlay, _ in self._overlays]
+    
+    def add_overlay(self, overlay, position=None):
         """
-        Identify the credit card brand.
+        Add an overlay, checked ahead of the shipped data.
         
         Args:
-            card_number: Credit card number as string
-            detailed: If True, returns detailed brand info with matched bin
+            overlay: Overlay instance, dict with bins and/or patterns lists,
+                or path of a JSON file holding one
+            position: Precedence among the overlays (0: checked first;
+                default: after the existing ones)
             
         Returns:
-            Brand dict or None if not found. If detailed=True, includes
-            matched_pattern and matched_bin fields.
+            The added Overlay
+            
+        Raises:
+            ValueError: If the overlay is malformed or names unknown schemes
+        
+        Only the overlay's own records are indexed; the shared base data
+        is left untouched.
         """
-        if not card_number:
+        overlay = as_overlay(overlay)
+        unknown = overlay.schemes.difference(_brands_by_name)
+        if unknown:
+            raise ValueError(f'Overlay {overlay.name!r} names unknown schemes: {sorted(unknown)}')
+        entry = (overlay, {})
+        if position is None:
+            self._overlays.append(entry)
+        else:
+            self._overlays.insert(position, entry)
+        return overlay
+    
+    def remove_overlay(self, overlay):
+        """
+        Remove an overlay and the results interned for it.
+        
+        Args:
+            overlay: Overlay instance or name
+            
+        Raises:
+            ValueError: If the overlay was not added
+        """
+        for i, (candidate, _) in enumerate(self._overlays):
+            if candidate is overlay or (isinstance(overlay, str) and candidate.name == overlay):
+                del self._overlays[i]
+                return
+        raise ValueError(f'Overlay not found: {overlay!r}')
+    
+    def _overlay_match(self, card_number):
+        """
+        Find the overlay entry matching a card number.
+        
+        Returns:
+            (brand, bin record, pattern rule, overlay results) with bin
+            record or pattern rule None, or None if no overlay matches;
+            brand is None if the overlay gives a brand not accepted
+        """
+        if not (isinstance(card_number, str) and card_number.isdigit() and card_number.isascii()):
             return None
+        length = len(card_number)
+        for overlay, results in self._overlays:
+            # A shorter BIN still applies where a longer one's lengths do not
+            for scheme, lengths, record in overlay.match_bins(card_number):
+                if length in (lengths or _brand_lengths[scheme]):
+                    return self._accept(_brands_by_name[scheme]), record, None, results
+            for scheme, automaton, lengths, rule in overlay.patterns:
+                if automaton.match(card_number) and length in (lengths or _brand_lengths[scheme]):
+                    return self._accept(_brands_by_name[scheme]), None, rule, results
+        return None
+    
+    def _accept(self, brand):
+        """The brand if this validator accepts it, else None."""
+        if brand is None or self.accepted is None or brand['name'] in self.accepted:
+            return brand
+        return None
+    
+    def _prefix_table(self):
+        """Prefix table for the accepted brands; False if the patterns do not fit one."""
+        if self.accepted is None:
+            return _get_prefix_table()
+        return _get_accepted_table(self.accepted)
+    
+    @property
+    def brands_detailed(self):
+        """Detailed brand data for the selected schemes and countries."""
+        if self._brands_detailed is None:
+            self._brands_detailed = get_brands_detailed(self.schemes, self.countries)
+        return self._brands_detailed
+    
+    def _get_shards(self):
+        """
+        Get selected scheme records (without bins) and their shards, by scheme.
         
-        # Collect all matching brands
-        matching_brands = [b for b in self.brands if b['_regexp_full'].match(card_number)]
+        Raises:
+            ValueError: If a selected scheme has a detailed pattern that
+                cannot be compiled to a digit automaton
+        """
+        if self._shards is None:
+            shards = {
+                record['scheme']: (freeze(record), shards)
+                for record, shards in select_shards(self.schemes, self.countries)
+            }
+            # Compiled with the data, so a bad pattern fails here, not in a lookup
+            patterns = {}
+            for scheme, (record, _) in shards.items():
+                try:
+                    patterns[scheme] = tuple(compile_pattern(p['bin']) for p in record.get('patterns', ()))
+                except ValueError as e:
+                    raise ValueError(f'Scheme {scheme!r}: invalid detailed pattern: {e}') from None
+            self._patterns = patterns
+            self._shards = shards
+        return self._shards
+    
+    def _get_bin_index(self, scheme):
+        """Get the BIN index of a selected scheme, or None if it has no bins."""
+        _, shards = self._get_shards().get(scheme, (None, None))
+        return load_bin_index(scheme, shards) if shards else None
+    
+    def _get_patterns(self, scheme):
+        """Get the compiled detailed patterns of a selected scheme."""
+        self._get_shards()
+        return self._patterns.get(scheme, ())
+    
+    def _match_base_brand(self, card_number):
+        """Find the compiled brand matching a card number in the shipped data."""
+        # Fast path: the prefix table decides plain ASCII digit strings
+        table = self._prefix_table()
+        if (table and isinstance(card_number, str) and len(card_number) > 6
+                and card_number.isdigit() and card_number.isascii()):
+            i = table.lookup(card_number)
+            return self.brands[i] if i >= 0 else None
         
+        return self._winner([b for b in self.brands if _brand_automaton(b, '_regexp_full').match(card_number)])
+    
+    def _winner(self, matching_brands):
+        """Resolve priority among the brands matching a number; None if not accepted."""
         if not matching_brands:
             return None
         
@@ -97,36 +355,91 @@ class CreditCardValidator:
                 if any(p in matching_names for p in candidate.get('priority_over', [])):
                     brand = candidate
                     break
+        return self._accept(brand)
+    
+    def find_brand(self, card_number, detailed=False):
+        """
+        Identify the credit card brand.
+        
+        Args:
+            card_number: Credit card number as string
+            detailed: If True, returns detailed brand info with matched bin
+            
+        Returns:
+            Brand dict or None if not found. If detailed=True, includes
+            matched_pattern and matched_bin fields. The dict is shared
+            between calls and read-only; use copy() for a mutable one.
+        """
+        if not card_number:
+            return None
+        
+        hit = self._overlay_match(card_number) if self._overlays else None
+        brand = hit[0] if hit is not None else self._match_base_brand(card_number)
+        if brand is None:
+            return None
         
         if detailed:
-            detailed_brand = next(
-                (b for b in self.brands_detailed if b['scheme'] == brand['name']),
-                None
-            )
+            scheme = brand['name']
+            detailed_brand, _ = self._get_shards().get(scheme, (None, None))
+            if hit is not None:
+                return self._overlay_result(detailed_brand, brand, card_number, hit)
             if detailed_brand:
                 # Find the specific pattern that matched
-                matched_pattern = None
-                for p in detailed_brand.get('patterns', []):
-                    if re.match(p['bin'], card_number):
-                        matched_pattern = p
-                        break
+                patterns = self._get_patterns(scheme)
+                pattern = next((i for i, p in enumerate(patterns) if p.match(card_number)), -1)
                 
                 # Find the specific bin that matched (if bins exist)
-                bin_prefix = card_number[:6]
-                matched_bin = None
-                for b in detailed_brand.get('bins', []):
-                    if bin_prefix.startswith(b['bin']) or b['bin'] == bin_prefix:
-                        matched_bin = b
-                        break
+                index = self._get_bin_index(scheme)
+                position = index.find(card_number, max_length=6) if index is not None else -1
                 
-                # Return without the full bins array
-                result = {k: v for k, v in detailed_brand.items() if k != 'bins'}
-                result['matched_pattern'] = matched_pattern
-                result['matched_bin'] = matched_bin
+                key = (scheme, pattern, position)
+                result = self._detailed_results.get(key)
+                if result is None:
+                    if len(self._detailed_results) >= _INTERNED_RESULTS_SIZE:
+                        self._detailed_results.clear()
+                    # Scheme records from the shard index never carry the bins array
+                    result = self._detailed_results[key] = FrozenRecord(
+                        detailed_brand,
+                        matched_pattern=detailed_brand['patterns'][pattern] if pattern >= 0 else None,
+                        matched_bin=freeze(index.record(position)) if position >= 0 else None,
+                    )
                 return result
         
-        # Return brand info without internal compiled regex fields
-        return {k: v for k, v in brand.items() if not k.startswith('_')}
+        return brand['_result']
+    
+    def _overlay_result(self, detailed_brand, brand, card_number, hit):
+        """
+        Detailed result for an overlay match, interned with the overlay.
+        
+        The overlay's record or rule is always reported: for a scheme
+        outside the selected ones, on top of the brand's plain result.
+        """
+        _, matched_bin, matched_pattern, results = hit
+        scheme = brand['name']
+        pattern = position = -1
+        index = None
+        if detailed_brand is not None:
+            if matched_pattern is None:
+                patterns = self._get_patterns(scheme)
+                pattern = next((i for i, p in enumerate(patterns) if p.match(card_number)), -1)
+            if matched_bin is None:
+                index = self._get_bin_index(scheme)
+                position = index.find(card_number, max_length=6) if index is not None else -1
+        
+        # Overlay records live as long as the overlay, so their ids are stable keys
+        key = (scheme, id(matched_bin), id(matched_pattern), pattern, position)
+        result = results.get(key)
+        if result is None:
+            if len(results) >= _INTERNED_RESULTS_SIZE:
+                results.clear()
+            if matched_pattern is None and pattern >= 0:
+                matched_pattern = detailed_brand['patterns'][pattern]
+            if matched_bin is None and position >= 0:
+                matched_bin = freeze(index.record(position))
+            result = results[key] = FrozenRecord(
+                detailed_brand if detailed_brand is not None else brand['_result'],
+                matched_pattern=matched_pattern, matched_bin=matched_bin)
+        return result
     
     def is_supported(self, card_number):
         """
@@ -140,6 +453,164 @@ class CreditCardValidator:
         """
         return self.find_brand(card_number) is not None
     
+    def _brands_by_length(self, bin_prefix):
+        """Brand indexes (-1: none) of the numbers starting with a prefix, by length."""
+        table = self._prefix_table()
+        if table:
+            return table.lookup_prefix(bin_prefix)
+        # Without a prefix table, walk the brand automata over the digits
+        # that may follow the prefix, for every length they allow
+        automata = [_brand_automaton(b, '_regexp_full') for b in self.brands]
+        lengths = [a.max_length for a in automata]
+        max_length = max([n for n in lengths if n is not None] + [MAX_NUMBER_LENGTH] * (None in lengths))
+        indexes = {id(b): i for i, b in enumerate(self.brands)}
+        by_length = []
+        for length in range(max_length + 1):
+            winners = set()
+            for matching in match_sets(automata, bin_prefix, length):
+                brand = self._winner([self.brands[i] for i in sorted(matching)])
+                winners.add(indexes[id(brand)] if brand else -1)
+            by_length.append(tuple(sorted(winners)))
+        return tuple(by_length)
+    
+    def lookup_bin(self, bin_prefix, pan_length=None):
+        """
+        Identify the brand of a card from its leading digits only.
+        
+        Args:
+            bin_prefix: First digits of the card number (at least 6)
+            pan_length: Length of the full card number, if known
+            
+        Returns:
+            Read-only dict with:
+            - bin: The given prefix
+            - brand: Brand name, or None if no brand matches or the prefix
+              and length cannot decide between several
+            - lengths: Card number lengths allowed for the brand under this
+              prefix
+            - cvv_length: CVV length of the brand
+            - matched_bin: Longest detailed bin prefixing the digits, or None
+            - candidates: Brand name -> allowed lengths, for every brand
+              possible with this prefix (and length, if given), in priority
+              order
+            
+        Raises:
+            ValueError: If bin_prefix is not a string of at least 6 digits, or
+                pan_length is not an integer
+        """
+        if not (isinstance(bin_prefix, str) and len(bin_prefix) >= 6
+                and bin_prefix.isdigit() and bin_prefix.isascii()):
+            raise ValueError(f'Expected at least 6 digits, got {bin_prefix!r}')
+        if not (pan_length is None or isinstance(pan_length, int)):
+            raise ValueError(f'Expected an integer length, got {pan_length!r}')
+        
+        key = (bin_prefix, pan_length)
+        result = self._bin_results.get(key)
+        if result is not None:
+            return result
+        
+        if self._overlays:
+            result = self._overlay_bin(bin_prefix, pan_length)
+            if result is not None:
+                return result
+        
+        by_length = self._brands_by_length(bin_prefix)
+        if pan_length is not None:
+            possible = by_length[pan_length] if 0 <= pan_length < len(by_length) else ()
+        else:
+            possible = {i for brands in by_length for i in brands}
+        
+        candidates = {}
+        for i, brand in enumerate(self.brands):
+            if i in possible:
+                candidates[brand['name']] = tuple(
+                    length for length, brands in enumerate(by_length) if i in brands)
+        
+        brand = None
+        if pan_length is None:
+            if len(candidates) == 1:
+                brand = self.brands[possible.difference((-1,)).pop()]
+        elif len(possible) == 1 and possible[0] >= 0:
+            brand = self.brands[possible[0]]
+        
+        matched_bin = None
+        if brand is not None:
+            index = self._get_bin_index(brand['name'])
+            position = index.find(bin_prefix, max_length=6) if index is not None else -1
+            if position >= 0:
+                matched_bin = index.record(position)
+        
+        if len(self._bin_results) >= _INTERNED_RESULTS_SIZE:
+            self._bin_results.clear()
+        result = self._bin_results[key] = FrozenRecord(
+            bin=bin_prefix,
+            brand=brand['name'] if brand else None,
+            lengths=freeze(candidates[brand['name']] if brand else ()),
+            cvv_length=brand['_cvv_length'] if brand else None,
+            matched_bin=freeze(matched_bin),
+            candidates=freeze(candidates),
+        )
+        return result
+    
+    def _overlay_bin(self, bin_prefix, pan_length):
+        """
+        lookup_bin result from the first overlay claiming a BIN, or None.
+        
+        BIN records claim the BINs they prefix, longest first, at the
+        lengths they allow. A pattern rule claims a BIN at the lengths
+        where it matches every number starting with it; a BIN it only
+        partly covers is left to the next overlay or the shipped data.
+        """
+        for overlay, results in self._overlays:
+            key = ('bin', bin_prefix, pan_length)
+            result = results.get(key)
+            if result is None:
+                if len(results) >= _INTERNED_RESULTS_SIZE:
+                    results.clear()
+                result = results[key] = self._overlay_claim(overlay, bin_prefix, pan_length) or False
+            if result:
+                return result
+        return None
+    
+    def _overlay_claim(self, overlay, bin_prefix, pan_length):
+        """lookup_bin result of one overlay for a BIN, or None if it does not claim it."""
+        hit = None
+        for scheme, lengths, record in overlay.match_bins(bin_prefix):
+            lengths = tuple(sorted(lengths or _brand_lengths[scheme]))
+            if pan_length is None or pan_length in lengths:
+                hit = scheme, lengths, record
+                break
+        if hit is None:
+            for scheme, automaton, lengths, rule in overlay.patterns:
+                lengths = tuple(sorted(
+                    n for n in lengths or _brand_lengths[scheme]
+                    if (pan_length is None or n == pan_length)
+                    and match_sets([automaton], bin_prefix, n) == {frozenset([0])}))
+                if lengths:
+                    hit = scheme, lengths, None
+                    break
+        if hit is None:
+            return None
+        
+        scheme, lengths, record = hit
+        brand = self._accept(_brands_by_name[scheme])
+        if brand is None:
+            return FrozenRecord(bin=bin_prefix, brand=None, lengths=(), cvv_length=None,
+                                matched_bin=None, candidates=FrozenRecord())
+        if record is None:
+            # Pattern rules carry no bin record: the scheme's own applies
+            index = self._get_bin_index(scheme)
+            position = index.find(bin_prefix, max_length=6) if index is not None else -1
+            record = freeze(index.record(position)) if position >= 0 else None
+        return FrozenRecord(
+            bin=bin_prefix,
+            brand=scheme,
+            lengths=freeze(lengths),
+            cvv_length=brand['_cvv_length'],
+            matched_bin=record,
+            candidates=freeze({scheme: lengths}),
+        )
+    
     def validate_cvv(self, cvv, brand_or_name):
         """
         Validate CVV for a specific brand.
@@ -158,25 +629,30 @@ class CreditCardValidator:
         if isinstance(brand_or_name, dict):
             # Handle detailed brand object
             if 'cvv' in brand_or_name and 'length' in brand_or_name['cvv']:
-                expected_length = brand_or_name['cvv']['length']
-                return re.match(f'^\\d{{{expected_length}}}$', cvv) is not None
+                return _fixed_cvv(cvv, brand_or_name['cvv']['length'])
             # Handle simplified brand object
             if 'regexp_cvv' in brand_or_name:
-                return re.match(brand_or_name['regexp_cvv'], cvv) is not None
+                return compile_pattern(brand_or_name['regexp_cvv']).match(cvv)
             # Handle brand name from object
             brand_name = brand_or_name.get('name') or brand_or_name.get('scheme')
             if brand_name:
-                brand = next((b for b in self.brands if b['name'] == brand_name), None)
+                brand = _brands_by_name.get(brand_name) if isinstance(brand_name, str) else None
                 if brand:
-                    return brand['_regexp_cvv'].match(cvv) is not None
+                    return self._brand_cvv(cvv, brand)
             return False
         
         # Handle brand name (string)
-        brand = next((b for b in self.brands if b['name'] == brand_or_name), None)
+        brand = _brands_by_name.get(brand_or_name) if isinstance(brand_or_name, str) else None
         if not brand:
             return False
         
-        return brand['_regexp_cvv'].match(cvv) is not None
+        return self._brand_cvv(cvv, brand)
+    
+    def _brand_cvv(self, cvv, brand):
+        """Match a CVV against a compiled brand's CVV pattern."""
+        if brand['_cvv_length'] is not None:
+            return _fixed_cvv(cvv, brand['_cvv_length'])
+        return _brand_automaton(brand, '_regexp_cvv').match(cvv)
     
     def get_brand_info(self, brand_name):
         """
@@ -211,9 +687,9 @@ class CreditCardValidator:
         List all supported brands.
         
         Returns:
-            List of brand names
+            List of brand names (only the accepted ones, if restricted)
         """
-        return [brand['name'] for brand in self.brands]
+        return [brand['name'] for brand in self.brands if self._accept(brand)]
     
     def luhn(self, number):
         """
@@ -240,6 +716,43 @@ def _get_validator():
     return _validator
 
 
+def warmup(validator=None, detailed=True, freeze_gc=True):
+    """
+    Build every lookup structure up front, e.g. in a pre-fork master process.
+    
+    Args:
+        validator: CreditCardValidator to warm up (default: the module validator)
+        detailed: If True, also load the detailed data of the validator's
+            selection
+        freeze_gc: If True, call gc.freeze() so collections in forked workers
+            never touch the loaded objects
+        
+    Returns:
+        The warmed up validator
+    
+    The BIN indexes are packed into a single read-only buffer, so after a
+    fork lookups read shared pages instead of copying them.
+    """
+    validator = validator or _get_validator()
+    # The validator's own table: restricted to its accepted brands, if any
+    validator._prefix_table()
+    for brand in _compiled_brands:
+        _brand_automaton(brand, '_regexp_full')
+        _brand_automaton(brand, '_regexp_cvv')
+    if detailed:
+        indexes = []
+        # Loading the shards also compiles the detailed patterns
+        for scheme in validator._get_shards():
+            index = validator._get_bin_index(scheme)
+            if index is not None:
+                indexes.append(index)
+        pack_indexes(indexes)
+    if freeze_gc:
+        gc.collect()
+        gc.freeze()
+    return validator
+
+
 def find_brand(card_number, detailed=False):
     """
     Identify the credit card brand.
@@ -254,6 +767,21 @@ def find_brand(card_number, detailed=False):
     return _get_validator().find_brand(card_number, detailed)
 
 
+def lookup_bin(bin_prefix, pan_length=None):
+    """
+    Identify the brand of a card from its leading digits only.
+    
+    Args:
+        bin_prefix: First digits of the card number (at least 6)
+        pan_length: Length of the full card number, if known
+        
+    Returns:
+        Read-only dict with bin, brand, lengths, cvv_length, matched_bin
+        and candidates (see CreditCardValidator.lookup_bin)
+    """
+    return _get_validator().lookup_bin(bin_prefix, pan_length)
+
+
 def is_supported(card_number):
     """
     Check if card number is supported.
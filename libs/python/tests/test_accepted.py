@@ -0,0 +1,70 @@
+"""Test validators restricted to accepted brands."""
+
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import validator as validator_module
+from creditcard_identifier.aggregate import count
+from creditcard_identifier.validator import CreditCardValidator
+
+ELO = '4011780000000000'
+VISA = '4012001037141112'
+MASTERCARD = '5555666677778884'
+
+
+def test_accepted_keeps_priority():
+    full = CreditCardValidator()
+    assert full.find_brand(ELO)['name'] == 'elo'
+
+    visa_mc = CreditCardValidator(accepted=['visa', 'mastercard'])
+    # elo wins this number, so it is unsupported rather than visa
+    assert visa_mc.find_brand(ELO) is None
+    assert visa_mc.find_brand(VISA)['name'] == 'visa'
+    assert visa_mc.find_brand(MASTERCARD)['name'] == 'mastercard'
+    assert visa_mc.find_brand('6011000990139424') is None
+    assert not visa_mc.is_supported(ELO)
+    assert visa_mc.list_brands() == ['mastercard', 'visa']
+
+    assert CreditCardValidator(accepted=['elo', 'visa']).find_brand(ELO)['name'] == 'elo'
+
+
+def test_accepted_regex_fallback(monkeypatch):
+    monkeypatch.setattr(validator_module, '_get_prefix_table', lambda: False)
+    visa_mc = CreditCardValidator(accepted=['visa', 'mastercard'])
+    assert visa_mc.find_brand(ELO) is None
+    assert visa_mc.find_brand(VISA)['name'] == 'visa'
+
+
+def test_accepted_tables_are_shared():
+    a = CreditCardValidator(accepted=['visa', 'mastercard'])
+    b = CreditCardValidator(accepted=('mastercard', 'visa'))
+    assert a._prefix_table() is b._prefix_table()
+    # Only the resolve table is specific to the subset
+    full = validator_module._get_prefix_table()
+    assert a._prefix_table().table is full.table
+    assert a._prefix_table().fingerprint != full.fingerprint
+    # Accepting every brand is the unrestricted engine
+    every = CreditCardValidator(accepted=full.names)
+    assert every.accepted is None
+    assert every._prefix_table() is full
+
+
+def test_accepted_count_and_overlays():
+    visa_mc = CreditCardValidator(accepted=['visa', 'mastercard'])
+    counts = count([ELO, VISA, MASTERCARD, VISA], by=('brand',), validator=visa_mc)
+    assert counts.to_dict() == {('visa',): 2, ('mastercard',): 1, (None,): 1}
+
+    # Overlay hits for brands not accepted are unsupported as well
+    visa_mc.add_overlay({'bins': [{'bin': '555566', 'scheme': 'elo'}]})
+    assert visa_mc.find_brand(MASTERCARD) is None
+    assert visa_mc.lookup_bin('555566')['brand'] is None
+
+
+def test_accepted_unknown_brand():
+    with pytest.raises(ValueError, match='nope'):
+        CreditCardValidator(accepted=['visa', 'nope'])
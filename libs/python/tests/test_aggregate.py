@@ -0,0 +1,107 @@
+"""Test aggregation-only counting."""
+
+import io
+import pickle
+import random
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import Counts, count
+from creditcard_identifier.bin_index import decode_bin
+from creditcard_identifier.validator import _get_validator
+
+
+def _numbers():
+    """Numbers under known bins, random digits and odd inputs."""
+    rng = random.Random(3)
+    validator = _get_validator()
+    numbers = []
+    for scheme in validator._get_shards():
+        index = validator._get_bin_index(scheme)
+        if index is None:
+            continue
+        for key in index.keys[::2000]:
+            prefix = decode_bin(key)
+            numbers.append(prefix + ''.join(rng.choice('0123456789') for _ in range(16 - len(prefix))))
+    numbers += [''.join(rng.choice('0123456789') for _ in range(16)) for _ in range(500)]
+    numbers += ['', 'abc', '4012 0010 3714 1112', '12']
+    return numbers
+
+
+def _expected(numbers, by):
+    """Reference counts from detailed find_brand results."""
+    validator = _get_validator()
+    expected = {}
+    for number in numbers:
+        brand = validator.find_brand(number, detailed=True)
+        matched = (brand or {}).get('matched_bin') or {}
+        values = {
+            'brand': brand['scheme'] if brand else None,
+            'type': matched.get('type'),
+            'category': matched.get('category'),
+            'issuer': matched.get('issuer'),
+            'country': ','.join(matched['countries']) if matched.get('countries') else None,
+        }
+        key = tuple(values[field] for field in by)
+        expected[key] = expected.get(key, 0) + 1
+    return expected
+
+
+@pytest.mark.parametrize('by', [
+    ('brand',),
+    ('brand', 'country'),
+    ('issuer',),
+    ('country', 'brand', 'type', 'category'),
+])
+def test_count_matches_find_brand(by):
+    """Test counts agree with classifying every number."""
+    numbers = _numbers()
+    counts = count(iter(numbers), by=by)
+    assert counts.to_dict() == _expected(numbers, by)
+    assert counts.total == len(numbers)
+
+
+def test_count_streams():
+    """Test counting over text and binary line streams."""
+    numbers = ['4012001037141112', '5533798818319497', '4012001037141112', 'abc']
+    text = io.StringIO(''.join(n + '\n' for n in numbers))
+    binary = io.BytesIO(b''.join(n.encode() + b'\r\n' for n in numbers))
+    assert count(text).to_dict() == count(binary).to_dict() == {
+        ('visa',): 2, ('mastercard',): 1, (None,): 1,
+    }
+    counts = count(numbers)
+    assert counts['visa'] == 2
+    assert counts['unknown-brand'] == 0
+    assert counts.most_common(1) == [(('visa',), 2)]
+
+
+def test_counts_merge():
+    """Test partial counts merge, also across pickling."""
+    numbers = _numbers()
+    half = len(numbers) // 2
+    whole = count(numbers, by=('brand', 'issuer'))
+    first = count(numbers[:half], by=('brand', 'issuer'))
+    second = pickle.loads(pickle.dumps(count(numbers[half:], by=('brand', 'issuer'))))
+
+    assert first + second == whole
+    first += second
+    assert first == whole
+    assert count(numbers[:half], by='brand', counts=count(numbers[half:])) == count(numbers)
+
+    with pytest.raises(ValueError):
+        first.update(count(numbers))
+
+
+def test_count_invalid_fields():
+    """Test unknown and repeated fields are rejected."""
+    with pytest.raises(ValueError):
+        count([], by=('brand', 'bank'))
+    with pytest.raises(ValueError):
+        Counts(by=('brand', 'brand'))
+    with pytest.raises(ValueError):
+        Counts(by=())
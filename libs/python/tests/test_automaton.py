@@ -0,0 +1,127 @@
+"""Test the digit automata that replace the backtracking regexes."""
+
+import random
+import re
+import subprocess
+import sys
+import os
+import time
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import CreditCardValidator, Overlay
+from creditcard_identifier import automaton as automaton_module
+from creditcard_identifier import validator as validator_module
+from creditcard_identifier.automaton import DigitAutomaton, compile_pattern
+from creditcard_identifier.brands import BRANDS
+from creditcard_identifier.brands_detailed import get_index
+
+
+def _source_patterns():
+    patterns = set()
+    for brand in BRANDS:
+        patterns.update((brand['regexp_bin'], brand['regexp_full'], brand['regexp_cvv']))
+    for record in get_index()['schemes']:
+        patterns.update(p['bin'] for p in record.get('patterns', ()))
+    return sorted(patterns)
+
+
+def _inputs(automaton, rng, count):
+    """Random digit strings, most of them steered away from the dead state."""
+    for _ in range(count):
+        state, digits = 0, []
+        for _ in range(rng.randint(0, 21)):
+            live = [d for d in range(10)
+                    if automaton._decided[automaton._transitions[state * 10 + d]] is not False]
+            digit = rng.choice(live) if live and rng.random() < 0.9 else rng.randrange(10)
+            digits.append(str(digit))
+            state = automaton._transitions[state * 10 + digit]
+        yield ''.join(digits)
+
+
+def test_source_patterns_match_like_re():
+    rng = random.Random(7)
+    for pattern in _source_patterns():
+        automaton = compile_pattern(pattern)
+        regex = re.compile(pattern)
+        for number in _inputs(automaton, rng, 300):
+            assert automaton.match(number) == bool(regex.match(number)), (pattern, number)
+
+
+@pytest.mark.parametrize('pattern', [
+    '^4(?:0|1)*$', '^(?:4|45)?5{2,}', '^5[^0-4]{0,3}$', '^(?P<x>6011|65)', '^(?=.{3,4}$)1*?2',
+    '^(?=.{16}$)(?=[0-9]*9$)4', '^4|^5', '^((1|12)*3|$)', '^[0-9]{,2}$', '^(?:\\d{2}){2,}$',
+])
+def test_constructs_match_like_re(pattern):
+    automaton = DigitAutomaton(pattern)
+    regex = re.compile(pattern)
+    rng = random.Random(pattern)
+    for number in list(_inputs(automaton, rng, 500)) + [''.join(rng.choice('0124569') for _ in range(n))
+                                                        for n in range(20)]:
+        assert automaton.match(number) == bool(regex.match(number)), number
+
+
+@pytest.mark.parametrize('pattern', [
+    '^(4)\\1', '^(?<=4)5', '^(?!4)5', '^4(?=5)', '^4a', '^\\w', '^4^5', '^[a-z]', '^4{2', '^4**',
+    '^4*+', '^(?i)4', '^(4', '^4)', '^(?:[0-9]*1[0-9]{20})',
+])
+def test_rejects_inexpressible_patterns(pattern):
+    with pytest.raises(ValueError):
+        DigitAutomaton(pattern)
+
+
+def test_linear_time():
+    automaton = DigitAutomaton('^(\\d+)+5$')
+    start = time.perf_counter()
+    assert not automaton.match('1' * 100000)
+    assert automaton.match('1' * 100000 + '5')
+    assert time.perf_counter() - start < 1
+
+
+def test_non_digit_input():
+    automaton = compile_pattern('^4[0-9]*$')
+    assert compile_pattern('^4[0-9]*$') is automaton
+    assert automaton.match('4111')
+    assert not automaton.match('4111 1111')
+    assert not automaton.match('4111\n')
+    assert not automaton.match('４111')
+    assert not automaton.match(None)
+    assert DigitAutomaton('^4?').match('')
+
+
+def test_overlay_rejects_pattern():
+    with pytest.raises(ValueError, match='invalid pattern'):
+        Overlay(patterns=[{'scheme': 'visa', 'bin': '^(44)\\1'}])
+
+
+def test_compile_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(automaton_module, 'MAX_CACHED', 2)
+    monkeypatch.setattr(automaton_module, '_automata', {})
+    first = compile_pattern('^1')
+    compile_pattern('^2')
+    assert compile_pattern('^1') is first
+    compile_pattern('^3')
+    # '^2' was the least recently used
+    assert list(automaton_module._automata) == ['^1', '^3']
+
+
+def test_brand_patterns_compiled_on_first_use():
+    code = (
+        'import sys; sys.path.insert(0, sys.argv[1]);'
+        'from creditcard_identifier import find_brand, validator;'
+        'find_brand("4012001037141112");'
+        'print(any("_regexp_full" in b for b in validator._compiled_brands))'
+    )
+    root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+    assert subprocess.check_output([sys.executable, '-c', code, root]).strip() == b'False'
+
+
+def test_detailed_patterns_checked_when_loaded(monkeypatch):
+    record = {'scheme': 'visa', 'patterns': [{'bin': '^(4)\\1'}]}
+    monkeypatch.setattr(validator_module, 'select_shards', lambda schemes, countries: [(record, [])])
+    validator = CreditCardValidator()
+    with pytest.raises(ValueError, match='visa'):
+        validator_module.warmup(validator, freeze_gc=False)
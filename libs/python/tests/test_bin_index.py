@@ -0,0 +1,62 @@
+"""Test compact BIN index."""
+
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier.bin_index import BinIndex, decode_bin, encode_bin, load_bin_index
+from creditcard_identifier.brands_detailed import iter_bins, select_shards
+
+
+def test_encode_bin():
+    """Test BIN keys round-trip and sort like the BIN strings."""
+    bins = ['4', '40', '400', '4000', '401178', '41', '5', '123456789012']
+    for b in bins:
+        assert decode_bin(encode_bin(b)) == b
+    assert sorted(bins, key=encode_bin) == sorted(bins)
+    
+    for invalid in ['', '4a', '1234567890123', '４']:
+        try:
+            encode_bin(invalid)
+            assert False, f'Should have rejected {invalid!r}'
+        except ValueError:
+            pass
+
+
+def test_bin_index_longest_prefix():
+    """Test longest-prefix lookup and first-wins deduplication."""
+    index = BinIndex('test')
+    index.extend([
+        ['4011', 'credit', None, 'Short', ['BR']],
+        ['401178', 'debit', 'CLASSIC', 'Long', ['BR', 'AR']],
+        ['401178', 'credit', None, 'Duplicate', ['AR']],
+        ['5', 'credit', None, None, None, {'note': 'custom'}],
+    ])
+    index.finalize()
+    assert len(index) == 3
+    
+    assert index.record(index.find('4011780000000000'))['issuer'] == 'Long'
+    assert index.record(index.find('4011990000000000'))['issuer'] == 'Short'
+    assert index.record(index.find('4011780000000000', max_length=4))['issuer'] == 'Short'
+    assert index.find('4999') == -1
+    assert index.find('40x1') == -1
+    
+    assert index.record(index.find('401178')) == {
+        'bin': '401178', 'type': 'debit', 'category': 'CLASSIC',
+        'issuer': 'Long', 'countries': ['BR', 'AR'],
+    }
+    assert index.record(index.find('5500'))['note'] == 'custom'
+
+
+def test_load_bin_index():
+    """Test streamed shards index the same bins as the decoded shards."""
+    record, shards = select_shards(['elo'], ['BR'])[0]
+    index = load_bin_index('elo', shards)
+    assert load_bin_index('elo', shards) is index
+    
+    bins = [b for country in shards for b in iter_bins('elo', country)]
+    assert len(index) == len({b['bin'] for b in bins})
+    for b in bins:
+        assert index.record(index.find(b['bin'])) == b
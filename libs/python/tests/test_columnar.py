@@ -0,0 +1,121 @@
+"""Test pandas and PyArrow columnar classification."""
+
+import random
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+np = pytest.importorskip('numpy')
+
+from creditcard_identifier import CreditCardValidator, columnar
+from creditcard_identifier.validator import _get_validator, luhn
+
+
+def _numbers():
+    """Card numbers from every scheme, random digits and odd inputs."""
+    rng = random.Random(7)
+    numbers = ['4012001037141112', '5533798818319497', '378282246310005', '6062825624254001']
+    numbers += [''.join(rng.choice('0123456789') for _ in range(rng.randint(1, 20)))
+                for _ in range(3000)]
+    numbers += ['4012 0010 3714 1112', '', 'abc', '٤٠١٢٠٠١٠٣٧']
+    return numbers
+
+
+def _expected(numbers, validator=None):
+    """Reference results with the per-row API."""
+    validator = validator or _get_validator()
+    brands, issuers, checks = [], [], []
+    for number in numbers:
+        brand = validator.find_brand(number, detailed=True)
+        brands.append(brand['scheme'] if brand else None)
+        issuers.append((brand.get('matched_bin') or {}).get('issuer') if brand else None)
+        checks.append(luhn(number))
+    return brands, issuers, checks
+
+
+def test_series_accessor():
+    """Test the .cc accessor agrees with find_brand and luhn."""
+    pd = pytest.importorskip('pandas')
+    numbers = _numbers()
+    series = pd.Series(numbers + [None], dtype=object)
+    brands, issuers, checks = _expected(numbers)
+
+    brand = series.cc.brand()
+    assert isinstance(brand.dtype, pd.CategoricalDtype)
+    assert brand.astype(object).where(brand.notna(), None).tolist() == brands + [None]
+
+    issuer = series.cc.issuer()
+    assert isinstance(issuer.dtype, pd.CategoricalDtype)
+    assert issuer.astype(object).where(issuer.notna(), None).tolist() == issuers + [None]
+    assert 'AMERICAN EXPRESS COMPANY' in issuer.cat.categories
+
+    checked = series.cc.luhn()
+    assert str(checked.dtype) == 'boolean'
+    assert checked[:-1].tolist() == checks
+    assert checked.isna().tolist() == [False] * len(numbers) + [True]
+
+
+def test_arrow_arrays():
+    """Test the PyArrow functions agree with find_brand and luhn."""
+    pa = pytest.importorskip('pyarrow')
+    numbers = _numbers()
+    brands, issuers, checks = _expected(numbers)
+    array = pa.array(numbers + [None], type=pa.string())
+    chunked = pa.chunked_array([array[:1000], array[1000:]])
+
+    brand = columnar.brand_array(array)
+    assert pa.types.is_dictionary(brand.type)
+    assert brand.to_pylist() == brands + [None]
+    assert columnar.brand_array(chunked).to_pylist() == brands + [None]
+    assert columnar.brand_array(array.cast(pa.large_string())).to_pylist() == brands + [None]
+
+    assert columnar.issuer_array(chunked).to_pylist() == issuers + [None]
+    assert columnar.luhn_array(array[1:]).to_pylist() == checks[1:] + [None]
+
+
+@pytest.mark.parametrize('patterns', [[], [{'scheme': 'visa', 'bin': '^50'}]])
+def test_validator_restrictions(patterns):
+    """Test accepted brands and overlays of a given validator apply."""
+    pd = pytest.importorskip('pandas')
+    validator = CreditCardValidator(accepted=['visa', 'mastercard', 'amex', 'discover'], overlays=[{
+        'bins': [{'bin': '553379', 'scheme': 'visa', 'issuer': 'OVERLAY BANK'},
+                 {'bin': '40120010', 'scheme': 'elo', 'issuer': 'NOT ACCEPTED'}],
+        'patterns': patterns,
+    }])
+    numbers = _numbers()
+    brands, issuers, _ = _expected(numbers, validator)
+    assert 'visa' in brands and 'OVERLAY BANK' in issuers
+    series = pd.Series(numbers, dtype=object)
+
+    brand = series.cc.brand(validator)
+    assert brand.astype(object).where(brand.notna(), None).tolist() == brands
+    issuer = series.cc.issuer(validator)
+    assert issuer.astype(object).where(issuer.notna(), None).tolist() == issuers
+
+
+def test_export_bins(tmp_path):
+    """Test the detailed BIN dataset round-trips through Parquet and Arrow."""
+    pa = pytest.importorskip('pyarrow')
+    pq = pytest.importorskip('pyarrow.parquet')
+    validator = _get_validator()
+    total = sum(len(validator._get_bin_index(s) or ()) for s in validator._get_shards())
+
+    path = str(tmp_path / 'bins.parquet')
+    columnar.export_bins(path)
+    table = pq.read_table(path)
+    assert table.column_names == ['scheme', 'bin', 'type', 'category', 'issuer', 'countries']
+    assert table.num_rows == total
+    amex = table.filter(pa.compute.equal(table['scheme'], 'amex')).to_pylist()
+    assert amex and all(row['bin'].startswith('3') for row in amex)
+
+    path = str(tmp_path / 'bins.arrow')
+    columnar.export_bins(path, format='arrow')
+    with pa.memory_map(path) as source:
+        assert pa.ipc.open_file(source).read_all().equals(table)
+
+    with pytest.raises(ValueError):
+        columnar.export_bins(path, format='csv')
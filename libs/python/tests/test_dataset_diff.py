@@ -0,0 +1,185 @@
+"""Test dataset version diffs."""
+
+import gzip
+import json
+import shutil
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import affected, diff_datasets
+from creditcard_identifier.__main__ import main
+from creditcard_identifier.brands import BRANDS
+from creditcard_identifier.brands_detailed import DATA_DIR
+from creditcard_identifier.dataset_diff import Change, Dataset
+
+
+def _brands(**changes):
+    """Package brands with some regexp_full patterns replaced."""
+    brands = [dict(b) for b in BRANDS]
+    for brand in brands:
+        if brand['name'] in changes:
+            old, new = changes[brand['name']]
+            brand['regexp_full'] = brand['regexp_full'].replace(old, new)
+    return brands
+
+
+def _shard(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def _write_shard(path, rows):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.writelines(json.dumps(row) + '\n' for row in rows)
+
+
+def _write_cards(path, brands):
+    """Write brands as a compiled cards.json."""
+    cards = [
+        {'name': b['name'], 'priorityOver': list(b.get('priority_over', [])), 'regexpBin': b['regexp_bin'],
+         'regexpFull': b['regexp_full'], 'regexpCvv': b['regexp_cvv']}
+        for b in brands
+    ]
+    path.write_text(json.dumps(cards))
+    return path
+
+
+def _copy(path, schemes):
+    """Copy of the package data restricted to a few schemes."""
+    path.mkdir()
+    with open(os.path.join(DATA_DIR, 'index.json')) as f:
+        index = json.load(f)
+    index['schemes'] = [s for s in index['schemes'] if s['scheme'] in schemes]
+    index['shards'] = {s: c for s, c in index['shards'].items() if s in schemes}
+    (path / 'index.json').write_text(json.dumps(index))
+    for scheme in schemes:
+        shutil.copytree(os.path.join(DATA_DIR, scheme), path / scheme)
+    _write_cards(path / 'cards.json', BRANDS)
+    return path
+
+
+@pytest.fixture(scope='module')
+def versions(tmp_path_factory):
+    """Old and new versions with a few elo bins and dankort patterns changed."""
+    root = tmp_path_factory.mktemp('dataset')
+    old = _copy(root / 'old', ['elo', 'dankort'])
+    new = _copy(root / 'new', ['elo', 'dankort'])
+    shard = new / 'elo' / 'bins-br.ndjson.gz'
+    rows = _shard(shard)
+    by_bin = {row[0]: row for row in rows}
+    added = next(b for b in map(str, range(509100, 510000)) if b not in by_bin)
+    by_bin['401178'][3] = 'NEW ISSUER'
+    del by_bin['401179']
+    by_bin[added] = [added, 'credit', None, 'ADDED', ['BR']]
+    # Short bins only cover the prefixes elo can claim and no longer bin covers
+    by_bin['50900'] = ['50900', 'debit', None, 'SHORT', ['BR']]
+    by_bin['65003'] = ['65003', 'debit', None, 'UNCLAIMED', ['BR']]
+    _write_shard(shard, list(by_bin.values()))
+
+    _write_cards(new / 'cards.json', _brands(dankort=('|4571', ''), amex=('{15}', '{15,16}')))
+    return old, new, added, sorted(row[0] for row in rows if row[0].startswith('50900'))
+
+
+def test_diff_same_version(tmp_path):
+    assert diff_datasets() == []
+    assert diff_datasets(Dataset(), Dataset(_brands())) == []
+    # A cards.json alone has no detailed data to compare
+    cards = _write_cards(tmp_path / 'cards.json', BRANDS)
+    assert diff_datasets(None, cards) == []
+    assert diff_datasets(cards, None) == []
+
+
+def test_diff_brands():
+    changes = diff_datasets(None, Dataset(_brands(dankort=('|4571', ''), amex=('{15}', '{15,16}'))))
+    assert changes == [
+        Change('340000', '349999', 'brand', None, {16: None}, {16: 'amex'}),
+        Change('370000', '379999', 'brand', None, {16: None}, {16: 'amex'}),
+        Change('457100', '457199', 'brand', None, {16: 'dankort'}, {16: 'visa'}),
+    ]
+    # Priority winners: visa now takes precedence over elo
+    brands = [dict(b) for b in BRANDS]
+    for brand in brands:
+        if brand['name'] == 'elo':
+            brand['priority_over'] = [p for p in brand['priority_over'] if p != 'visa']
+        if brand['name'] == 'visa':
+            brand['priority_over'] = list(brand['priority_over']) + ['elo']
+    changes = diff_datasets(None, Dataset(brands))
+    assert changes and all(c.old == {16: 'elo'} and c.new == {16: 'visa'} for c in changes)
+    assert changes[0].first == '401178'
+
+
+def test_diff_bins(versions):
+    old, new, added, short_covered = versions
+    changes = diff_datasets(old, new)
+    bins = [c for c in changes if c.kind == 'bin']
+    brand_starts = [c.first for c in changes if c.kind == 'brand']
+    assert brand_starts == ['340000', '370000', '457100']
+
+    by_first = {c.first: c for c in bins}
+    assert by_first['401178'].old['issuer'] is None
+    assert by_first['401178'].new['issuer'] == 'NEW ISSUER'
+    assert by_first['401179'].new is None
+    assert by_first[added].old is None and by_first[added].new['issuer'] == 'ADDED'
+    # The 5-digit bin changes the 509000-509009 prefixes without a bin of their own
+    short = [c for c in bins if c.new and c.new['bin'] == '50900']
+    covered = set()
+    for c in short:
+        covered.update(range(int(c.first), int(c.last) + 1))
+    assert covered == set(range(509000, 509010)) - {int(b) for b in short_covered}
+    assert all(c.scheme == 'elo' for c in bins)
+    assert not any(c.new and c.new['bin'] == '65003' for c in bins)
+
+
+def test_affected(versions):
+    old, new, added, _ = versions
+    changes = diff_datasets(old, new)
+    stored = ['411111', '401178', '4011780000000000', '401180', '457100', '4571991234567890',
+              '3700001', added, '5099981234567890', '12', 'abcdef']
+    assert list(affected(stored, changes)) == [
+        '401178', '4011780000000000', '457100', '4571991234567890', '3700001', added,
+    ]
+    records = [{'bin': b} for b in stored]
+    assert list(affected(records, changes, key=lambda r: r['bin']))[0] == {'bin': '401178'}
+    assert list(affected(stored, [])) == []
+
+
+def test_dataset_load_errors(tmp_path):
+    with pytest.raises(ValueError):
+        Dataset.load(tmp_path)
+    # A data directory must bring its own brand patterns
+    copy = _copy(tmp_path / 'copy', ['dankort'])
+    os.remove(copy / 'cards.json')
+    with pytest.raises(ValueError):
+        Dataset.load(copy)
+    assert Dataset.load(DATA_DIR).brands is BRANDS
+    cards = tmp_path / 'cards.json'
+    cards.write_text(json.dumps([{'name': 'visa', 'priorityOver': [], 'regexpFull': '^(?=.{16}$)(?:4)[0-9]*$'}]))
+    dataset = Dataset.load(cards)
+    assert dataset.shards == {}
+    assert dataset.table.names == ['visa']
+
+
+def test_diff_cli(versions, tmp_path, capsys):
+    old, new, added, _ = versions
+    assert main(['diff', DATA_DIR]) == 0
+    assert capsys.readouterr().out == ''
+
+    assert main(['diff', str(old), str(new)]) == 1
+    lines = capsys.readouterr().out.splitlines()
+    assert '457100-457199 brand 16: dankort -> visa' in lines
+    assert "401178 bin elo: issuer: None -> 'NEW ISSUER'" in lines
+    assert '401179 bin elo: removed 401179' in lines
+
+    assert main(['diff', '--json', str(old), str(new)]) == 1
+    records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert records[0]['kind'] == 'brand'
+
+    stored = tmp_path / 'stored.txt'
+    stored.write_text(f'411111\n401178\n{added}\n')
+    assert main(['diff', '--filter', str(stored), str(old), str(new)]) == 1
+    assert capsys.readouterr().out == f'401178\n{added}\n'
@@ -0,0 +1,70 @@
+"""Test sort-merge enrichment of BIN-sorted streams."""
+
+import random
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import enrich_sorted
+from creditcard_identifier.bin_index import decode_bin
+from creditcard_identifier.validator import _get_validator
+
+
+def _numbers():
+    """Numbers under known bins (several per bin) and random digits."""
+    rng = random.Random(5)
+    validator = _get_validator()
+    numbers = []
+    for scheme in validator._get_shards():
+        index = validator._get_bin_index(scheme)
+        if index is None:
+            continue
+        for key in index.keys[::997]:
+            prefix = decode_bin(key)
+            for _ in range(3):
+                numbers.append(prefix + ''.join(rng.choice('0123456789') for _ in range(16 - len(prefix))))
+    numbers += [''.join(rng.choice('0123456789') for _ in range(rng.randint(4, 19))) for _ in range(2000)]
+    numbers += ['', 'abc', '4012 0010 3714 1112']
+    return numbers
+
+
+def _expected(number):
+    """Reference (scheme, bin) from find_brand."""
+    brand = _get_validator().find_brand(number, detailed=True)
+    if brand is None:
+        return None, None
+    return brand.get('scheme', brand.get('name')), brand.get('matched_bin')
+
+
+def test_enrich_sorted_matches_find_brand():
+    """Test the merge join agrees with indexed lookups."""
+    numbers = sorted(_numbers())
+    results = list(enrich_sorted(numbers, strict=True))
+    assert [record for record, _, _ in results] == numbers
+    for number, scheme, matched in results:
+        assert (scheme, matched) == _expected(number), number
+
+
+def test_enrich_sorted_records():
+    """Test records with a key function and shared bin records."""
+    records = [{'id': i, 'pan': pan} for i, pan in enumerate(['378282246310005'] * 3)]
+    results = list(enrich_sorted(records, key=lambda r: r['pan']))
+    assert [r['id'] for r, _, _ in results] == [0, 1, 2]
+    assert {scheme for _, scheme, _ in results} == {'amex'}
+    assert results[0][2]['issuer'] == 'AMERICAN EXPRESS COMPANY'
+    assert results[0][2] is results[2][2]
+
+
+def test_enrich_unsorted_falls_back():
+    """Test unsorted input keeps correct results, or raises when strict."""
+    numbers = _numbers()
+    random.Random(1).shuffle(numbers)
+    for number, scheme, matched in enrich_sorted(numbers):
+        assert (scheme, matched) == _expected(number), number
+
+    with pytest.raises(ValueError):
+        list(enrich_sorted(['5533798818319497', '4012001037141112'], strict=True))
@@ -0,0 +1,180 @@
+"""Test private BIN overlays."""
+
+import json
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import CreditCardValidator, Overlay, count, enrich_sorted, find_brand
+from creditcard_identifier.bin_index import _index_cache
+
+
+PRIVATE = {
+    'name': 'private',
+    'bins': [
+        {'bin': '999900', 'scheme': 'visa', 'issuer': 'ACME TEST', 'countries': ['BR'], 'length': [16]},
+        {'bin': '401200', 'scheme': 'elo', 'issuer': 'COBRAND', 'tier': 'gold'},
+    ],
+    'patterns': [
+        {'scheme': 'mastercard', 'bin': '^8888', 'comment': 'internal test range'},
+    ],
+}
+
+
+def test_overlay_bins_and_patterns():
+    validator = CreditCardValidator(overlays=[PRIVATE])
+
+    assert validator.find_brand('9999001234567890')['name'] == 'visa'
+    # The record's lengths apply
+    assert validator.find_brand('999900123456789') is None
+    # Co-brand inside the visa range, with the scheme's default lengths
+    # (other lengths fall through to the shipped data)
+    assert validator.find_brand('4012001037141112')['name'] == 'elo'
+    assert validator.find_brand('401200103714111')['name'] == 'visa'
+    assert validator.find_brand('8888000000000000')['name'] == 'mastercard'
+    # Everything else comes from the shipped data
+    assert validator.find_brand('4111111111111111')['name'] == 'visa'
+    assert validator.find_brand('5555666677778884') == find_brand('5555666677778884')
+    assert validator.is_supported('8888000000000000')
+
+
+def test_overlay_detailed():
+    validator = CreditCardValidator(overlays=[PRIVATE])
+
+    result = validator.find_brand('4012001037141112', detailed=True)
+    assert result['scheme'] == 'elo'
+    assert result['matched_bin'] == {
+        'bin': '401200', 'type': None, 'category': None, 'issuer': 'COBRAND', 'countries': None, 'tier': 'gold',
+    }
+    assert validator.find_brand('4012001037141112', detailed=True) is result
+
+    result = validator.find_brand('8888000000000000', detailed=True)
+    assert result['matched_pattern'] == {'bin': '^8888', 'comment': 'internal test range'}
+    assert result['matched_bin'] is None
+
+    assert validator.find_brand('378282246310005', detailed=True) == find_brand('378282246310005', detailed=True)
+
+    # Overlay records are reported even for schemes without selected detailed data
+    validator = CreditCardValidator(schemes=['visa'], overlays=[PRIVATE])
+    result = validator.find_brand('4012001037141112', detailed=True)
+    assert result['name'] == 'elo'
+    assert result['matched_bin']['issuer'] == 'COBRAND'
+    assert validator.find_brand('8888000000000000', detailed=True)['matched_pattern']['bin'] == '^8888'
+
+
+def test_overlay_precedence():
+    first = Overlay(bins=[{'bin': '4012', 'scheme': 'elo'}], name='first')
+    second = Overlay(bins=[{'bin': '401200', 'scheme': 'hipercard'}], name='second')
+    validator = CreditCardValidator(overlays=[first, second])
+    # The first overlay wins even against a longer bin in a later one
+    assert validator.find_brand('4012001037141112')['name'] == 'elo'
+
+    validator = CreditCardValidator(overlays=[second, first])
+    assert validator.find_brand('4012001037141112')['name'] == 'hipercard'
+    assert validator.find_brand('4012991037141112')['name'] == 'elo'
+
+    # Within an overlay, the longest bin wins, then the pattern rules
+    overlay = Overlay(
+        bins=[{'bin': '4012', 'scheme': 'elo'}, {'bin': '401200', 'scheme': 'hipercard'}],
+        patterns=[{'scheme': 'discover', 'bin': '^4'}],
+    )
+    validator = CreditCardValidator(overlays=[overlay])
+    assert validator.find_brand('4012001037141112')['name'] == 'hipercard'
+    assert validator.find_brand('4012991037141112')['name'] == 'elo'
+    assert validator.find_brand('4111111111111111')['name'] == 'discover'
+
+    # A longer bin whose lengths do not allow the number gives way to a shorter one
+    overlay = Overlay(bins=[{'bin': '4012', 'scheme': 'elo'}, {'bin': '401200', 'scheme': 'hipercard', 'length': 19}])
+    validator = CreditCardValidator(overlays=[overlay])
+    assert validator.find_brand('4012001037141112')['name'] == 'elo'
+    assert validator.find_brand('4012001037141112000')['name'] == 'hipercard'
+    assert validator.lookup_bin('401200', 16)['brand'] == 'elo'
+    assert validator.lookup_bin('401200', 19)['brand'] == 'hipercard'
+
+
+def test_add_remove_overlay(tmp_path):
+    validator = CreditCardValidator()
+    validator.find_brand('4012001037141112', detailed=True)
+    indexes = dict(_index_cache)
+
+    path = tmp_path / 'overlay.json'
+    path.write_text(json.dumps(PRIVATE))
+    overlay = validator.add_overlay(path)
+    assert overlay.name == 'private'
+    assert validator.overlays == [overlay]
+    assert validator.find_brand('4012001037141112')['name'] == 'elo'
+
+    tests = validator.add_overlay({'bins': [{'bin': '4012', 'scheme': 'hipercard'}]}, position=0)
+    assert validator.overlays == [tests, overlay]
+    assert validator.find_brand('4012001037141112')['name'] == 'hipercard'
+
+    validator.remove_overlay(tests)
+    validator.remove_overlay('private')
+    assert validator.overlays == []
+    assert validator.find_brand('4012001037141112')['name'] == 'visa'
+    with pytest.raises(ValueError):
+        validator.remove_overlay('private')
+    # The shared base indexes were never rebuilt
+    assert all(_index_cache[key] is index for key, index in indexes.items())
+
+
+def test_overlay_errors():
+    with pytest.raises(ValueError):
+        Overlay(bins=[{'bin': '40a2', 'scheme': 'visa'}])
+    with pytest.raises(ValueError):
+        Overlay(bins=[{'bin': '4012'}])
+    with pytest.raises(ValueError):
+        Overlay(patterns=[{'scheme': 'visa', 'bin': '^(4'}])
+    with pytest.raises(ValueError):
+        Overlay.from_dict({'rules': []})
+    with pytest.raises(ValueError):
+        CreditCardValidator(overlays=[{'bins': [{'bin': '4012', 'scheme': 'nope'}]}])
+    with pytest.raises(TypeError):
+        CreditCardValidator(overlays=[42])
+
+
+def test_overlay_lookup_bin():
+    validator = CreditCardValidator(overlays=[PRIVATE])
+    result = validator.lookup_bin('999900')
+    assert result['brand'] == 'visa'
+    assert result['lengths'] == (16,)
+    assert result['matched_bin']['issuer'] == 'ACME TEST'
+    assert validator.lookup_bin('999900') is result
+    # A length the record does not allow falls through to the shipped data
+    assert validator.lookup_bin('999900', 15)['brand'] is None
+    assert validator.lookup_bin('40120010', 16)['brand'] == 'elo'
+    assert validator.lookup_bin('411111', 16)['brand'] == 'visa'
+
+    # Pattern rules claim the BINs they match whole
+    result = validator.lookup_bin('888800')
+    assert result['brand'] == 'mastercard'
+    assert result['lengths'] == (16,)
+    assert validator.lookup_bin('888800', 15)['brand'] is None
+
+    # A BIN a rule only partly covers is left to the shipped data
+    validator = CreditCardValidator(overlays=[{'patterns': [{'scheme': 'elo', 'bin': '^40120012'}]}])
+    assert validator.find_brand('4012001237141112')['name'] == 'elo'
+    assert validator.lookup_bin('401200', 16)['brand'] == 'visa'
+    assert validator.lookup_bin('40120012', 16)['brand'] == 'elo'
+
+
+def test_overlay_count_and_enrich():
+    validator = CreditCardValidator(overlays=[PRIVATE])
+    numbers = ['4012001037141112', '5555666677778884', '8888000000000000', '9999001234567890']
+
+    counts = count(numbers, by=('brand', 'issuer', 'country'), validator=validator)
+    assert counts['elo', 'COBRAND', None] == 1
+    assert counts['visa', 'ACME TEST', 'BR'] == 1
+    assert counts.total == 4
+
+    enriched = list(enrich_sorted(numbers, validator=validator))
+    assert [(scheme, bin_record and bin_record['bin']) for _, scheme, bin_record in enriched] == [
+        ('elo', '401200'),
+        ('mastercard', find_brand('5555666677778884', detailed=True)['matched_bin']['bin']),
+        ('mastercard', None),
+        ('visa', '999900'),
+    ]
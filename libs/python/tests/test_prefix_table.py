@@ -0,0 +1,150 @@
+"""Test direct-address prefix table."""
+
+import random
+import re
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import validator
+from creditcard_identifier.brands import BRANDS
+from creditcard_identifier.prefix_table import EXCEPTION, PrefixTable, expand_pattern
+
+
+def _regex_brand(number):
+    """Reference brand resolution with the regexes."""
+    matching = [b for b in BRANDS if re.match(b['regexp_full'], number)]
+    if not matching:
+        return None
+    names = {b['name'] for b in matching}
+    for b in matching:
+        if any(p in names for p in b['priority_over']):
+            return b['name']
+    return matching[0]['name']
+
+
+def test_expand_pattern():
+    """Test BIN regexes expand to digit-class sequences."""
+    assert expand_pattern('^4') == [(frozenset('4'),)]
+    assert expand_pattern('^(?:34|37)') == [
+        (frozenset('3'), frozenset('4')), (frozenset('3'), frozenset('7')),
+    ]
+    assert expand_pattern('^5[1-5]') == [(frozenset('5'), frozenset('12345'))]
+    assert len(expand_pattern(r'^(6043[0-9]{2}|6509\d)')) == 2
+    assert expand_pattern('^401178|^401179')[1][-1] == frozenset('9')
+    
+    for unsupported in ['^4+', '^4*', '^(?=4)', r'^4\w', '^4$', '4^', '^[a-z]', '^(4']:
+        try:
+            expand_pattern(unsupported)
+            assert False, f'Should have rejected {unsupported!r}'
+        except ValueError:
+            pass
+
+
+def test_prefix_table_matches_regexes():
+    """Test the table agrees with the regex resolution."""
+    table = PrefixTable.build(BRANDS)
+    rng = random.Random(1234)
+    prefixes = ['', '4', '5', '6', '60', '62', '65', '50', '35', '6011', '6040', '605474', '506699']
+    for _ in range(20000):
+        length = rng.randint(7, 20)
+        number = rng.choice(prefixes) + ''.join(rng.choice('0123456789') for _ in range(length))
+        number = number[:length]
+        i = table.lookup(number)
+        assert (BRANDS[i]['name'] if i >= 0 else None) == _regex_brand(number), number
+    
+    # 7-digit patterns go through the exception list
+    assert table.table[605474] == EXCEPTION
+    for number in ['6054743000000000', '6054745000000000']:
+        assert BRANDS[table.lookup(number)]['name'] == _regex_brand(number)
+
+
+def test_prefix_table_lookup_prefix():
+    """Test prefix lookups list the brand of every number under the prefix."""
+    table = PrefixTable.build(BRANDS)
+    rng = random.Random(99)
+    for prefix in ['401200', '636297', '605474', '6054743', '55337988'] + [
+            ''.join(rng.choice('0123456789') for _ in range(rng.randint(6, 8))) for _ in range(300)]:
+        by_length = table.lookup_prefix(prefix)
+        for length in range(len(prefix) + 1, table.stride):
+            brands = {table.lookup(prefix + str(digit) * (length - len(prefix))) for digit in range(10)}
+            assert brands <= set(by_length[length]), (prefix, length)
+            if len(prefix) > 6 or table.table[int(prefix[:6])] != EXCEPTION:
+                assert len(by_length[length]) == 1
+        assert by_length[:len(prefix)] == ((),) * len(prefix)
+    
+    # The 7th digit of an exception prefix is unknown: any of its brands is possible
+    assert set(table.lookup_prefix('605474')[16]) == {
+        table.lookup(f'605474{digit}000000000') for digit in range(10)}
+
+
+def test_prefix_table_dump_load(tmp_path):
+    """Test the table round-trips through a mapped file."""
+    table = PrefixTable.build(BRANDS)
+    path = str(tmp_path / 'prefix-table.bin')
+    table.dump(path)
+    
+    loaded = PrefixTable.load(path, BRANDS)
+    assert bytes(loaded.table) == table.table
+    assert bytes(loaded.resolve) == table.resolve
+    assert loaded.exceptions == table.exceptions
+    for number in ['4012001037141112', '5533798818319497', '6054743000000000', '9999999999999999']:
+        assert loaded.lookup(number) == table.lookup(number)
+    
+    other = [dict(BRANDS[0], regexp_full='^(?=.{15}$)(?:34)[0-9]*$')] + BRANDS[1:]
+    try:
+        PrefixTable.load(path, other)
+        assert False, 'Should have rejected a stale table'
+    except ValueError:
+        pass
+
+
+def test_prefix_table_load_rejects_corrupt_files(tmp_path):
+    """Test truncated or corrupt table files are rejected, not trusted."""
+    table = PrefixTable.build(BRANDS)
+    path = tmp_path / 'prefix-table.bin'
+    table.dump(str(path))
+    data = path.read_bytes()
+    header_end = 12 + int.from_bytes(data[8:12], 'little')
+    corrupt = [
+        data[:10],                  # short header length
+        data[:header_end - 10],     # short header
+        data[:header_end + 1000],   # short table
+        data[:-1],                  # short resolve
+        data.replace(b'"stride"', b'"strode"', 1),  # missing key
+    ]
+    for content in corrupt:
+        path.write_bytes(content)
+        with pytest.raises(ValueError):
+            PrefixTable.load(str(path), BRANDS)
+
+
+def test_validator_rebuilds_corrupt_table(tmp_path, monkeypatch):
+    """Test a truncated table file is rebuilt rather than used."""
+    path = tmp_path / 'prefix-table.bin'
+    PrefixTable.build(BRANDS).dump(str(path))
+    path.write_bytes(path.read_bytes()[:-100])
+    monkeypatch.setenv(validator.PREFIX_TABLE_ENV, str(path))
+    monkeypatch.setattr(validator, '_prefix_table', None)
+    assert validator._get_prefix_table().lookup('4012001037141112') >= 0
+    PrefixTable.load(str(path), BRANDS)
+
+
+def test_validator_maps_saved_table(tmp_path, monkeypatch):
+    """Test the validator maps the table from PREFIX_TABLE_ENV, writing it once."""
+    path = tmp_path / 'prefix-table.bin'
+    monkeypatch.setenv(validator.PREFIX_TABLE_ENV, str(path))
+    monkeypatch.setattr(validator, '_prefix_table', None)
+    table = validator._get_prefix_table()
+    assert path.exists()
+    assert isinstance(table.table, memoryview)
+    
+    # A later process maps the same file instead of compiling
+    monkeypatch.setattr(validator, '_prefix_table', None)
+    monkeypatch.setattr(PrefixTable, 'build', None)
+    assert validator._get_prefix_table().fingerprint == table.fingerprint
+    assert validator.find_brand('4012001037141112')['name'] == 'visa'
@@ -0,0 +1,82 @@
+"""Test shared, immutable lookup results."""
+
+import copy
+import json
+import pickle
+import tracemalloc
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import CreditCardValidator
+from creditcard_identifier.records import FrozenList, FrozenRecord, freeze
+
+NUMBERS = ['4012001037141112', '5533798818319497', '378282246310005', '6062825624254001', '0000000000000000']
+
+
+def test_results_are_shared_and_read_only():
+    """Test lookups return the same read-only result every time."""
+    validator = CreditCardValidator()
+    visa = validator.find_brand('4012001037141112')
+    assert visa is validator.find_brand('4111111111111111')
+    assert visa['name'] == 'visa'
+    assert visa['priority_over'] == ['gpn', 'interpayment', 'instapayment']
+
+    with pytest.raises(TypeError):
+        visa['name'] = 'other'
+    with pytest.raises(TypeError):
+        visa.update(name='other')
+    with pytest.raises(TypeError):
+        del visa['name']
+
+    mutable = visa.copy()
+    mutable['name'] = 'other'
+    assert type(mutable) is dict
+    assert validator.find_brand('4012001037141112')['name'] == 'visa'
+
+
+def test_detailed_results_are_interned():
+    """Test detailed results share the scheme record and bin record."""
+    validator = CreditCardValidator()
+    first = validator.find_brand('378282246310005', detailed=True)
+    assert first is validator.find_brand('378282246310005', detailed=True)
+    assert isinstance(first['matched_bin'], FrozenRecord)
+    with pytest.raises(TypeError):
+        first['patterns'][0]['bin'] = '^5'
+    assert isinstance(first['patterns'], FrozenList)
+
+
+def test_results_serialize():
+    """Test results still work with json, pickle and copy."""
+    result = CreditCardValidator().find_brand('4012001037141112', detailed=True)
+    assert json.loads(json.dumps(result)) == result
+    assert pickle.loads(pickle.dumps(result)) == result
+    assert copy.deepcopy(result) == result
+    assert freeze({'a': [1, {'b': [2]}]}) == {'a': [1, {'b': [2]}]}
+
+
+@pytest.mark.parametrize('detailed', [False, True])
+def test_lookups_do_not_allocate(detailed):
+    """Test repeated lookups allocate no result per call."""
+    validator = CreditCardValidator()
+    for number in NUMBERS:
+        validator.find_brand(number, detailed)
+
+    # Keep every result alive: a result allocated per call cannot be freed
+    # before the next one, so net memory counts them
+    results = [None] * (2000 * len(NUMBERS))
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for i in range(2000):
+            for j, number in enumerate(NUMBERS):
+                results[i * len(NUMBERS) + j] = validator.find_brand(number, detailed)
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    # 8000 results: even an empty dict each would be over 400KB
+    assert after - before < 4096
@@ -0,0 +1,140 @@
+"""Test the PAN discovery scanner."""
+
+import json
+import random
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import scan
+from creditcard_identifier.__main__ import main
+from creditcard_identifier.scan import Finding, mask, scan_buffer, scan_file, scan_paths
+from creditcard_identifier.validator import find_brand, luhn
+
+
+def _corpus(seed=3, lines=3000):
+    """Log-like text with card numbers, near misses and long digit runs."""
+    rng = random.Random(seed)
+    cards = ['4012001037141112', '5555666677778884', '378282246310005', '6011000990139424',
+             '36490102462661', '4012001037141113', '1234567890123452']
+    out = []
+    for _ in range(lines):
+        digits = ''.join(rng.choice('0123456789') for _ in range(rng.randint(10, 24)))
+        card = rng.choice(cards)
+        sep = rng.choice(['', ' ', '-', '  ', '--'])
+        if sep:
+            card = sep.join(card[i:i + 4] for i in range(0, len(card), 4))
+        out.append(f'{rng.choice(["id=", "", "x", "9 "])}{digits} card={card}{rng.choice(["", "0", "-", " 1"])}\n')
+    return ''.join(out).encode('ascii')
+
+
+def _reference(data, path=None):
+    """Brute force: every digit run, checked with find_brand and luhn."""
+    findings = []
+    for match in scan.PAN_PATTERN.finditer(data):
+        digits = match.group().decode('ascii').replace(' ', '').replace('-', '')
+        brand = find_brand(digits)
+        if brand and luhn(digits):
+            findings.append(Finding(path, match.start(), len(match.group()), brand['name'], mask(digits)))
+    return findings
+
+
+def test_mask():
+    assert mask('4012001037141112') == '401200******1112'
+    assert mask(b'378282246310005') == '378282*****0005'
+
+
+def test_scan_buffer():
+    data = b'order 4012001037141112 paid; card 4012 0010 3714 1112, bad 4012001037141113\n'
+    findings = list(scan_buffer(data))
+    assert findings == [
+        Finding(None, 6, 16, 'visa', '401200******1112'),
+        Finding(None, 34, 19, 'visa', '401200******1112'),
+    ]
+
+
+def test_scan_separators_and_boundaries():
+    def brands(data):
+        return [(f.offset, f.length) for f in scan_buffer(data)]
+
+    # Dashes, and no match inside a longer run of digits
+    assert brands(b'5555-6666-7777-8884') == [(0, 19)]
+    assert brands(b'15555666677778884') == []
+    assert brands(b'5555666677778884' + b'1') == []
+    # A run continuing over one separator starts at its first digit only
+    assert brands(b'1 5555666677778884') == []
+    # Two separators end the run
+    assert brands(b'12  5555666677778884') == [(4, 16)]
+    # The longest separated prefix of a longer run
+    assert brands(b'5555 6666 7777 8884 1234 5678') == [(0, 19)]
+
+
+@pytest.mark.parametrize('size', range(13))
+def test_scan_short_buffers(monkeypatch, size):
+    """Test windows shorter than a candidate scan cleanly."""
+    for data in (b'x' * size, b'4' * size, b'4012001037141112'[:size]):
+        assert list(scan_buffer(data)) == []
+    # A short last block after a full one
+    monkeypatch.setattr(scan, 'BLOCK_SIZE', 64)
+    data = b'4012001037141112' + b'x' * 48 + b'9' * size
+    assert list(scan_buffer(data)) == _reference(data)
+
+
+@pytest.mark.parametrize('block_size', [64, 1000, 4 * 1024 * 1024])
+def test_scan_matches_reference(monkeypatch, block_size):
+    data = _corpus()
+    monkeypatch.setattr(scan, 'BLOCK_SIZE', block_size)
+    expected = _reference(data)
+    assert expected
+    assert list(scan_buffer(data)) == expected
+
+
+def test_scan_without_numpy(monkeypatch):
+    data = _corpus(seed=4)
+    monkeypatch.setattr(scan, '_numpy', lambda: None)
+    assert list(scan_buffer(data)) == _reference(data)
+
+
+def test_scan_paths_chunks(tmp_path):
+    paths = []
+    expected = []
+    for i in range(3):
+        path = tmp_path / f'log{i}.txt'
+        data = _corpus(seed=10 + i, lines=500)
+        path.write_bytes(data)
+        paths.append(str(path))
+        expected += _reference(data, str(path))
+    (tmp_path / 'empty.txt').write_bytes(b'')
+    paths.append(str(tmp_path / 'empty.txt'))
+
+    assert scan_file(paths[0]) == [f for f in expected if f.path == paths[0]]
+    # Small chunks split matches across chunk boundaries
+    assert list(scan_paths(paths, workers=1, chunk_size=4096)) == expected
+    assert list(scan_paths(paths, workers=2, chunk_size=4096)) == expected
+
+
+def test_scan_cli(tmp_path, capsys):
+    (tmp_path / 'clean.log').write_bytes(b'nothing to see 1234\n')
+    assert main(['scan', '--workers', '1', str(tmp_path)]) == 0
+
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'leak.log').write_bytes(b'xx 4012001037141112\n')
+    capsys.readouterr()
+    assert main(['scan', '--workers', '1', str(tmp_path)]) == 1
+    out = capsys.readouterr().out
+    assert out == f'{tmp_path / "sub" / "leak.log"}:3: visa 401200******1112\n'
+
+    assert main(['scan', '--workers', '1', '--json', str(tmp_path / 'sub')]) == 1
+    record = json.loads(capsys.readouterr().out)
+    assert record == {'path': str(tmp_path / 'sub' / 'leak.log'), 'offset': 3, 'length': 16,
+                      'brand': 'visa', 'masked': '401200******1112'}
+
+
+def test_scan_cli_short_file(tmp_path, capsys):
+    (tmp_path / 'ten.log').write_bytes(b'x' * 10)
+    assert main(['scan', '--workers', '1', str(tmp_path)]) == 0
+    assert capsys.readouterr().out == ''
@@ -0,0 +1,121 @@
+"""Test HTTP lookup server."""
+
+import asyncio
+import json
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier.server import LookupServer
+
+
+async def _read_response(reader):
+    """Read one HTTP response, returning (status, headers, body)."""
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split(' ')[1])
+    headers = {}
+    for line in head[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, headers, body
+
+
+async def _exchange(requests, count):
+    """Send raw requests on one connection and read count responses."""
+    lookup = LookupServer()
+    server = await asyncio.start_server(lookup.handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(requests)
+        responses = [await _read_response(reader) for _ in range(count)]
+        writer.close()
+    return responses
+
+
+def test_server_pipelined_requests():
+    """Test pipelined keep-alive lookups are answered in order."""
+    requests = (
+        b'GET /brand/4012001037141112 HTTP/1.1\r\nHost: x\r\n\r\n'
+        b'GET /brand/5533798818319497 HTTP/1.1\r\nHost: x\r\n\r\n'
+        b'GET /brand/1234 HTTP/1.1\r\nHost: x\r\n\r\n'
+        b'GET /health HTTP/1.1\r\nHost: x\r\n\r\n'
+    )
+    responses = asyncio.run(_exchange(requests, 4))
+    assert [status for status, _, _ in responses] == [200, 200, 200, 200]
+    assert responses[0][1]['connection'] == 'keep-alive'
+    assert json.loads(responses[0][2])['name'] == 'visa'
+    assert json.loads(responses[1][2])['name'] == 'mastercard'
+    assert json.loads(responses[2][2]) is None
+    assert json.loads(responses[3][2]) == {'status': 'ok'}
+
+
+def test_server_batch():
+    """Test batch endpoint returns one NDJSON line per number."""
+    body = b'4012001037141112\n378282246310005\n\n6011236044609927\n'
+    requests = (
+        b'POST /batch HTTP/1.1\r\nHost: x\r\nContent-Length: %d\r\n\r\n' % len(body) + body
+        + b'POST /batch?detailed=1 HTTP/1.1\r\nHost: x\r\nContent-Length: 17\r\n\r\n4012001037141112\n'
+    )
+    (status, headers, body), (_, _, detailed) = asyncio.run(_exchange(requests, 2))
+    assert status == 200
+    assert headers['content-type'] == 'application/x-ndjson'
+    results = [json.loads(line) for line in body.decode().splitlines()]
+    assert [r and r['name'] for r in results] == ['visa', 'amex', None, 'discover']
+    assert json.loads(detailed)['scheme'] == 'visa'
+
+
+def test_server_bin_lookup():
+    """Test BIN-only lookups with and without the PAN length."""
+    requests = (
+        b'GET /bin/636297?length=16 HTTP/1.1\r\nHost: x\r\n\r\n'
+        b'GET /bin/636297 HTTP/1.1\r\nHost: x\r\n\r\n'
+        b'GET /bin/63 HTTP/1.1\r\nHost: x\r\n\r\n'
+    )
+    (_, _, known), (_, _, unknown), (status, _, _) = asyncio.run(_exchange(requests, 3))
+    assert json.loads(known)['brand'] == 'elo'
+    assert json.loads(unknown)['brand'] is None
+    assert sorted(json.loads(unknown)['candidates']) == ['elo', 'interpayment', 'maestro']
+    assert status == 400
+
+
+def test_server_errors():
+    """Test unknown paths and bad methods, which close the connection."""
+    responses = asyncio.run(_exchange(b'GET /nope HTTP/1.1\r\n\r\n', 1))
+    assert responses[0][0] == 404
+    assert responses[0][1]['connection'] == 'close'
+    
+    responses = asyncio.run(_exchange(b'POST /brand/4012001037141112 HTTP/1.1\r\n\r\n', 1))
+    assert responses[0][0] == 405
+
+
+async def _expect_continue(body):
+    """Send a batch with Expect: 100-continue, the body only once asked."""
+    lookup = LookupServer()
+    server = await asyncio.start_server(lookup.handle_connection, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'POST /batch HTTP/1.1\r\nHost: x\r\nExpect: 100-continue\r\n'
+                     b'Content-Length: %d\r\n\r\n' % len(body))
+        interim = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), 5)
+        writer.write(body)
+        response = await _read_response(reader)
+        writer.close()
+    return interim, response
+
+
+def test_server_expect_continue():
+    """Test the server asks for the body of an Expect: 100-continue request."""
+    interim, (status, _, body) = asyncio.run(_expect_continue(b'4012001037141112\n'))
+    assert interim == b'HTTP/1.1 100 Continue\r\n\r\n'
+    assert status == 200
+    assert json.loads(body)['name'] == 'visa'
+
+    requests = b'POST /batch HTTP/1.1\r\nHost: x\r\nExpect: other\r\nContent-Length: 1\r\n\r\n\n'
+    [(status, _, _)] = asyncio.run(_exchange(requests, 1))
+    assert status == 417
@@ -0,0 +1,122 @@
+"""Test shadow evaluation of a candidate dataset."""
+
+import gzip
+import json
+import shutil
+import sys
+import os
+
+import pytest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from creditcard_identifier import CreditCardValidator, ShadowValidator
+from creditcard_identifier.bin_index import load_bin_index
+from creditcard_identifier.brands import BRANDS
+from creditcard_identifier.brands_detailed import DATA_DIR, get_index
+from creditcard_identifier.dataset_diff import Dataset
+from creditcard_identifier.shadow import Mismatch
+
+DANKORT = '4571000000000000'
+ELO = '4011780000000001'
+
+
+@pytest.fixture(scope='module')
+def candidate(tmp_path_factory):
+    """Copy of the package data with an elo issuer and the dankort 4571 range changed."""
+    path = tmp_path_factory.mktemp('shadow') / 'data'
+    shutil.copytree(DATA_DIR, path)
+    shard = path / 'elo' / 'bins-br.ndjson.gz'
+    with gzip.open(shard, 'rt', encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f]
+    for row in rows:
+        if row[0] == '401178':
+            row[3] = 'NEW ISSUER'
+    with gzip.open(shard, 'wt', encoding='utf-8') as f:
+        f.writelines(json.dumps(row) + '\n' for row in rows)
+    cards = [
+        {'name': b['name'], 'priorityOver': list(b.get('priority_over', [])), 'regexpBin': b['regexp_bin'],
+         'regexpFull': b['regexp_full'].replace('|4571', '') if b['name'] == 'dankort' else b['regexp_full'],
+         'regexpCvv': b['regexp_cvv']}
+        for b in BRANDS
+    ]
+    (path / 'cards.json').write_text(json.dumps(cards))
+    return path
+
+
+def test_shadow_mismatches(candidate):
+    reported = []
+    shadow = ShadowValidator(candidate, report=reported.append)
+    assert {(c.kind, c.scheme) for c in shadow.changes} == {('brand', None), ('bin', 'elo')}
+
+    assert shadow.find_brand(DANKORT)['name'] == 'dankort'
+    assert shadow.find_brand('4012001037141112')['name'] == 'visa'
+    assert shadow.find_brand(ELO, detailed=True)['matched_bin']['issuer'] != 'NEW ISSUER'
+    # Without details, the bin change is not looked at
+    assert shadow.is_supported(ELO)
+
+    assert reported == [
+        Mismatch('457100******0000', 'brand', 'dankort', 'visa'),
+        Mismatch('401178******0001', 'bin', reported[1].current, reported[1].candidate),
+    ]
+    assert reported[1].candidate['issuer'] == 'NEW ISSUER'
+    assert shadow.mismatches == shadow.reported == 2
+    assert list(shadow.samples) == reported
+
+
+def test_shadow_rate_limit(candidate):
+    shadow = ShadowValidator(candidate, rate=0.001, burst=3, keep=2)
+    for _ in range(10):
+        shadow.find_brand(DANKORT)
+    assert shadow.mismatches == 10
+    assert shadow.reported == 3
+    assert len(shadow.samples) == 2
+
+    sampled = ShadowValidator(candidate, sample_rate=0)
+    sampled.find_brand(DANKORT)
+    assert sampled.mismatches == 1 and sampled.reported == 0
+
+
+def test_shadow_accepted(candidate):
+    # dankort is not accepted now, and visa is not accepted in the candidate
+    shadow = ShadowValidator(candidate, validator=CreditCardValidator(accepted=['mastercard', 'elo']))
+    assert shadow.find_brand(DANKORT) is None
+    assert shadow.mismatches == 0
+
+
+def test_shadow_shares_unchanged_shards(candidate):
+    dataset = Dataset.load(candidate)
+    shards = get_index()['shards']
+    assert dataset.bin_index('visa') is load_bin_index('visa', shards['visa'])
+    assert dataset.bin_index('elo') is not load_bin_index('elo', shards['elo'])
+
+
+def test_shadow_same_version(tmp_path):
+    """Test a candidate equal to the current data gives no mismatches."""
+    path = tmp_path / 'data'
+    shutil.copytree(DATA_DIR, path)
+    cards = [
+        {'name': b['name'], 'priorityOver': list(b.get('priority_over', [])), 'regexpBin': b['regexp_bin'],
+         'regexpFull': b['regexp_full'], 'regexpCvv': b['regexp_cvv']}
+        for b in BRANDS
+    ]
+    (path / 'cards.json').write_text(json.dumps(cards))
+    numbers = ['5533798818319497', '4012001037141112', ELO, DANKORT, '378282246310005', '6362970000457013']
+    for candidate in (path, path / 'cards.json'):
+        shadow = ShadowValidator(candidate)
+        assert shadow.changes == []
+        for number in numbers:
+            shadow.find_brand(number, detailed=True)
+        assert shadow.mismatches == 0
+
+
+def test_shadow_restricted_validator(candidate):
+    """Test only the detailed data the validator serves is compared."""
+    shadow = ShadowValidator(candidate, validator=CreditCardValidator(schemes=['visa', 'dankort']))
+    assert {(c.kind, c.scheme) for c in shadow.changes} == {('brand', None)}
+    shadow.find_brand(ELO, detailed=True)
+    assert shadow.mismatches == 0
+
+    shadow = ShadowValidator(candidate, validator=CreditCardValidator(countries=['us']))
+    assert not any(c.kind == 'bin' for c in shadow.changes)
@@ -6,7 +6,8 @@ import os
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from creditcard_identifier import CreditCardValidator, find_brand, is_supported, validate_cvv
+from creditcard_identifier import CreditCardValidator, find_brand, is_supported, lookup_bin, validate_cvv
+from creditcard_identifier import validator as validator_module
 
 
 def test_find_brand():
@@ -273,6 +274,90 @@ def test_luhn():
         pass
 
 
+def test_validator_partial_dataset():
+    """Test restricting detailed data to selected schemes and countries."""
+    from creditcard_identifier.brands_detailed import _shard_cache
+    
+    _shard_cache.clear()
+    validator = CreditCardValidator(schemes=['visa', 'elo'], countries=['BR', 'ar'])
+    schemes = [b['scheme'] for b in validator.brands_detailed]
+    assert sorted(schemes) == ['elo', 'visa']
+    
+    # Only the matching shards are read
+    assert ('visa', 'br') in _shard_cache
+    assert ('visa', 'us') not in _shard_cache
+    assert not any(scheme == 'mastercard' for scheme, _ in _shard_cache)
+    
+    for brand in validator.brands_detailed:
+        for b in brand.get('bins', []):
+            assert {'BR', 'AR'} & set(b['countries'])
+    
+    # Detailed lookups match bins from the selected shards
+    visa = validator.get_brand_info_detailed('visa')
+    bin_record = visa['bins'][0]
+    brand = validator.find_brand(bin_record['bin'] + '0000000000', detailed=True)
+    assert brand['scheme'] == 'visa'
+    assert brand['matched_bin'] == bin_record
+    
+    # Unselected schemes still resolve, without detailed data
+    brand = validator.find_brand('5533798818319497', detailed=True)
+    assert brand['name'] == 'mastercard'
+    assert validator.get_brand_info_detailed('mastercard') is None
+
+
+def test_lookup_bin():
+    """Test brand resolution from the BIN and PAN length only."""
+    # Length known: priority rules apply as for full numbers
+    result = lookup_bin('636297', 16)
+    assert result['brand'] == 'elo'
+    assert result['lengths'] == [16]
+    assert result['cvv_length'] == 3
+    assert result['matched_bin']['bin'] == '636297'
+    assert result['brand'] == find_brand('6362970000000000')['name']
+    
+    # Length unknown: every brand possible under the prefix, by length
+    result = lookup_bin('636297')
+    assert result['brand'] is None
+    assert result['candidates'] == {'elo': [16], 'interpayment': [17, 18, 19], 'maestro': [12, 13, 14, 15]}
+    assert lookup_bin('3782822')['brand'] == 'amex'
+    assert lookup_bin('3782822')['cvv_length'] == 4
+    assert lookup_bin('3782822')['matched_bin']['issuer'] == 'AMERICAN EXPRESS COMPANY'
+    
+    # A 6-digit prefix cannot decide 7-digit patterns; a 7th digit can
+    assert lookup_bin('605474')['brand'] is None
+    assert lookup_bin('6054743', 16)['brand'] == find_brand('6054743000000000')['name']
+    
+    # No brand, or no brand at that length
+    assert lookup_bin('000000')['candidates'] == {}
+    assert lookup_bin('401200', 11)['brand'] is None
+    assert lookup_bin('401200', 16) is lookup_bin('401200', 16)
+    
+    for bad, length in (('40120', None), ('4012ab', None), (None, None), (['401200'], None), ('401200', [16])):
+        try:
+            lookup_bin(bad, length)
+            assert False, 'Should have raised ValueError'
+        except ValueError:
+            pass
+
+
+def test_lookup_bin_without_prefix_table(monkeypatch):
+    """Test BIN lookups from the brand patterns match the prefix table."""
+    prefixes = ['636297', '605474', '6054743', '3782822', '401200', '000000', '401178', '222100', '6011236']
+    expected = {}
+    for accepted in (None, ['visa', 'mastercard']):
+        validator = CreditCardValidator(accepted=accepted)
+        for prefix in prefixes:
+            for length in (None, 12, 15, 16, 19):
+                expected[accepted is None, prefix, length] = validator.lookup_bin(prefix, length)
+    
+    monkeypatch.setattr(validator_module, '_get_prefix_table', lambda: False)
+    for accepted in (None, ['visa', 'mastercard']):
+        validator = CreditCardValidator(accepted=accepted)
+        for prefix in prefixes:
+            for length in (None, 12, 15, 16, 19):
+                assert validator.lookup_bin(prefix, length) == expected[accepted is None, prefix, length]
+
+
 if __name__ == '__main__':
     test_find_brand()
     test_find_brand_detailed()
@@ -282,4 +367,6 @@ if __name__ == '__main__':
     test_validate_cvv_with_detailed_brand()
     test_validator_class()
     test_luhn()
+    test_validator_partial_dataset()
+    test_lookup_bin()
     print('All tests passed!')
@@ -0,0 +1,71 @@
+"""Test pre-fork warmup."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Add parent directory to path for imports
+sys.path.insert(0, ROOT)
+
+# Runs in a fresh interpreter, so the heap left by other tests does not count
+WORKER = '''
+import os, sys
+sys.path.insert(0, sys.argv[1])
+from creditcard_identifier import count, find_brand, lookup_bin, warmup
+from creditcard_identifier.bin_index import decode_bin
+
+def uss():
+    with open('/proc/self/smaps_rollup') as f:
+        return sum(int(line.split()[1]) for line in f if line.startswith(('Private_Clean', 'Private_Dirty')))
+
+validator = warmup()
+indexes = [validator._get_bin_index(scheme) for scheme in validator._get_shards()]
+indexes = [index for index in indexes if index is not None]
+assert indexes and all(isinstance(index.keys, memoryview) for index in indexes)
+assert all(index.keys.obj is indexes[0].keys.obj for index in indexes)
+
+numbers = []
+for index in indexes:
+    for key in index.keys[::50]:
+        prefix = decode_bin(key)
+        numbers.append(prefix + '0' * (16 - len(prefix)))
+
+read_fd, write_fd = os.pipe()
+pid = os.fork()
+if pid == 0:
+    before = uss()
+    for number in numbers:
+        find_brand(number)
+    count(numbers, by=('brand', 'issuer', 'country'))
+    for number in numbers[:500]:
+        lookup_bin(number[:8])
+    os.write(write_fd, str(uss() - before).encode())
+    os._exit(0)
+os.close(write_fd)
+print(len(numbers), int(os.read(read_fd, 64)))
+os.waitpid(pid, 0)
+'''
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork') or not os.path.exists('/proc/self/smaps_rollup'),
+                    reason='needs fork and /proc/self/smaps_rollup')
+def test_warmup_keeps_forked_workers_shared():
+    """Test lookups in a forked worker barely grow its unique memory (USS)."""
+    lookups, growth = map(int, subprocess.check_output([sys.executable, '-c', WORKER, ROOT]).split())
+    # Loading the indexes in the worker alone would take well over 10MB
+    assert lookups > 2000
+    assert 0 <= growth < 4096, f'USS grew by {growth} KB after {lookups} lookups'
+
+
+def test_warmup_builds_accepted_table():
+    """Test warmup builds the prefix table of the validator passed in."""
+    from creditcard_identifier import CreditCardValidator, validator as validator_module
+
+    accepted = frozenset(['discover', 'jcb'])
+    validator_module._accepted_tables.pop(accepted, None)
+    validator = validator_module.warmup(CreditCardValidator(accepted=accepted), detailed=False, freeze_gc=False)
+    assert validator_module._accepted_tables[accepted] is validator._prefix_table()
@@ -14,6 +14,7 @@ const {
   generateTypeScriptDeclarationDetailed,
   generatePython,
   generatePythonDetailed,
+  generatePythonDetailedShards,
   generateRuby,
   generateRubyDetailed,
   generateElixir,
@@ -58,14 +59,20 @@ function generateNativeFiles(simplified, detailed) {
   console.log('  ✓ Generated libs/javascript/data/brands.js');
   console.log('  ✓ Generated libs/javascript/data/brands-detailed.js');
   
-  // Python (simplified + detailed + JSON)
-  const pyDataDir = path.join(LIBS_DIR, 'python', 'creditcard_identifier');
-  fs.mkdirSync(pyDataDir, { recursive: true });
-  fs.writeFileSync(path.join(pyDataDir, 'brands.py'), generatePython(simplified));
-  fs.writeFileSync(path.join(pyDataDir, 'brands_detailed.py'), generatePythonDetailed(detailed));
-  fs.writeFileSync(path.join(pyDataDir, 'cards-detailed.json'), detailedJson);
+  // Python (simplified + detailed + JSON shards per scheme/country)
+  const pyDir = path.join(LIBS_DIR, 'python', 'creditcard_identifier');
+  const pyDataDir = path.join(pyDir, 'data');
+  fs.mkdirSync(pyDir, { recursive: true });
+  fs.rmSync(pyDataDir, { recursive: true, force: true });
+  fs.writeFileSync(path.join(pyDir, 'brands.py'), generatePython(simplified));
+  fs.writeFileSync(path.join(pyDir, 'brands_detailed.py'), generatePythonDetailed(detailed));
+  for (const [file, content] of Object.entries(generatePythonDetailedShards(detailed))) {
+    const filePath = path.join(pyDataDir, file);
+    fs.mkdirSync(path.dirname(filePath), { recursive: true });
+    fs.writeFileSync(filePath, content);
+  }
   console.log('  ✓ Generated libs/python/creditcard_identifier/brands.py');
-  console.log('  ✓ Generated libs/python/creditcard_identifier/brands_detailed.py + JSON');
+  console.log('  ✓ Generated libs/python/creditcard_identifier/brands_detailed.py + JSON shards');
   
   // Ruby (simplified + detailed + JSON)
   const rbLibDir = path.join(LIBS_DIR, 'ruby', 'lib', 'creditcard_identifier');
@@ -8,7 +8,7 @@
 
 const { LANG_CONFIG, toNativeValue, extractSimplifiedBrand, extractDetailedBrand } = require('./utils');
 const { generateJavaScript, generateJavaScriptDetailed, generateTypeScriptDeclaration, generateTypeScriptDeclarationDetailed } = require('./javascript');
-const { generatePython, generatePythonDetailed } = require('./python');
+const { generatePython, generatePythonDetailed, generatePythonDetailedShards } = require('./python');
 const { generateRuby, generateRubyDetailed } = require('./ruby');
 const { generateElixir, generateElixirDetailed } = require('./elixir');
 const { generateCSharp, generateCSharpDetailed } = require('./csharp');
@@ -26,6 +26,7 @@ module.exports = {
   // Python
   generatePython,
   generatePythonDetailed,
+  generatePythonDetailedShards,
   // Ruby
   generateRuby,
   generateRubyDetailed,